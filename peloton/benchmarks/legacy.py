@@ -0,0 +1,170 @@
+"""
+Algorithms of the legacy engine (`old/peloton/race/action.py` and `old/peloton/track/models.py`)
+ported from Django models to the current `Track` and `Car`, kept only as a benchmark baseline.
+Sector lookup is a linear scan, the next slower sector is searched sector by sector
+and a new car state is allocated every frame, exactly as the legacy code does
+"""
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, List, NamedTuple, Optional
+
+from peloton.conf.const import RACE_FRAME_DURATION
+from peloton.models.bolid import Car
+from peloton.models.simulation import calculate_max_speed
+from peloton.models.track import Track
+
+
+class LegacySector(NamedTuple):
+    sector_order: int
+    length: float
+    max_speed: float
+
+
+class LegacySectorPosition(NamedTuple):
+    sector: LegacySector
+    distance_from_sector_start: float
+
+
+class LegacyTrack:
+    def __init__(self, track: Track, car: Car):
+        max_speeds = calculate_max_speed(car.max_speed, track.sector_curvatures).tolist()
+        self.sectors: List[LegacySector] = [
+            LegacySector(idx, length, max_speed)
+            for idx, (length, max_speed) in enumerate(zip(track.sector_lengths.tolist(), max_speeds))
+        ]
+
+        self.length = 0.0
+        self.sectors_index: Dict[float, LegacySector] = {}
+        self.sectors_at_track_index: Dict[int, float] = {}
+        for sector in self.sectors:
+            self.sectors_index[self.length] = sector
+            self.sectors_at_track_index[sector.sector_order] = self.length
+            self.length += sector.length
+        self.sectors_index_keys = sorted(self.sectors_index.keys())
+
+    def get_sector_position(self, distance_from_start: float) -> LegacySectorPosition:
+        sector = None
+        distance_from_sector_start = 0.0
+
+        lap_distance_from_start = distance_from_start % self.length
+        for sector_distance_from_start in self.sectors_index_keys:
+            _sector = self.sectors_index[sector_distance_from_start]
+            if sector_distance_from_start <= lap_distance_from_start < sector_distance_from_start + _sector.length:
+                sector = _sector
+                distance_from_sector_start = lap_distance_from_start - sector_distance_from_start
+
+        if not sector:
+            sector = self.sectors_index[self.sectors_index_keys[-1]]
+            distance_from_sector_start = lap_distance_from_start - self.sectors_index_keys[-1]
+
+        return LegacySectorPosition(sector, distance_from_sector_start)
+
+    def get_distance_from_start(self, sector_position: LegacySectorPosition) -> float:
+        return self.sectors_at_track_index[sector_position.sector.sector_order] + \
+            sector_position.distance_from_sector_start
+
+    def distance_between_sector_positions(self, pos1, pos2: LegacySectorPosition) -> float:
+        dist_from_start_1 = self.get_distance_from_start(pos1)
+        dist_from_start_2 = self.get_distance_from_start(pos2)
+        if dist_from_start_2 >= dist_from_start_1:
+            return dist_from_start_2 - dist_from_start_1
+        return self.length - dist_from_start_1 + dist_from_start_2
+
+    def get_next_sector(self, order_id: int) -> LegacySector:
+        next_order_id = order_id + 1
+        if next_order_id >= len(self.sectors_index_keys):
+            next_order_id = 0
+        return self.sectors_index[self.sectors_index_keys[next_order_id]]
+
+
+@dataclass
+class LegacyCarState:
+    car: Car
+    track: LegacyTrack
+    speed: float = 0.0
+    acceleration: float = 0.0
+    distance_from_start: float = 0.0
+
+    @cached_property
+    def current_sector_position(self) -> LegacySectorPosition:
+        return self.track.get_sector_position(self.distance_from_start)
+
+    @cached_property
+    def next_slower_sector(self) -> Optional[LegacySector]:
+        current_sector = self.current_sector_position.sector
+
+        _sector = self.track.get_next_sector(current_sector.sector_order)
+        while _sector != current_sector:
+            if _sector.max_speed < self.speed:
+                return _sector
+            _sector = self.track.get_next_sector(_sector.sector_order)
+        return None
+
+    def get_braking_length(self, need_speed: float) -> float:
+        return (need_speed ** 2 - self.speed ** 2) / (2 * -self.car.max_braking)
+
+    def get_distance_to_braking_point(self, slower_sector: LegacySector) -> float:
+        braking_length = self.get_braking_length(slower_sector.max_speed)
+        distance_to_slower_sector = self.track.distance_between_sector_positions(
+            self.current_sector_position, LegacySectorPosition(slower_sector, 0.0)
+        )
+        return distance_to_slower_sector - braking_length
+
+    @cached_property
+    def possible_to_brake(self) -> bool:
+        if not self.next_slower_sector:
+            return True
+        return self.get_distance_to_braking_point(self.next_slower_sector) >= 0
+
+
+def need_brake(car_state: LegacyCarState) -> bool:
+    if car_state.speed > car_state.current_sector_position.sector.max_speed:
+        return True
+
+    slower_sector = car_state.next_slower_sector
+    if slower_sector:
+        one_frame_length = car_state.speed * RACE_FRAME_DURATION
+        if car_state.get_distance_to_braking_point(slower_sector) - one_frame_length <= 0:
+            return True
+    return False
+
+
+def need_accelerate(car_state: LegacyCarState) -> bool:
+    if car_state.speed < car_state.current_sector_position.sector.max_speed:
+        # the legacy look-ahead: its answer was ignored, but the next state was built every frame
+        next_frame_state = evaluate_next_frame_state(car_state, car_state.car.max_acceleration)
+        next_frame_state.possible_to_brake
+        return True
+    return False
+
+
+def evaluate_next_frame_state(current_state: LegacyCarState, new_acceleration: float) -> LegacyCarState:
+    return LegacyCarState(
+        car=current_state.car,
+        track=current_state.track,
+        speed=current_state.speed + new_acceleration * RACE_FRAME_DURATION,
+        acceleration=new_acceleration,
+        distance_from_start=current_state.distance_from_start + (
+            current_state.speed * RACE_FRAME_DURATION + new_acceleration * RACE_FRAME_DURATION ** 2 / 2
+        ),
+    )
+
+
+def run_legacy_race(track: LegacyTrack, car: Car, laps: int = 1) -> int:
+    """
+    The frame loop of the legacy `simulate` command without database writes, returns the number of frames
+    """
+    car_state = LegacyCarState(car=car, track=track)
+    race_distance = laps * track.length
+    frame = 0
+
+    while car_state.distance_from_start < race_distance:
+        frame += 1
+        new_acceleration = car_state.acceleration
+        if need_accelerate(car_state):
+            new_acceleration = car.max_acceleration
+        elif need_brake(car_state):
+            new_acceleration = -car.max_braking
+        car_state = evaluate_next_frame_state(car_state, new_acceleration)
+
+    return frame
@@ -0,0 +1,216 @@
+import datetime
+import platform
+import subprocess
+import time
+import timeit
+from typing import Callable, List, Optional, Sequence, Dict, Iterator, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from peloton.benchmarks.legacy import LegacyTrack, LegacyCarState, need_brake, run_legacy_race
+from peloton.models.bolid import Peloton, Car
+from peloton.models.simulation import RaceMode
+from peloton.models.track import Track, CURVATURE_K
+from peloton.simulation.frames import sector_rows, allowed_speed
+from peloton.simulation.race import Race
+
+SYNTHETIC_TRACK_LENGTH = 5000.0
+LOOKUP_QUERIES = 1000
+# the legacy engine scans the whole track in python on every lookup, bigger tracks would take hours
+LEGACY_LOOKUP_MAX_SECTORS = 1000
+LEGACY_RACE_MAX_SECTORS = 100
+
+QUICK_SECTORS = (10, 1000, 100000)
+QUICK_CARS = (1, 10)
+FULL_SECTORS = (10, 100, 1000, 10000, 100000)
+FULL_CARS = (1, 10, 100)
+
+
+class BenchmarkResult(BaseModel):
+    name: str
+    engine: str
+    sectors: int
+    cars: int
+    runs: int
+    best: float
+    mean: float
+
+    @property
+    def key(self) -> Tuple[str, str, int, int]:
+        return self.name, self.engine, self.sectors, self.cars
+
+
+class BenchmarkReport(BaseModel):
+    commit: Optional[str]
+    created_at: datetime.datetime
+    python: str
+    numpy: str
+    results: List[BenchmarkResult]
+
+
+class Regression(BaseModel):
+    name: str
+    engine: str
+    sectors: int
+    cars: int
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+def synthetic_track(sectors: int, seed: int = 0) -> Track:
+    """
+    The same 5 km circuit at any resolution: straights and corners of random curvature,
+    split into `sectors` sectors of equal length
+    """
+    rng = np.random.default_rng(seed)
+    position = np.linspace(0.0, 1.0, sectors, endpoint=False)
+    # 12 turns per lap to the right and to the left in turn, every turn is a smooth bump of curvature
+    turn = (position * 12).astype(int)
+    curvatures = np.sin(12 * np.pi * position) ** 8 * rng.uniform(0.2, 0.9, 12)[turn]
+    lengths = np.full(sectors, SYNTHETIC_TRACK_LENGTH / sectors)
+    corners = np.where(turn % 2 == 0, 1.0, -1.0) * curvatures * lengths / CURVATURE_K
+    return Track.from_arrays(lengths, np.round(corners, 6), validate=False)
+
+
+def synthetic_peloton(cars: int, seed: int = 0) -> Peloton:
+    rng = np.random.default_rng(seed)
+    return Peloton.from_records([
+        dict(
+            caption=f'car {idx}',
+            max_acceleration=float(rng.uniform(3.0, 5.0)),
+            max_braking=float(rng.uniform(8.0, 12.0)),
+            max_speed=float(rng.uniform(50.0, 60.0)),
+        )
+        for idx in range(cars)
+    ], validate=False)
+
+
+def measure(func: Callable[[], object], repeat: int = 5, min_time: float = 0.2) -> Tuple[int, float, float]:
+    """
+    Seconds per call: the best and the mean of `repeat` rounds,
+    fast calls are looped inside a round until it takes `min_time` at least
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    rounds = [elapsed / number] + [timer.timeit(number) / number for _ in range(repeat - 1)]
+    return number * repeat, min(rounds), sum(rounds) / len(rounds)
+
+
+def _cases(sectors: int, cars: int, laps: int) -> Iterator[Tuple[str, str, Callable[[], object]]]:
+    track = synthetic_track(sectors)
+    peloton = synthetic_peloton(cars)
+    distances = np.random.default_rng(1).uniform(0.0, track.length, LOOKUP_QUERIES)
+    distances_list = distances.tolist()
+
+    yield 'sector_lookup', 'engine', lambda: track.get_sector_indexes(distances)
+
+    race = Race(track, peloton)
+    positions = np.resize(distances, cars)
+    speeds = np.full(cars, 50.0)
+    steps = speeds * race.frame_duration
+    tables, frame_cars = race.frame_tables()
+
+    def braking_decision():
+        _, row = sector_rows(tables, frame_cars, positions)
+        return allowed_speed(tables, frame_cars, row, positions, positions + steps) < speeds
+
+    yield 'braking_decision', 'engine', braking_decision
+
+    yield 'lap', 'frames', lambda: Race(track, peloton, mode=RaceMode.FRAMES).run()
+    yield 'race', 'frames', lambda: Race(track, peloton, laps=laps, mode=RaceMode.FRAMES).run()
+    yield 'lap', 'solver', lambda: Race(track, peloton, mode=RaceMode.SOLVER).run()
+    yield 'race', 'solver', lambda: Race(track, peloton, laps=laps, mode=RaceMode.SOLVER).run()
+
+    if sectors > LEGACY_LOOKUP_MAX_SECTORS:
+        return
+    legacy_tracks = [LegacyTrack(track, car) for car in peloton.cars]
+    yield 'sector_lookup', 'legacy', lambda: [legacy_tracks[0].get_sector_position(d) for d in distances_list]
+    yield 'braking_decision', 'legacy', lambda: [
+        need_brake(LegacyCarState(car=car, track=legacy_track, speed=50.0, distance_from_start=distance))
+        for car, legacy_track, distance in zip(peloton.cars, legacy_tracks, positions.tolist())
+    ]
+
+    if sectors > LEGACY_RACE_MAX_SECTORS:
+        return
+    yield 'lap', 'legacy', lambda: _run_legacy(legacy_tracks, peloton.cars, 1)
+    yield 'race', 'legacy', lambda: _run_legacy(legacy_tracks, peloton.cars, laps)
+
+
+def _run_legacy(legacy_tracks: Sequence[LegacyTrack], cars: Sequence[Car], laps: int):
+    # the legacy engine raced a single car, a field is raced one car after another
+    for legacy_track, car in zip(legacy_tracks, cars):
+        run_legacy_race(legacy_track, car, laps)
+
+
+def run_benchmarks(
+        sectors: Sequence[int] = QUICK_SECTORS,
+        cars: Sequence[int] = QUICK_CARS,
+        laps: int = 3,
+        repeat: int = 3,
+        min_time: float = 0.2,
+        legacy: bool = True,
+        names: Optional[Sequence[str]] = None,
+        progress: Callable[[BenchmarkResult], None] = None,
+) -> List[BenchmarkResult]:
+    results = []
+    for sectors_count in sectors:
+        for cars_count in cars:
+            for name, engine, func in _cases(sectors_count, cars_count, laps):
+                if (names and name not in names) or (engine == 'legacy' and not legacy):
+                    continue
+                runs, best, mean = measure(func, repeat=repeat, min_time=min_time)
+                result = BenchmarkResult(
+                    name=name, engine=engine, sectors=sectors_count, cars=cars_count, runs=runs, best=best, mean=mean,
+                )
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+    return results
+
+
+def _current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def make_report(results: List[BenchmarkResult]) -> BenchmarkReport:
+    return BenchmarkReport(
+        commit=_current_commit(),
+        created_at=datetime.datetime.fromtimestamp(time.time(), datetime.timezone.utc),
+        python=platform.python_version(),
+        numpy=np.__version__,
+        results=results,
+    )
+
+
+def compare(baseline: BenchmarkReport, current: BenchmarkReport, threshold: float = 1.2) -> List[Regression]:
+    """
+    Benchmarks of both reports whose best time got slower more than `threshold` times
+    """
+    baseline_results: Dict[Tuple[str, str, int, int], BenchmarkResult] = {
+        result.key: result for result in baseline.results
+    }
+    regressions = []
+    for result in current.results:
+        old_result = baseline_results.get(result.key)
+        if old_result is not None and result.best > old_result.best * threshold:
+            regressions.append(Regression(
+                name=result.name, engine=result.engine, sectors=result.sectors, cars=result.cars,
+                baseline=old_result.best, current=result.best,
+            ))
+    return regressions
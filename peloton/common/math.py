@@ -1,24 +1,36 @@
-from peloton.conf.settings import sim_config
+import numpy as np
 
+from peloton.conf.settings import get_config
 
-def is_equal(a: float, b: float) -> bool:
-    return abs(a - b) < sim_config.float_precision
 
+def is_equal(a: float, b: float, precision: float = None) -> bool:
+    """
+    `precision` defaults to `float_precision` of the engine context config
+    """
+    if precision is None:
+        precision = get_config().float_precision
+    return abs(a - b) < precision
 
-def pull_down(v: float, dst: float):
-    if v > dst and is_equal(v, dst):
+
+def pull_down(v: float, dst: float, precision: float = None):
+    if v > dst and is_equal(v, dst, precision):
         return dst
 
     return v
 
 
-def pull_up(v: float, dst: float):
-    if v < dst and is_equal(v, dst):
+def pull_down_array(v: np.ndarray, dst: float, precision: float = None) -> np.ndarray:
+    if precision is None:
+        precision = get_config().float_precision
+    return np.where((v > dst) & (np.abs(v - dst) < precision), dst, v)
+
+
+def pull_up(v: float, dst: float, precision: float = None):
+    if v < dst and is_equal(v, dst, precision):
         return dst
 
     return v
 
 
-def pull_to(v: float, dst: float):
-    return dst if is_equal(v, dst) else v
-
+def pull_to(v: float, dst: float, precision: float = None):
+    return dst if is_equal(v, dst, precision) else v
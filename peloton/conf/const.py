@@ -0,0 +1 @@
+RACE_FRAME_DURATION = 0.01
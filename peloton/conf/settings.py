@@ -1,14 +1,65 @@
-from pydantic import BaseModel
+import itertools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from pydantic import BaseModel, PrivateAttr
 
 from peloton.helpers.conversions import kmh
 
+# revisions are unique across all the configs, so a revision tells both the config and its state
+_revisions = itertools.count(1)
+
 
 class SimConfig(BaseModel):
     float_precision: float
     slowest_curve_speed: float
 
+    _revision: int = PrivateAttr(default_factory=lambda: next(_revisions))
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in self.__fields__:
+            self._revision = next(_revisions)
+
+    def copy(self, **kwargs) -> 'SimConfig':
+        config = super().copy(**kwargs)
+        config._revision = next(_revisions)
+        return config
+
+    @property
+    def revision(self) -> int:
+        """
+        Changes with every change of the config and differs between configs,
+        so values derived from it can be kept per config and recalculated
+        """
+        return self._revision
+
 
 sim_config = SimConfig(
     float_precision=0.001,
     slowest_curve_speed=kmh(10.0),
 )
+
+# the config of the engine context, every thread starts with the default `sim_config`
+_active_config: ContextVar[SimConfig] = ContextVar('active_config', default=sim_config)
+
+
+def get_config() -> SimConfig:
+    """
+    The config of the current engine context, see `use_config`
+    """
+    return _active_config.get()
+
+
+@contextmanager
+def use_config(config: SimConfig) -> Iterator[SimConfig]:
+    """
+    Engine context: code inside the block, in this thread only, uses `config` instead of the default `sim_config`.
+    Races with different configs can run at the same time in different threads
+    """
+    token = _active_config.set(config)
+    try:
+        yield config
+    finally:
+        _active_config.reset(token)
@@ -0,0 +1,229 @@
+import itertools
+import math
+import xml.etree.ElementTree as ElementTree
+from typing import Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
+
+import numpy as np
+
+from peloton.models.track import Track, CURVATURE_K
+
+POINTS_CHUNK_SIZE = 65536
+# curvature of a 500 meters radius, flatter segments are joined into straights
+STRAIGHT_CURVATURE = 0.01
+# points closer than this are the same point
+MIN_SEGMENT_LENGTH = 1e-6
+EARTH_RADIUS = 6371008.8
+
+
+def _wrap_degrees(angles: np.ndarray) -> np.ndarray:
+    return (angles + 180.0) % 360.0 - 180.0
+
+
+def _merge_straights(
+        lengths: np.ndarray, corners: np.ndarray, straight_curvature: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Joins every run of adjacent near-straight sectors into a single sector
+    """
+    straight = np.abs(corners) * CURVATURE_K < straight_curvature * lengths
+    starts = np.ones(len(lengths), dtype=bool)
+    starts[1:] = ~(straight[1:] & straight[:-1])
+    groups = np.cumsum(starts) - 1
+    return np.bincount(groups, weights=lengths), np.bincount(groups, weights=corners)
+
+
+class CenterlineBuilder:
+    """
+    Turns a stream of (x, y) centerline points in meters into track sectors, chunk by chunk.
+    Every segment between two points is a sector, half of the heading change at every point
+    goes to each of the two segments meeting there, corners are in degrees, positive to the right.
+    Runs of near-straight segments are joined as soon as a chunk arrives, so the memory used
+    is bounded by the chunk size and the number of sectors left after joining
+    """
+    def __init__(self, straight_curvature: float = STRAIGHT_CURVATURE):
+        self.straight_curvature = straight_curvature
+
+        self._first_point: Optional[np.ndarray] = None
+        self._last_point: Optional[np.ndarray] = None
+        # the first segment waits for the heading of the last one on a closed track
+        self._first_segment: Optional[Tuple[float, float, float]] = None
+        # (length, heading, corner from the turn at its start) of the segment waiting for the next heading
+        self._pending: Optional[Tuple[float, float, float]] = None
+        self._lengths: List[np.ndarray] = []
+        self._corners: List[np.ndarray] = []
+        self.points = 0
+
+    def feed(self, points: np.ndarray):
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if not len(points):
+            return
+        self.points += len(points)
+        if self._first_point is None:
+            self._first_point = points[0]
+        else:
+            points = np.concatenate(([self._last_point], points))
+        self._last_point = points[-1]
+
+        deltas = np.diff(points, axis=0)
+        lengths = np.hypot(deltas[:, 0], deltas[:, 1])
+        keep = lengths >= MIN_SEGMENT_LENGTH
+        self._add_segments(lengths[keep], np.degrees(np.arctan2(deltas[keep, 1], deltas[keep, 0])))
+
+    def _add_segments(self, lengths: np.ndarray, headings: np.ndarray):
+        if not len(lengths):
+            return
+        if self._first_segment is None:
+            self._first_segment = (float(lengths[0]), float(headings[0]), 0.0)
+            self._pending = self._first_segment
+            lengths, headings = lengths[1:], headings[1:]
+            if not len(lengths):
+                return
+
+        pending_length, pending_heading, pending_corner = self._pending
+        lengths = np.concatenate(([pending_length], lengths))
+        headings = np.concatenate(([pending_heading], headings))
+        # right turns are positive, headings grow counterclockwise
+        half_turns = -_wrap_degrees(np.diff(headings)) / 2
+        corners = np.concatenate(([pending_corner], half_turns)) + np.append(half_turns, 0.0)
+
+        if self._pending is self._first_segment:
+            # the first segment gets its turn from the end of the lap in `finish`
+            self._first_segment = (self._first_segment[0], self._first_segment[1], float(half_turns[0]))
+            lengths, corners = lengths[1:], corners[1:]
+        self._pending = (float(lengths[-1]), float(headings[-1]), float(half_turns[-1]))
+
+        lengths, corners = _merge_straights(lengths[:-1], corners[:-1], self.straight_curvature)
+        if not len(lengths):
+            return
+        if self._lengths:
+            # a straight cut by the chunk border
+            lengths, corners = _merge_straights(
+                np.concatenate((self._lengths[-1][-1:], lengths)),
+                np.concatenate((self._corners[-1][-1:], corners)),
+                self.straight_curvature,
+            )
+            self._lengths[-1], self._corners[-1] = self._lengths[-1][:-1], self._corners[-1][:-1]
+        self._lengths.append(lengths)
+        self._corners.append(corners)
+
+    def finish(self, closed: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sector lengths and corners of the whole centerline, a closed track gets a segment
+        from the last point back to the first one unless the trace is closed already
+        """
+        if self._first_segment is None:
+            raise ValueError('Centerline must have at least two distinct points')
+
+        if closed:
+            self.feed(self._first_point[np.newaxis])
+            self.points -= 1
+        first_length, first_heading, first_out_corner = self._first_segment
+
+        if self._pending is self._first_segment:
+            lengths, corners = np.array([first_length]), np.array([0.0])
+        else:
+            pending_length, pending_heading, pending_corner = self._pending
+            closing_turn = -float(_wrap_degrees(np.array(first_heading - pending_heading))) / 2 if closed else 0.0
+            lengths = np.concatenate(
+                ([first_length], *self._lengths, [pending_length])
+            )
+            corners = np.concatenate(
+                ([closing_turn + first_out_corner], *self._corners, [pending_corner + closing_turn])
+            )
+        return _merge_straights(lengths, corners, self.straight_curvature)
+
+
+def import_centerline(
+        chunks: Iterable[np.ndarray],
+        closed: bool = True,
+        straight_curvature: float = STRAIGHT_CURVATURE,
+        validate: bool = True,
+) -> Track:
+    """
+    Track from chunks of (x, y) centerline points in meters, sectors are validated
+    with the same checks as `Sector`: a corner sharper than the track allows raises `ValidationError`
+    """
+    builder = CenterlineBuilder(straight_curvature)
+    for chunk in chunks:
+        builder.feed(chunk)
+    lengths, corners = builder.finish(closed=closed)
+    return Track.from_arrays(lengths, corners, validate=validate)
+
+
+def read_csv_points(
+        source: Union[str, TextIO], chunk_size: int = POINTS_CHUNK_SIZE, columns: Sequence[int] = (0, 1)
+) -> Iterator[np.ndarray]:
+    """
+    Chunks of (x, y) points from CSV `columns`, a header line is skipped
+    """
+    csv_file = open(source) if isinstance(source, str) else source
+    try:
+        header_checked = False
+        while True:
+            lines = list(itertools.islice(csv_file, chunk_size))
+            if not lines:
+                return
+            if not header_checked:
+                header_checked = True
+                try:
+                    [float(lines[0].split(',')[column]) for column in columns]
+                except (ValueError, IndexError):
+                    lines = lines[1:]
+            if lines:
+                yield np.loadtxt(lines, delimiter=',', usecols=columns, ndmin=2)
+    finally:
+        if isinstance(source, str):
+            csv_file.close()
+
+
+def read_gpx_points(source: Union[str, TextIO], chunk_size: int = POINTS_CHUNK_SIZE) -> Iterator[np.ndarray]:
+    """
+    Chunks of track or route points of a GPX file projected to meters around the first point.
+    Parsed elements are dropped right away, so the whole document is never kept in memory
+    """
+    origin: Optional[Tuple[float, float]] = None
+    parent = None
+    latitudes: List[float] = []
+    longitudes: List[float] = []
+
+    def project() -> np.ndarray:
+        latitude = np.radians(latitudes)
+        longitude = np.radians(longitudes)
+        x = EARTH_RADIUS * (longitude - origin[1]) * math.cos(origin[0])
+        y = EARTH_RADIUS * (latitude - origin[0])
+        latitudes.clear()
+        longitudes.clear()
+        return np.column_stack((x, y))
+
+    for event, element in ElementTree.iterparse(source, events=('start', 'end')):
+        tag = element.tag.rsplit('}', 1)[-1]
+        if event == 'start':
+            if tag in ('trkseg', 'rte'):
+                parent = element
+            continue
+        if tag not in ('trkpt', 'rtept'):
+            continue
+
+        latitudes.append(float(element.get('lat')))
+        longitudes.append(float(element.get('lon')))
+        if origin is None:
+            origin = (math.radians(latitudes[0]), math.radians(longitudes[0]))
+        element.clear()
+        if parent is not None:
+            parent.remove(element)
+        if len(latitudes) == chunk_size:
+            yield project()
+
+    if latitudes:
+        yield project()
+
+
+def import_track(path: str, chunk_size: int = POINTS_CHUNK_SIZE, **kwargs) -> Track:
+    """
+    Track from a `.gpx` file or a CSV of x, y columns in meters, see `import_centerline` for the options
+    """
+    if path.lower().endswith('.gpx'):
+        chunks = read_gpx_points(path, chunk_size)
+    else:
+        chunks = read_csv_points(path, chunk_size)
+    return import_centerline(chunks, **kwargs)
@@ -1,6 +1,8 @@
-from typing import Sequence
+from typing import Sequence, Iterable, Mapping, Any, List
 
-from pydantic import BaseModel, confloat
+import numpy as np
+from pydantic import BaseModel, ValidationError, confloat, errors
+from pydantic.error_wrappers import ErrorWrapper
 
 
 class Car(BaseModel):
@@ -12,3 +14,69 @@ class Car(BaseModel):
 
 class Peloton(BaseModel):
     cars: Sequence[Car]
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping[str, Any]], validate: bool = True) -> 'Peloton':
+        """
+        Bulk construction of a big fleet, e.g. for parameter sweeps: fields are validated column by column
+        with the same checks and messages as `Car`, cars are created without per object validation.
+        `validate=False` skips checks for trusted data
+        """
+        records = list(records)
+        if validate:
+            records = _validate_car_records(records)
+        return cls.construct(cars=[
+            Car.construct(**{name: record[name] for name in Car.__fields__})
+            for record in records
+        ])
+
+
+_MISSING = object()
+
+
+def _validate_car_records(records: List[Mapping[str, Any]]) -> List[Mapping[str, Any]]:
+    """
+    Raises the errors `Car` would raise for the records, returns the records with values coerced as `Car` does
+    """
+    car_errors = []
+    coerced = {}
+    for field_order, (name, field) in enumerate(Car.__fields__.items()):
+        column = [record.get(name, _MISSING) for record in records]
+        for idx, value in enumerate(column):
+            if value is _MISSING:
+                car_errors.append((idx, field_order, errors.MissingError()))
+            elif value is None:
+                car_errors.append((idx, field_order, errors.NoneIsNotAllowedError()))
+
+        if field.type_ is str:
+            for idx, value in enumerate(column):
+                if value is _MISSING or value is None or isinstance(value, str):
+                    continue
+                # other values (numbers, bytes) are left to the validators of the field
+                value, error = field.validate(value, {}, loc=name, cls=Car)
+                if error is None:
+                    coerced.setdefault(idx, {})[name] = value
+                else:
+                    car_errors.append((idx, field_order, error.exc))
+            continue
+
+        is_float = np.array([isinstance(value, float) for value in column], dtype=bool)
+        car_errors.extend(
+            (idx, field_order, errors.FloatError())
+            for idx in np.nonzero(~is_float)[0].tolist()
+            if column[idx] is not _MISSING and column[idx] is not None
+        )
+        values = np.array([value if is_float[idx] else np.nan for idx, value in enumerate(column)], dtype=float)
+        car_errors.extend(
+            (idx, field_order, errors.NumberNotGtError(limit_value=field.type_.gt))
+            for idx in np.nonzero(is_float & ~(values > field.type_.gt))[0].tolist()
+        )
+
+    if car_errors:
+        field_names = list(Car.__fields__)
+        car_errors.sort(key=lambda car_error: car_error[:2])
+        raise ValidationError(
+            [ErrorWrapper(exc, loc=('cars', idx, field_names[field_order])) for idx, field_order, exc in car_errors],
+            Peloton,
+        )
+    return [dict(record, **coerced[idx]) if idx in coerced else record for idx, record in enumerate(records)]
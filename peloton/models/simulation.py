@@ -1,8 +1,25 @@
-from pydantic import BaseModel
+from enum import Enum
+from typing import Dict, List, Union
 
-from peloton.conf.settings import sim_config
+import numpy as np
+from pydantic import BaseModel, confloat
+
+from peloton.conf.settings import get_config
 from peloton.models.bolid import Car
-from peloton.models.track import Sector
+from peloton.models.track import Sector, Track
+
+
+def calculate_max_speed(
+        car_max_speed: float, curvature: Union[float, np.ndarray], slowest_curve_speed: float = None
+) -> Union[float, np.ndarray]:
+    """
+    `slowest_curve_speed` defaults to the one of the engine context config
+    """
+    if slowest_curve_speed is None:
+        slowest_curve_speed = get_config().slowest_curve_speed
+    speed_delta = car_max_speed - slowest_curve_speed
+    speed_k = (1.0 - curvature)**2
+    return speed_delta * speed_k + slowest_curve_speed
 
 
 class RaceCar(BaseModel):
@@ -10,6 +27,96 @@ class RaceCar(BaseModel):
     speed: float
 
     def max_speed(self, sector: Sector) -> float:
-        speed_delta = self.car.max_speed - sim_config.slowest_curve_speed
-        speed_k = (1.0 - sector.curvature)**2
-        return speed_delta * speed_k + sim_config.slowest_curve_speed
+        return calculate_max_speed(self.car.max_speed, sector.curvature)
+
+    def max_speeds(self, track: Track) -> np.ndarray:
+        """
+        `max_speed` for every sector of the track, memoized by the track
+        """
+        return track.get_derived(
+            ('max_speeds', self.car.max_speed),
+            lambda: calculate_max_speed(self.car.max_speed, track.sector_curvatures),
+        )
+
+
+class RaceMode(str, Enum):
+    FRAMES = 'frames'
+    SOLVER = 'solver'
+    ADAPTIVE = 'adaptive'
+
+
+class Interaction(BaseModel):
+    """
+    Cars affecting each other on track. Outside of straights a car can not pass the car ahead
+    and keeps `following_distance` meters behind it, on a straight with both cars in it the faster one overtakes.
+    A car on a straight closer than `slipstream_distance` meters to the car ahead
+    may go `slipstream_bonus` faster than its own speed limit.
+    Sectors with curvature up to `straight_curvature` are straights
+    """
+    following_distance: confloat(ge=0) = 5.0
+    slipstream_distance: confloat(ge=0) = 30.0
+    slipstream_bonus: confloat(ge=0) = 0.03
+    straight_curvature: confloat(ge=0, le=1) = 0.01
+
+
+class CarResult(BaseModel):
+    caption: str
+    finish_time: float
+    lap_times: List[float]
+    top_speed: float
+
+    @property
+    def best_lap_time(self) -> float:
+        return min(self.lap_times)
+
+
+class RaceResult(BaseModel):
+    laps: int
+    frames: int
+    race_time: float
+    cars: List[CarResult]
+
+    @property
+    def standings(self) -> List[CarResult]:
+        return sorted(self.cars, key=lambda car_result: car_result.finish_time)
+
+
+class RaceNoise(BaseModel):
+    """
+    Random variation of a Monte Carlo race. Grip of every sector differs by `grip` (relative standard deviation)
+    between race replicas and is the same for all the cars of a replica, the speed limits of the sector scale
+    with it but never exceed the car max speed. In every sector of every lap a driver misses the limit
+    by a relative error, the absolute value of a normal variable with `driver_error` deviation,
+    one value for the whole peloton or one per car
+    """
+    grip: confloat(ge=0, lt=1) = 0.02
+    driver_error: Union[confloat(ge=0, lt=1), List[confloat(ge=0, lt=1)]] = 0.01
+
+
+class Distribution(BaseModel):
+    """
+    Summary of a streamed sample: exact moments and extremes, quantiles estimated from a histogram
+    of `histogram_counts` between `histogram_edges`, so they are within a bin width of the exact ones
+    """
+    count: int
+    mean: float
+    std: float
+    min: float
+    max: float
+    quantiles: Dict[float, float]
+    histogram_edges: List[float]
+    histogram_counts: List[int]
+
+
+class CarDistribution(BaseModel):
+    caption: str
+    win_probability: float
+    finish_time: Distribution
+    best_lap_time: Distribution
+
+
+class MonteCarloResult(BaseModel):
+    laps: int
+    replicas: int
+    seed: int
+    cars: List[CarDistribution]
@@ -1,15 +1,56 @@
+import bisect
+import copy
 import math
-from typing import Sequence
+import weakref
+from typing import Sequence, NamedTuple, List, Optional, Tuple, Union, Dict, Hashable, Callable, TypeVar, Mapping, Any
 
-from pydantic import BaseModel, confloat, validator
+import numpy as np
+from pydantic import BaseConfig, BaseModel, PrivateAttr, ValidationError, confloat, validator, errors
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.fields import ModelField, Required
 
-from peloton.common.math import pull_down
+from peloton.common.math import pull_down, pull_down_array
+from peloton.conf.settings import get_config
+
+CURVATURE_K = (5 * math.pi) / 180
+# must be changed with any change of the curvature formula, so precomputed curvatures are dropped
+CURVATURE_VERSION = 1
+
+T = TypeVar('T')
 
 
 class Sector(BaseModel):
     length: confloat(strict=True, gt=0)
     corner: confloat(strict=True, lt=360.0)
 
+    _curvature: Optional[float] = PrivateAttr(default=None)
+    _curvature_revision: int = PrivateAttr(default=-1)
+    # tracks holding the sector, told about its changes so they drop their arrays, copies are held by none
+    _tracks: weakref.WeakValueDictionary = PrivateAttr(default_factory=weakref.WeakValueDictionary)
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in self.__fields__:
+            self._curvature = None
+            for track in list(self._tracks.values()):
+                track._sectors_changed()
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['__private_attribute_values__'] = {
+            name: value for name, value in state['__private_attribute_values__'].items() if name != '_tracks'
+        }
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._tracks = weakref.WeakValueDictionary()
+
+    def _copy_and_set_values(self, *args, **kwargs) -> 'Sector':
+        sector = super()._copy_and_set_values(*args, **kwargs)
+        sector._tracks = weakref.WeakValueDictionary()
+        return sector
+
     @validator('corner')
     def curvature_is_possible(cls, v, values, **kwargs):
         if v == 0:
@@ -28,15 +69,472 @@ class Sector(BaseModel):
         if length == 0:
             return 0.0
 
-        k = (5 * math.pi) / 180
-        curvature = (abs(corner)/length) * k
+        curvature = (abs(corner)/length) * CURVATURE_K
         return pull_down(curvature, 1.0)
 
+    @staticmethod
+    def calculate_curvatures(lengths: np.ndarray, corners: np.ndarray) -> np.ndarray:
+        """
+        `calculate_curvature` for whole arrays of sectors
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            curvatures = np.where(lengths == 0, 0.0, (np.abs(corners) / lengths) * CURVATURE_K)
+        return pull_down_array(curvatures, 1.0)
+
     @property
     def curvature(self) -> float:
-        return self.calculate_curvature(self.length, self.corner)
+        revision = get_config().revision
+        if self._curvature is None or self._curvature_revision != revision:
+            self._curvature = self.calculate_curvature(self.length, self.corner)
+            self._curvature_revision = revision
+        return self._curvature
+
+
+def _not_numbers(column: Sequence[float]) -> List[int]:
+    if np.ndim(column) == 0:
+        return []
+    if isinstance(column, np.ndarray) and column.dtype.kind != 'O':
+        # bools are integers to numpy
+        return [] if column.dtype.kind in 'iuf' else list(range(len(column)))
+    return [
+        idx for idx, value in enumerate(column)
+        if isinstance(value, (bool, np.bool_)) or not isinstance(value, (int, float, np.integer, np.floating))
+    ]
+
+
+class SectorColumns(Sequence[Sector]):
+    """
+    Sectors of a track stored as contiguous float arrays, for imported circuits with a lot of sectors.
+    The whole columns are validated at once with the same checks as `Sector` fields,
+    `Sector` objects are created on access only and changing them does not change the columns.
+    `curvatures` are calculated with the config of the engine context the columns are created in.
+    Float arrays passed in are kept without a copy, the columns never write to them
+    """
+    lengths: np.ndarray
+    corners: np.ndarray
+    curvatures: np.ndarray
+    curvatures_revision: int
+
+    def __init__(self, lengths: np.ndarray, corners: np.ndarray, validate: bool = True):
+        if validate:
+            self.validate_numbers(lengths, corners)
+        self.lengths = np.ascontiguousarray(lengths, dtype=float)
+        self.corners = np.ascontiguousarray(corners, dtype=float)
+        if self.lengths.ndim != 1 or self.lengths.shape != self.corners.shape:
+            raise ValueError(
+                f'lengths and corners must be one dimensional arrays of the same size, '
+                f'got {self.lengths.shape} and {self.corners.shape}'
+            )
+
+        if validate:
+            self.validate()
+        self.curvatures = Sector.calculate_curvatures(self.lengths, self.corners)
+        self.curvatures_revision = get_config().revision
+
+    @staticmethod
+    def validate_numbers(lengths: Sequence[float], corners: Sequence[float]):
+        """
+        Rejects values `Sector` does not take as numbers before the columns are cast to floats:
+        strings, bools and anything else that is not an integer or a float
+        """
+        sector_errors = [
+            ErrorWrapper(errors.FloatError(), loc=('sectors', idx, name))
+            for name, column in (('length', lengths), ('corner', corners))
+            for idx in _not_numbers(column)
+        ]
+        if sector_errors:
+            sector_errors.sort(key=lambda error: error.loc_tuple()[1])
+            raise ValidationError(sector_errors, Track)
+
+    def validate(self):
+        valid_lengths = self.lengths > 0
+        valid_corners = self.corners < 360.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            too_curvy = valid_lengths & valid_corners & (self.corners != 0) & (
+                Sector.calculate_curvatures(self.lengths, self.corners) > 1.0
+            )
+
+        if valid_lengths.all() and valid_corners.all() and not too_curvy.any():
+            return
+
+        sector_errors = []
+        for idx in np.nonzero(~valid_lengths | ~valid_corners | too_curvy)[0].tolist():
+            if not valid_lengths[idx]:
+                sector_errors.append(
+                    ErrorWrapper(errors.NumberNotGtError(limit_value=0), loc=('sectors', idx, 'length'))
+                )
+            if not valid_corners[idx]:
+                sector_errors.append(
+                    ErrorWrapper(errors.NumberNotLtError(limit_value=360.0), loc=('sectors', idx, 'corner'))
+                )
+            if too_curvy[idx]:
+                sector_errors.append(
+                    ErrorWrapper(ValueError('corner is too big, impossible to drive'), loc=('sectors', idx, 'corner'))
+                )
+        raise ValidationError(sector_errors, Track)
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return SectorColumns(self.lengths[idx], self.corners[idx])
+        return Sector.construct(length=float(self.lengths[idx]), corner=float(self.corners[idx]))
+
+    def edited(self, sector_index: int, sector: Sector) -> 'SectorColumns':
+        """
+        Copy of the columns with one sector replaced, curvatures of the other sectors are kept
+        """
+        columns = copy.copy(self)
+        columns.lengths = self.lengths.copy()
+        columns.lengths[sector_index] = sector.length
+        columns.corners = self.corners.copy()
+        columns.corners[sector_index] = sector.corner
+        if self.curvatures_revision == get_config().revision:
+            columns.curvatures = self.curvatures.copy()
+            columns.curvatures[sector_index] = sector.curvature
+        else:
+            columns.curvatures = Sector.calculate_curvatures(columns.lengths, columns.corners)
+            columns.curvatures_revision = get_config().revision
+        return columns
+
+    def to_dict(self) -> Dict[str, List[float]]:
+        return {'lengths': self.lengths.tolist(), 'corners': self.corners.tolist()}
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.parse
+
+    @classmethod
+    def parse(cls, value: Any) -> 'SectorColumns':
+        """
+        Accepts `SectorColumns` or a mapping with `lengths` and `corners` lists, e.g. from JSON
+        """
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, Mapping) and set(value) == {'lengths', 'corners'}:
+            return cls(value['lengths'], value['corners'])
+        raise TypeError('sector columns must be a mapping with `lengths` and `corners` lists')
+
+    @classmethod
+    def __modify_schema__(cls, field_schema: Dict[str, Any]):
+        field_schema.update(
+            type='object',
+            properties={
+                'lengths': {'type': 'array', 'items': {'type': 'number'}},
+                'corners': {'type': 'array', 'items': {'type': 'number'}},
+            },
+            required=['lengths', 'corners'],
+        )
+
+
+class SectorPosition(NamedTuple):
+    sector_index: int
+    distance_from_sector_start: float
+
+
+def _immutable_sectors(sectors: Union[SectorColumns, Sequence[Sector]]) -> Union[SectorColumns, Tuple[Sector, ...]]:
+    """
+    Sector lists are kept as tuples, so the sectors index of a track is rebuilt only when its `sectors`
+    are reassigned, see `Track.edit_sector` to replace one sector
+    """
+    return sectors if isinstance(sectors, SectorColumns) else tuple(sectors)
+
+
+# lists of sectors are validated on their own, so their errors do not mention sector columns
+_sector_list_field = ModelField.infer(
+    name='sectors', value=Required, annotation=Sequence[Sector], class_validators=None, config=BaseConfig,
+)
 
 
 class Track(BaseModel):
-    sectors: Sequence[Sector]
+    # sectors refer to the tracks holding them weakly
+    __slots__ = ('__weakref__',)
+
+    sectors: Union[SectorColumns, Sequence[Sector]]
+
+    _sector_lengths: Optional[np.ndarray] = PrivateAttr(default=None)
+    _sector_starts: Optional[np.ndarray] = PrivateAttr(default=None)
+    _sector_starts_list: Optional[List[float]] = PrivateAttr(default=None)
+    _length: Optional[float] = PrivateAttr(default=None)
+    _derived: Dict[Hashable, object] = PrivateAttr(default_factory=dict)
+    _revision: int = PrivateAttr(default=0)
+    _prefetched_revision: Optional[int] = PrivateAttr(default=None)
+
+    class Config:
+        json_encoders = {
+            SectorColumns: SectorColumns.to_dict,
+        }
+
+    def __setattr__(self, name, value):
+        if name == 'sectors':
+            value = _immutable_sectors(value)
+            self._watch_sectors(watch=False)
+        super().__setattr__(name, value)
+        if name == 'sectors':
+            self._sectors_changed()
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._watch_sectors()
+
+    def _copy_and_set_values(self, values, fields_set, *, deep: bool) -> 'Track':
+        # a copy holding the same sectors keeps their arrays and is told about their changes too
+        same_sectors = values.get('sectors') is self.sectors
+        track = super()._copy_and_set_values(values, fields_set, deep=deep)
+        if not same_sectors:
+            track.__dict__['sectors'] = _immutable_sectors(track.sectors)
+            track._prefetched_revision = None
+        elif not deep:
+            track._derived = dict(self._derived)
+        track._watch_sectors()
+        return track
+
+    @validator('sectors', pre=True)
+    def sectors_layout(cls, v):
+        """
+        Mappings are sector columns and anything else is a list of sectors, errors are reported for one layout only
+        """
+        if isinstance(v, (SectorColumns, Mapping)):
+            try:
+                return SectorColumns.parse(v)
+            except ValidationError as exc:
+                # column errors are located from the track already
+                raise ValidationError(
+                    [ErrorWrapper(error.exc, loc=error.loc_tuple()[1:]) for error in exc.raw_errors], cls,
+                )
+        sectors, sector_errors = _sector_list_field.validate(v, {}, loc=(), cls=cls)
+        if sector_errors:
+            raise ValidationError([sector_errors], cls)
+        return sectors
+
+    @validator('sectors')
+    def sectors_are_immutable(cls, v):
+        return _immutable_sectors(v)
+
+    @classmethod
+    def from_arrays(cls, lengths: np.ndarray, corners: np.ndarray, validate: bool = True) -> 'Track':
+        """
+        Bulk construction of a track with a lot of sectors: columns are validated at once
+        with the same checks and messages as `Sector`, `validate=False` skips checks for trusted data
+        """
+        return cls.construct(sectors=SectorColumns(lengths, corners, validate=validate))
+
+    @property
+    def revision(self) -> int:
+        """
+        Changes with every change of the sectors of this track, changes of other tracks and their sectors
+        leave it and the values derived from the sectors intact
+        """
+        return self._revision
+
+    def _sectors_changed(self):
+        self._revision += 1
+
+    def _watch_sectors(self, watch: bool = True):
+        if isinstance(self.sectors, SectorColumns):
+            return
+        for sector in self.sectors:
+            if watch:
+                sector._tracks[id(self)] = self
+            else:
+                sector._tracks.pop(id(self), None)
+
+    def _is_outdated(self) -> bool:
+        return self._prefetched_revision != self._revision
+
+    def _prefetch_sectors(self):
+        if not self.sectors:
+            raise RuntimeError('This track does not have any sectors')
+
+        self._derived = {}
+        if isinstance(self.sectors, SectorColumns):
+            lengths = self.sectors.lengths
+        else:
+            lengths = np.array([sector.length for sector in self.sectors], dtype=float)
+        self._sector_lengths = lengths
+        cumulative_length = np.cumsum(lengths)
+        self._length = float(cumulative_length[-1])
+        self._sector_starts = np.concatenate(([0.0], cumulative_length[:-1]))
+        self._sector_starts_list = None
+        self._watch_sectors()
+        self._prefetched_revision = self._revision
+
+    def get_derived(self, key: Hashable, calculate: Callable[[], T]) -> T:
+        """
+        Memoizes values derived from the sectors (e.g. per car speed tables) for the config of the engine context,
+        so races with different configs can share the track. Values are dropped together with the sectors index
+        when any sector changes, a changed config gets a new revision and its own values
+        """
+        if self._is_outdated():
+            self._prefetch_sectors()
+        config_key = (get_config().revision, key)
+        if config_key not in self._derived:
+            self._derived[config_key] = calculate()
+        return self._derived[config_key]
+
+    def set_derived(self, key: Hashable, value: object):
+        """
+        Puts a value calculated elsewhere (e.g. loaded from a cache) into `get_derived` memo
+        """
+        if self._is_outdated():
+            self._prefetch_sectors()
+        self._derived[(get_config().revision, key)] = value
+
+    @property
+    def derived(self) -> Dict[Hashable, object]:
+        """
+        Memoized values of the engine context config
+        """
+        if self._is_outdated():
+            self._prefetch_sectors()
+        revision = get_config().revision
+        return {key: value for (config_revision, key), value in self._derived.items() if config_revision == revision}
+
+    def edit_sector(self, sector_index: int, length: float = None, corner: float = None) -> Sector:
+        """
+        Replaces one sector, omitted fields are kept. Arrays are copied on write: the track gets edited copies
+        of its lengths, starts, corners and curvatures (and columns), so arrays taken from the track before the edit,
+        the arrays it was created from and arrays loaded from a cache keep the old values. Only the edited sector
+        is calculated. The revision of the track changes, other values memoized with `get_derived` are dropped
+        and races of the track rebuild their tables
+        """
+        if not 0 <= sector_index < len(self.sectors):
+            raise ValueError(f'This track has no sector with index `{sector_index}`')
+        old_sector = self.sectors[sector_index]
+        sector = Sector(
+            length=old_sector.length if length is None else length,
+            corner=old_sector.corner if corner is None else corner,
+        )
+        if self._is_outdated():
+            self._prefetch_sectors()
+        delta = sector.length - float(self._sector_lengths[sector_index])
+        starts = self._sector_starts.copy()
+        starts[sector_index + 1:] += delta
+
+        if isinstance(self.sectors, SectorColumns):
+            columns = self.sectors.edited(sector_index, sector)
+            lengths = columns.lengths
+            super().__setattr__('sectors', columns)
+        else:
+            lengths = self._sector_lengths.copy()
+            lengths[sector_index] = sector.length
+            super().__setattr__('sectors', (*self.sectors[:sector_index], sector, *self.sectors[sector_index + 1:]))
+            old_sector._tracks.pop(id(self), None)
+            sector._tracks[id(self)] = self
+        self._sectors_changed()
+
+        # corners and curvatures of the other sectors are kept in edited copies, the rest is rebuilt on demand
+        revision = get_config().revision
+        derived = {}
+        for config_key, value in self._derived.items():
+            config_revision, key = config_key
+            if key == 'sector_corners' or (key == 'sector_curvatures' and config_revision == revision):
+                derived[config_key] = np.array(value, dtype=float)
+                derived[config_key][sector_index] = sector.corner if key == 'sector_corners' else sector.curvature
+        self._derived = derived
+        self._sector_lengths = lengths
+        self._sector_starts = starts
+        self._sector_starts_list = None
+        self._length += delta
+        self._prefetched_revision = self._revision
+        return sector
+
+    def _get_sector_starts_list(self) -> List[float]:
+        if self._sector_starts_list is None:
+            self._sector_starts_list = self._sector_starts.tolist()
+        return self._sector_starts_list
+
+    @property
+    def sector_lengths(self) -> np.ndarray:
+        if self._is_outdated():
+            self._prefetch_sectors()
+        return self._sector_lengths
+
+    @property
+    def sector_corners(self) -> np.ndarray:
+        if isinstance(self.sectors, SectorColumns):
+            return self.sectors.corners
+        return self.get_derived(
+            'sector_corners', lambda: np.array([sector.corner for sector in self.sectors], dtype=float)
+        )
+
+    @property
+    def sector_curvatures(self) -> np.ndarray:
+        if isinstance(self.sectors, SectorColumns):
+            if self.sectors.curvatures_revision == get_config().revision:
+                return self.sectors.curvatures
+            return self.get_derived(
+                'sector_curvatures', lambda: Sector.calculate_curvatures(self.sectors.lengths, self.sectors.corners)
+            )
+        return self.get_derived(
+            'sector_curvatures', lambda: np.array([sector.curvature for sector in self.sectors], dtype=float)
+        )
+
+    @property
+    def sector_starts(self) -> np.ndarray:
+        """
+        Distance from the start line to the start of every sector
+        """
+        if self._is_outdated():
+            self._prefetch_sectors()
+        return self._sector_starts
+
+    @property
+    def length(self) -> float:
+        if self._is_outdated():
+            self._prefetch_sectors()
+        return self._length
+
+    def get_sector_start(self, sector_index: int) -> float:
+        if not 0 <= sector_index < len(self.sectors):
+            raise ValueError(f'This track has no sector with index `{sector_index}`')
+        if self._is_outdated():
+            self._prefetch_sectors()
+        return self._get_sector_starts_list()[sector_index]
+
+    def get_sector_index(self, distance_from_start: float) -> int:
+        if self._is_outdated():
+            self._prefetch_sectors()
+        return bisect.bisect_right(self._get_sector_starts_list(), distance_from_start % self._length) - 1
+
+    def get_sector_position(self, distance_from_start: float) -> SectorPosition:
+        sector_index = self.get_sector_index(distance_from_start)
+        lap_distance = distance_from_start % self._length
+        return SectorPosition(sector_index, lap_distance - self._get_sector_starts_list()[sector_index])
+
+    def get_sector_indexes(self, distances_from_start: np.ndarray) -> np.ndarray:
+        """
+        Batched `get_sector_index` for an array of distances, e.g. positions of all the cars
+        """
+        lap_distances = np.asarray(distances_from_start, dtype=float) % self.length
+        return np.searchsorted(self.sector_starts, lap_distances, side='right') - 1
+
+    def get_sector_positions(self, distances_from_start: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        lap_distances = np.asarray(distances_from_start, dtype=float) % self.length
+        sector_indexes = np.searchsorted(self.sector_starts, lap_distances, side='right') - 1
+        return sector_indexes, lap_distances - self.sector_starts[sector_indexes]
+
 
+def get_default_track() -> Track:
+    return Track(sectors=[
+        Sector(length=150.0, corner=0.0),
+        Sector(length=15.0, corner=57.3),
+        Sector(length=15.0, corner=-57.3),
+        Sector(length=25.0, corner=95.5),
+        Sector(length=44.0, corner=0.0),
+        Sector(length=50.0, corner=-63.7),
+        Sector(length=20.0, corner=0.0),
+        Sector(length=100.0, corner=28.6),
+        Sector(length=50.0, corner=57.3),
+        Sector(length=70.0, corner=133.7),
+        Sector(length=140.0, corner=-53.5),
+        Sector(length=200.0, corner=0.0),
+        Sector(length=30.0, corner=-40.0),
+        Sector(length=120.0, corner=0.0),
+        Sector(length=50.0, corner=124.6),
+        Sector(length=120.0, corner=0.0),
+        Sector(length=185.0, corner=160.9),
+        Sector(length=68.6, corner=-139.9),
+        Sector(length=14.5, corner=55.4),
+    ])
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+import argparse
+import sys
+
+from peloton.benchmarks.suite import (
+    BenchmarkReport, BenchmarkResult, run_benchmarks, make_report, compare,
+    QUICK_SECTORS, QUICK_CARS, FULL_SECTORS, FULL_CARS,
+)
+
+
+def _print_result(result: BenchmarkResult):
+    print(
+        f'{result.name:<18}{result.engine:<8}sectors={result.sectors:<8}cars={result.cars:<5}'
+        f'best={result.best * 1000:.3f}ms\tmean={result.mean * 1000:.3f}ms',
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time track lookups, braking decisions, laps and races')
+    parser.add_argument('--full', action='store_true', help=f'{FULL_SECTORS} sectors and {FULL_CARS} cars')
+    parser.add_argument('--sectors', type=int, nargs='+')
+    parser.add_argument('--cars', type=int, nargs='+')
+    parser.add_argument('--laps', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds of one round of a fast benchmark')
+    parser.add_argument('--only', nargs='+', help='names of benchmarks to run')
+    parser.add_argument('--no-legacy', action='store_true', help='skip the legacy engine baseline')
+    parser.add_argument('--output', help='write the report as JSON to this file')
+    parser.add_argument('--compare', metavar='REPORT', help='fail on regressions against this JSON report')
+    parser.add_argument('--threshold', type=float, default=1.2, help='slowdown ratio counted as a regression')
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        sectors=args.sectors or (FULL_SECTORS if args.full else QUICK_SECTORS),
+        cars=args.cars or (FULL_CARS if args.full else QUICK_CARS),
+        laps=args.laps,
+        repeat=args.repeat,
+        min_time=args.min_time,
+        legacy=not args.no_legacy,
+        names=args.only,
+        progress=_print_result,
+    )
+    report = make_report(results)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(report.json(indent=2))
+
+    if args.compare:
+        regressions = compare(BenchmarkReport.parse_file(args.compare), report, threshold=args.threshold)
+        for regression in regressions:
+            print(
+                f'REGRESSION {regression.name} {regression.engine} sectors={regression.sectors} '
+                f'cars={regression.cars}: {regression.baseline * 1000:.3f}ms -> {regression.current * 1000:.3f}ms '
+                f'(x{regression.ratio:.2f})'
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+import argparse
+
+from peloton.importers.centerline import import_track, STRAIGHT_CURVATURE, POINTS_CHUNK_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import a track from a GPX file or a CSV of x, y centerline points')
+    parser.add_argument('path')
+    parser.add_argument('--output', help='write the track as JSON to this file')
+    parser.add_argument('--open', action='store_true', help='do not join the last point with the first one')
+    parser.add_argument(
+        '--straight-curvature', type=float, default=STRAIGHT_CURVATURE,
+        help='segments flatter than this curvature are joined into straights',
+    )
+    parser.add_argument('--chunk-size', type=int, default=POINTS_CHUNK_SIZE, help='points parsed at once')
+    args = parser.parse_args()
+
+    track = import_track(
+        args.path, chunk_size=args.chunk_size, closed=not args.open, straight_curvature=args.straight_curvature,
+    )
+    print(f'{len(track.sectors)} sectors, {track.length:.1f}m')
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(track.json())
+
+
+if __name__ == "__main__":
+    main()
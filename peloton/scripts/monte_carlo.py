@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+import argparse
+
+from peloton.models.bolid import Peloton, Car
+from peloton.models.simulation import RaceNoise
+from peloton.models.track import get_default_track
+from peloton.simulation.montecarlo import run_monte_carlo
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Monte Carlo race on the default track')
+    parser.add_argument('--laps', type=int, default=2)
+    parser.add_argument('--replicas', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--grip', type=float, default=0.02, help='relative deviation of sector grip')
+    parser.add_argument('--driver-error', type=float, default=0.01, help='relative deviation of driver errors')
+    parser.add_argument('--json', help='write the whole result with histograms to this file')
+    args = parser.parse_args()
+
+    peloton = Peloton(cars=[
+        Car(caption='Kir Bolid', max_acceleration=3.5, max_braking=9.8, max_speed=55.0),
+        Car(caption='Slow Starter', max_acceleration=3.3, max_braking=9.8, max_speed=56.0),
+        Car(caption='Late Braker', max_acceleration=3.5, max_braking=11.0, max_speed=54.5),
+    ])
+    result = run_monte_carlo(
+        get_default_track(), peloton, laps=args.laps, replicas=args.replicas, seed=args.seed,
+        noise=RaceNoise(grip=args.grip, driver_error=args.driver_error),
+    )
+
+    for car_result in sorted(result.cars, key=lambda car_distribution: -car_distribution.win_probability):
+        finish_time, best_lap_time = car_result.finish_time, car_result.best_lap_time
+        print(
+            f"{car_result.caption}\t"
+            f"WINS: {car_result.win_probability:.1%}\t"
+            f"TIME: {finish_time.quantiles[0.5]:.2f}s "
+            f"[{finish_time.quantiles[0.05]:.2f}, {finish_time.quantiles[0.95]:.2f}]\t"
+            f"BEST LAP: {best_lap_time.quantiles[0.5]:.2f}s ± {best_lap_time.std:.2f}"
+        )
+
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json_file.write(result.json())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,71 @@
 #!/usr/bin/env python
-from peloton.models.bolid import Peloton
-from peloton.models.track import Track, Sector
+import argparse
 
+from peloton.helpers.conversions import kmh
+from peloton.models.bolid import Peloton, Car
+from peloton.models.simulation import RaceMode
+from peloton.models.track import get_default_track
+from peloton.simulation.profiling import RaceProfiler
+from peloton.simulation.race import Race
+from peloton.simulation.replay import ReplaySink
+from peloton.simulation.telemetry import TelemetrySink, NDJSONSink, SQLiteSink
+from peloton.simulation.track_cache import TrackCache
 
-class Race:
-    track: Track
-    peloton: Peloton
 
-    def __init__(self, track: Track, peloton: Peloton):
-        self.track = track
-        self.peloton = peloton
+def get_sink(path: str) -> TelemetrySink:
+    if path.endswith(('.ndjson', '.jsonl')):
+        return NDJSONSink(path)
+    if path.endswith(('.sqlite', '.sqlite3', '.db')):
+        return SQLiteSink(path, race_title='Test race')
+    return ReplaySink(path)
 
-    def run(self):
-        pass
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate a race on the default track')
+    parser.add_argument('--laps', type=int, default=2)
+    parser.add_argument('--mode', type=RaceMode, choices=list(RaceMode), default=RaceMode.FRAMES)
+    parser.add_argument(
+        '--telemetry', help='write telemetry to .ndjson/.jsonl, .sqlite/.db or any other path as a replay file'
+    )
+    parser.add_argument('--cache-dir', help='directory of the precomputed track data shared by runs')
+    parser.add_argument(
+        '--every-lap', action='store_true', help='step through every lap instead of repeating a steady one'
+    )
+    parser.add_argument('--profile', action='store_true', help='print counters and timings of the engine')
+    parser.add_argument('--pstats', help='run under cProfile and write the stats to this file')
+    parser.add_argument(
+        '--allocations', action='store_true', help='with --profile also trace the memory every phase allocates'
+    )
+    args = parser.parse_args()
+
+    peloton = Peloton(cars=[
+        Car(caption='Kir Bolid', max_acceleration=3.5, max_braking=9.8, max_speed=55.0),
+    ])
+    track = get_default_track()
+    track_cache = TrackCache(args.cache_dir) if args.cache_dir else None
+    if track_cache is not None:
+        track_cache.load(track)
+    race = Race(track, peloton, laps=args.laps, mode=args.mode, steady_laps=not args.every_lap)
+    profiler = RaceProfiler(
+        cprofile=bool(args.pstats), trace_allocations=args.profile and args.allocations,
+    ) if args.profile or args.pstats else None
+    result = race.run(get_sink(args.telemetry) if args.telemetry else None, profiler=profiler)
+    if track_cache is not None:
+        track_cache.store(track)
+
+    for position, car_result in enumerate(result.standings, start=1):
+        print(
+            f"{position}. {car_result.caption}\t"
+            f"TIME: {car_result.finish_time:.2f}s\t"
+            f"BEST LAP: {car_result.best_lap_time:.2f}s\t"
+            f"TOP SPEED: {kmh(car_result.top_speed):.2f}"
+        )
+
+    if args.profile:
+        print(profiler.profile.format())
+    if args.pstats:
+        profiler.dump_stats(args.pstats)
 
 
 if __name__ == "__main__":
-    sectors = (
-        Sector(length=200)
-    )
-    race = Race()
+    main()
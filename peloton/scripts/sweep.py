@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+import argparse
+import csv
+import itertools
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Sequence, Mapping, List, Tuple, Optional, Dict
+
+import numpy as np
+from pydantic import BaseModel
+
+from peloton.models.bolid import Peloton
+from peloton.models.simulation import RaceMode
+from peloton.models.track import Track, get_default_track
+from peloton.simulation.race import Race
+from peloton.simulation.simplify import simplify_track
+from peloton.simulation.track_cache import TrackCache
+
+SETUP_FIELDS = ('max_acceleration', 'max_braking', 'max_speed')
+
+
+class SweepRow(BaseModel):
+    max_acceleration: float
+    max_braking: float
+    max_speed: float
+    finish_time: float
+    best_lap_time: float
+    lap_times: List[float]
+    # raced on the full detail track, not on a simplified one
+    confirmed: bool = True
+
+
+def grid(
+        max_acceleration: Sequence[float], max_braking: Sequence[float], max_speed: Sequence[float]
+) -> List[Dict[str, float]]:
+    return [
+        dict(zip(SETUP_FIELDS, values))
+        for values in itertools.product(max_acceleration, max_braking, max_speed)
+    ]
+
+
+def random_sample(
+        count: int,
+        max_acceleration: Tuple[float, float],
+        max_braking: Tuple[float, float],
+        max_speed: Tuple[float, float],
+        seed: Optional[int] = None,
+) -> List[Dict[str, float]]:
+    """
+    `count` setups with every parameter uniformly distributed between its (low, high) bounds
+    """
+    rng = np.random.default_rng(seed)
+    columns = [rng.uniform(low, high, count).tolist() for low, high in (max_acceleration, max_braking, max_speed)]
+    return [dict(zip(SETUP_FIELDS, values)) for values in zip(*columns)]
+
+
+# the track of a worker process, attached once by `_init_worker` and reused by every task
+_worker_track: Optional[Track] = None
+_worker_memory: Optional[shared_memory.SharedMemory] = None
+_worker_cache: Optional[TrackCache] = None
+
+
+def _init_worker(memory_name: str, sectors_count: int, cache_dir: Optional[str] = None):
+    global _worker_track, _worker_memory, _worker_cache
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+    columns = np.ndarray((2, sectors_count), dtype=float, buffer=_worker_memory.buf)
+    _worker_track = Track.from_arrays(columns[0], columns[1], validate=False)
+    if cache_dir is not None:
+        _worker_cache = TrackCache(cache_dir)
+        _worker_cache.load(_worker_track)
+
+
+def _run_setups(setups: List[Mapping[str, float]], laps: int, mode: RaceMode) -> List[SweepRow]:
+    rows = _race_setups(_worker_track, setups, laps, mode)
+    if _worker_cache is not None:
+        _worker_cache.store(_worker_track)
+    return rows
+
+
+def _race_setups(track: Track, setups: List[Mapping[str, float]], laps: int, mode: RaceMode) -> List[SweepRow]:
+    """
+    Setups do not interact, so a whole chunk of them runs as one vectorized race
+    """
+    peloton = Peloton.from_records(
+        [dict(setup, caption=f'setup {idx}') for idx, setup in enumerate(setups)], validate=False
+    )
+    result = Race(track, peloton, laps=laps, mode=mode).run()
+    return [
+        SweepRow(
+            **{name: setup[name] for name in SETUP_FIELDS},
+            finish_time=car_result.finish_time,
+            best_lap_time=car_result.best_lap_time,
+            lap_times=car_result.lap_times,
+        )
+        for setup, car_result in zip(setups, result.cars)
+    ]
+
+
+def sweep(
+        track: Track,
+        setups: Sequence[Mapping[str, float]],
+        laps: int = 1,
+        mode: RaceMode = RaceMode.SOLVER,
+        workers: Optional[int] = None,
+        chunk_size: int = 64,
+        cache_dir: Optional[str] = None,
+) -> List[SweepRow]:
+    """
+    Races every car setup on the track, rows are returned in the order of setups.
+    The track is put into shared memory once, worker processes attach to it on start,
+    so tasks carry car setups only. `workers=0` runs everything in the current process.
+    With `cache_dir` per track arrays computed by any run are reused through a `TrackCache`
+    """
+    setups = [dict(setup) for setup in setups]
+    Peloton.from_records([dict(setup, caption=f'setup {idx}') for idx, setup in enumerate(setups)])
+    chunks = [setups[start:start + chunk_size] for start in range(0, len(setups), chunk_size)]
+
+    if workers == 0:
+        track_cache = TrackCache(cache_dir) if cache_dir is not None else None
+        if track_cache is not None:
+            track_cache.load(track)
+        rows = [row for chunk in chunks for row in _race_setups(track, chunk, laps, mode)]
+        if track_cache is not None:
+            track_cache.store(track)
+        return rows
+
+    columns = np.stack((track.sector_lengths, track.sector_corners))
+    memory = shared_memory.SharedMemory(create=True, size=columns.nbytes)
+    try:
+        np.ndarray(columns.shape, dtype=float, buffer=memory.buf)[:] = columns
+        with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(memory.name, columns.shape[1], cache_dir)
+        ) as executor:
+            results = executor.map(_run_setups, chunks, itertools.repeat(laps), itertools.repeat(mode))
+            return [row for chunk_rows in results for row in chunk_rows]
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def coarse_sweep(
+        track: Track,
+        setups: Sequence[Mapping[str, float]],
+        max_speed_error: float = 0.5,
+        confirm_top: int = 10,
+        **kwargs,
+) -> List[SweepRow]:
+    """
+    `sweep` on a simplified track (see `simplify_track`), then the `confirm_top` fastest setups
+    are raced again on the full detail track. Other rows stay not `confirmed`
+    """
+    setups = [dict(setup) for setup in setups]
+    cars = Peloton.from_records([dict(setup, caption=f'setup {idx}') for idx, setup in enumerate(setups)]).cars
+    simplified = simplify_track(track, cars, max_speed_error=max_speed_error)
+
+    rows = [
+        row.copy(update={'confirmed': False})
+        for row in sweep(simplified.track, setups, **kwargs)
+    ]
+    fastest = sorted(range(len(rows)), key=lambda idx: rows[idx].finish_time)[:confirm_top]
+    if fastest:
+        confirmed_rows = sweep(track, [setups[idx] for idx in fastest], **kwargs)
+        for idx, row in zip(fastest, confirmed_rows):
+            rows[idx] = row
+    return rows
+
+
+def _parse_values(value: str) -> List[float]:
+    """
+    `1,2,3` is a list of values, `1:3:5` is 5 values evenly spaced from 1 to 3
+    """
+    if ':' in value:
+        low, high, count = value.split(':')
+        return np.linspace(float(low), float(high), int(count)).tolist()
+    return [float(item) for item in value.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep car setups on the default track')
+    parser.add_argument('--max-acceleration', type=_parse_values, default=[3.5])
+    parser.add_argument('--max-braking', type=_parse_values, default=[9.8])
+    parser.add_argument('--max-speed', type=_parse_values, default=[55.0])
+    parser.add_argument(
+        '--random', type=int, metavar='COUNT',
+        help='sample COUNT setups uniformly between min and max of every parameter instead of the grid',
+    )
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--laps', type=int, default=1)
+    parser.add_argument('--mode', type=RaceMode, choices=list(RaceMode), default=RaceMode.SOLVER)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--chunk-size', type=int, default=64)
+    parser.add_argument('--top', type=int, default=10, help='number of the fastest setups to print')
+    parser.add_argument('--csv', help='write all the rows to this csv file')
+    parser.add_argument('--cache-dir', help='directory of the precomputed track data shared by runs')
+    parser.add_argument(
+        '--coarse', type=float, metavar='SPEED_ERROR',
+        help='sweep on the track simplified within SPEED_ERROR m/s of sector max speeds',
+    )
+    parser.add_argument('--confirm', type=int, default=10, help='fastest coarse setups raced on the full track')
+    args = parser.parse_args()
+
+    parameters = (args.max_acceleration, args.max_braking, args.max_speed)
+    if args.random:
+        setups = random_sample(args.random, *[(min(values), max(values)) for values in parameters], seed=args.seed)
+    else:
+        setups = grid(*parameters)
+
+    options = dict(
+        laps=args.laps, mode=args.mode, workers=args.workers, chunk_size=args.chunk_size, cache_dir=args.cache_dir,
+    )
+    if args.coarse:
+        rows = coarse_sweep(
+            get_default_track(), setups, max_speed_error=args.coarse, confirm_top=args.confirm, **options
+        )
+    else:
+        rows = sweep(get_default_track(), setups, **options)
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(SETUP_FIELDS + ('finish_time', 'best_lap_time'))
+            for row in rows:
+                writer.writerow([getattr(row, name) for name in SETUP_FIELDS] + [row.finish_time, row.best_lap_time])
+
+    writer = csv.writer(sys.stdout, delimiter='\t')
+    writer.writerow(SETUP_FIELDS + ('finish_time', 'best_lap_time'))
+    for row in sorted(rows, key=lambda sweep_row: sweep_row.finish_time)[:args.top]:
+        values = [getattr(row, name) for name in SETUP_FIELDS] + [row.finish_time, row.best_lap_time]
+        writer.writerow([f'{value:.3f}' for value in values])
+
+
+if __name__ == "__main__":
+    main()
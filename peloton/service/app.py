@@ -0,0 +1,173 @@
+import asyncio
+import functools
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, AsyncIterator
+
+from fastapi import FastAPI, HTTPException, Response, WebSocket
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+
+from peloton.conf.settings import get_config, use_config
+from peloton.models.simulation import RaceResult
+from peloton.service.cache import LRUCache, content_hash
+from peloton.service.live import LiveRace
+from peloton.service.models import RaceRequest, RaceJob, JobStatus
+from peloton.simulation.race import Race
+from peloton.simulation.track_cache import TrackCache
+
+
+def build_race(race_request: RaceRequest) -> Race:
+    return Race(
+        race_request.track, race_request.peloton, laps=race_request.laps, mode=race_request.mode,
+        interaction=race_request.interaction, config=race_request.config,
+    )
+
+
+def run_race(race_request: RaceRequest, track_cache_dir: Optional[str] = None) -> RaceResult:
+    if track_cache_dir is None:
+        return build_race(race_request).run()
+
+    track_cache = TrackCache(track_cache_dir)
+    # track data is cached per config
+    with use_config(race_request.config or get_config()):
+        track_cache.load(race_request.track)
+        result = build_race(race_request).run()
+        track_cache.store(race_request.track)
+    return result
+
+
+async def server_sent_events(live_race: LiveRace) -> AsyncIterator[str]:
+    async for message in live_race.messages():
+        yield f'event: {message["type"]}\ndata: {json.dumps(message)}\n\n'
+
+
+class RaceService:
+    """
+    Runs races on a process pool, so the event loop is never blocked by a simulation.
+    Jobs are identified by the content hash of the request and its sim config,
+    the config of the service unless the request has its own:
+    finished jobs are kept in a LRU cache and identical requests share one run.
+    With `track_cache_dir` workers share precomputed track data through a `TrackCache`
+    """
+    def __init__(self, workers: Optional[int] = None, cache_size: int = 256, track_cache_dir: Optional[str] = None):
+        self.workers = workers
+        self.track_cache_dir = track_cache_dir
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.results: LRUCache[RaceJob] = LRUCache(cache_size)
+        self.pending: Dict[str, asyncio.Future] = {}
+
+    def start(self):
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def stop(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.executor.shutdown(wait=False)
+
+    def get(self, job_id: str) -> Optional[RaceJob]:
+        job = self.results.get(job_id)
+        if job is not None:
+            return job.copy(update={'cached': True})
+        if job_id in self.pending:
+            return RaceJob(job_id=job_id, status=JobStatus.PENDING)
+        return None
+
+    def submit(self, race_request: RaceRequest) -> RaceJob:
+        job_id = content_hash(race_request, race_request.config or get_config())
+        job = self.get(job_id)
+        if job is not None:
+            return job
+
+        self.pending[job_id] = asyncio.ensure_future(self._run(job_id, race_request))
+        return RaceJob(job_id=job_id, status=JobStatus.PENDING)
+
+    async def wait(self, job_id: str) -> RaceJob:
+        if job_id in self.pending:
+            return await asyncio.shield(self.pending[job_id])
+        return self.get(job_id)
+
+    async def _run(self, job_id: str, race_request: RaceRequest) -> RaceJob:
+        loop = asyncio.get_event_loop()
+        try:
+            result = await loop.run_in_executor(
+                self.executor, functools.partial(run_race, race_request, self.track_cache_dir)
+            )
+            job = RaceJob(job_id=job_id, status=JobStatus.DONE, result=result)
+        except Exception as exc:
+            # a failed worker (e.g. a broken pool) fails the job too, so it can still be looked up
+            job = RaceJob(job_id=job_id, status=JobStatus.FAILED, error=str(exc) or type(exc).__name__)
+        finally:
+            del self.pending[job_id]
+
+        self.results.put(job_id, job)
+        return job
+
+
+def create_app(
+        workers: Optional[int] = None, cache_size: int = 256, track_cache_dir: Optional[str] = None
+) -> FastAPI:
+    app = FastAPI(title='Peloton')
+    service = RaceService(workers=workers, cache_size=cache_size, track_cache_dir=track_cache_dir)
+    app.state.race_service = service
+    app.add_event_handler('startup', service.start)
+    app.add_event_handler('shutdown', service.stop)
+
+    @app.post('/races', response_model=RaceJob)
+    async def create_race(race_request: RaceRequest, response: Response, wait: bool = True):
+        """
+        Runs the race and returns its result, with `wait=false` returns a pending job to poll instead
+        """
+        job = service.submit(race_request)
+        if wait and job.status == JobStatus.PENDING:
+            job = await service.wait(job.job_id)
+        if job.status == JobStatus.PENDING:
+            response.status_code = 202
+        return job
+
+    @app.get('/races/{job_id}', response_model=RaceJob)
+    async def get_race(job_id: str, response: Response):
+        job = service.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f'Race job `{job_id}` not found')
+        if job.status == JobStatus.PENDING:
+            response.status_code = 202
+        return job
+
+    @app.post('/races/live')
+    async def stream_race(race_request: RaceRequest, rate: float = 10.0, realtime: float = 0.0):
+        """
+        Server-sent events with car positions while the race runs, decimated to `rate` frames per second
+        of race time, see `LiveRace`. The race runs in the mode of the request, solver races cannot stream
+        """
+        try:
+            live_race = LiveRace(build_race(race_request), rate=rate, realtime=realtime)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+        return StreamingResponse(server_sent_events(live_race), media_type='text/event-stream')
+
+    @app.websocket('/races/live')
+    async def stream_race_websocket(websocket: WebSocket, rate: float = 10.0, realtime: float = 0.0):
+        """
+        The same messages as `/races/live` server-sent events, the race request is the first client message
+        """
+        await websocket.accept()
+        try:
+            race_request = RaceRequest.parse_obj(await websocket.receive_json())
+            live_race = LiveRace(build_race(race_request), rate=rate, realtime=realtime)
+        except (ValidationError, ValueError) as exc:
+            await websocket.send_json({'type': 'error', 'error': str(exc)})
+            await websocket.close(code=1008)
+            return
+
+        async for message in live_race.messages():
+            await websocket.send_json(message)
+            if message['type'] == 'error':
+                await websocket.close(code=1011)
+                return
+        await websocket.close()
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,42 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Generic, TypeVar, Optional, Hashable
+
+from pydantic import BaseModel
+
+V = TypeVar('V')
+
+
+def content_hash(*models: BaseModel) -> str:
+    """
+    Stable hash of models content, equal models give equal hashes in any process
+    """
+    content = json.dumps([json.loads(model.json()) for model in models], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class LRUCache(Generic[V]):
+    def __init__(self, maxsize: int):
+        if maxsize < 1:
+            raise ValueError(f'Cache size must be positive, got `{maxsize}`')
+        self.maxsize = maxsize
+        self._items: 'OrderedDict[Hashable, V]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def get(self, key: Hashable) -> Optional[V]:
+        if key not in self._items:
+            return None
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def put(self, key: Hashable, value: V):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
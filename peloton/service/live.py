@@ -0,0 +1,138 @@
+import asyncio
+import collections
+import multiprocessing
+import time
+from multiprocessing.connection import Connection
+from typing import AsyncIterator, Dict, Any, Deque, Optional
+
+from peloton.models.simulation import RaceResult, RaceMode
+from peloton.simulation.race import Race
+
+
+def _simulate(race: Race, sample_every: int, connection: Connection):
+    """
+    Runs in the process of a live race: sends telemetry batches and then the result or the error of the race
+    """
+    try:
+        for batch in race.stream(sample_every=sample_every, batch_size=16):
+            connection.send(batch)
+        connection.send(race.result)
+    except Exception as exc:
+        connection.send(exc)
+    finally:
+        connection.close()
+
+
+class LiveRace:
+    """
+    Runs a race in a process of its own, so the simulation never holds the GIL of the event loop,
+    and keeps only the latest `buffer_size` telemetry frames for the client.
+    A slow client never slows the simulation down or makes it buffer more: the oldest frames are dropped
+    and the number of dropped frames is sent with the next one.
+    Telemetry is decimated by the race itself to `rate` frames per second of race time,
+    `realtime` is a playback speed (1.0 is the race pace), `0` streams as fast as the race is simulated.
+    Races stream in frames and adaptive modes, the solver has no telemetry.
+    A race failed in its process ends the messages with an `error` one
+    """
+    def __init__(self, race: Race, rate: float = 10.0, realtime: float = 0.0, buffer_size: int = 64):
+        if race.mode == RaceMode.SOLVER:
+            raise ValueError(f'Live races need telemetry, `{race.mode.value}` mode has none')
+        if rate <= 0:
+            raise ValueError(f'Frame rate must be positive, got `{rate}`')
+        if realtime < 0:
+            raise ValueError(f'Playback speed must not be negative, got `{realtime}`')
+
+        self.race = race
+        self.sample_every = max(1, round(1.0 / (rate * race.frame_duration)))
+        self.realtime = realtime
+        self.dropped = 0
+        self.result: Optional[RaceResult] = None
+
+        self._frames: Deque[Dict[str, Any]] = collections.deque(maxlen=buffer_size)
+        self._updated = asyncio.Event()
+        self._producer: Optional[asyncio.Task] = None
+
+    @property
+    def sample_interval(self) -> float:
+        return self.sample_every * self.race.frame_duration
+
+    async def _produce(self):
+        loop = asyncio.get_event_loop()
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=_simulate, args=(self.race, self.sample_every, writer), daemon=True,
+        )
+        process.start()
+        # the reader gets EOF once the process exits
+        writer.close()
+        started_at = time.monotonic()
+
+        try:
+            while True:
+                try:
+                    batch = await loop.run_in_executor(None, reader.recv)
+                except EOFError:
+                    raise RuntimeError(f'Live race process exited with code `{process.exitcode}`') from None
+                if isinstance(batch, Exception):
+                    raise batch
+                if isinstance(batch, RaceResult):
+                    break
+
+                for race_time, distance, speed, sector in zip(
+                        batch.race_time.tolist(), batch.distance.tolist(), batch.speed.tolist(), batch.sector.tolist()
+                ):
+                    if self.realtime:
+                        delay = started_at + race_time / self.realtime - time.monotonic()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                    if len(self._frames) == self._frames.maxlen:
+                        self.dropped += 1
+                    self._frames.append({
+                        'type': 'frame',
+                        'race_time': race_time,
+                        'distance': distance,
+                        'speed': speed,
+                        'sector': sector,
+                    })
+                    self._updated.set()
+            self.race.result = self.result = batch
+        finally:
+            # a client gone before the end stops the simulation, a failed race wakes the client up
+            if process.is_alive():
+                process.terminate()
+            process.join()
+            reader.close()
+            self._updated.set()
+
+    async def messages(self) -> AsyncIterator[Dict[str, Any]]:
+        yield {
+            'type': 'start',
+            'cars': [car.caption for car in self.race.peloton.cars],
+            'sample_interval': self.sample_interval,
+        }
+
+        self._producer = asyncio.ensure_future(self._produce())
+        try:
+            reported_dropped = 0
+            while True:
+                while self._frames:
+                    frame = self._frames.popleft()
+                    frame['dropped'] = self.dropped - reported_dropped
+                    reported_dropped = self.dropped
+                    yield frame
+
+                if self._producer.done():
+                    error = self._producer.exception()
+                    if error is not None:
+                        yield {'type': 'error', 'error': str(error)}
+                        return
+                    if not self._frames:
+                        break
+                    continue
+
+                await self._updated.wait()
+                self._updated.clear()
+
+            yield {'type': 'result', 'result': self.result.dict()}
+        finally:
+            self._producer.cancel()
@@ -0,0 +1,35 @@
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, conint
+
+from peloton.conf.settings import SimConfig
+from peloton.models.bolid import Peloton
+from peloton.models.simulation import RaceMode, RaceResult, Interaction
+from peloton.models.track import Track
+
+
+class RaceRequest(BaseModel):
+    track: Track
+    peloton: Peloton
+    laps: conint(ge=1) = 1
+    mode: RaceMode = RaceMode.FRAMES
+    interaction: Optional[Interaction] = None
+    config: Optional[SimConfig] = None
+
+    class Config:
+        json_encoders = Track.__config__.json_encoders
+
+
+class JobStatus(str, Enum):
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+class RaceJob(BaseModel):
+    job_id: str
+    status: JobStatus
+    cached: bool = False
+    result: Optional[RaceResult] = None
+    error: Optional[str] = None
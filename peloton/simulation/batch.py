@@ -0,0 +1,68 @@
+from typing import List, Sequence
+
+import numpy as np
+
+from peloton.models.simulation import RaceResult, RaceMode
+from peloton.simulation.frames import concatenate, sector_rows, frame_speed, finish_frame
+from peloton.simulation.race import Race
+from peloton.simulation.state import PelotonState, FrameBuffers
+
+
+class RaceBatch:
+    """
+    Runs many independent frames mode races in lockstep, as one race of all their cars: per race Python
+    overhead of a frame is paid once for the whole batch. Tracks are laid one after another on a single line,
+    so one binary search finds the sectors of all the cars, and (car, sector) tables of the races are
+    flattened into single arrays, see `FrameTables`. Every car leaves the batch as soon as it finishes its race.
+    Results are the same as `Race.run` without telemetry gives for every race, races keep their own configs
+    """
+    def __init__(self, races: Sequence[Race]):
+        if not races:
+            raise ValueError('Batch does not have any races')
+        for race in races:
+            if race.mode != RaceMode.FRAMES:
+                raise ValueError(f'Races of a batch must be in frames mode, got `{race.mode.value}`')
+            if race.interaction is not None:
+                raise ValueError('Races of a batch can not have car interaction')
+        if len({race.frame_duration for race in races}) > 1:
+            raise ValueError('Races of a batch must have the same frame duration')
+        self.races = list(races)
+        self.frame_duration = races[0].frame_duration
+
+    def run(self) -> List[RaceResult]:
+        dt = self.frame_duration
+        tables, cars = concatenate([race.frame_tables() for race in self.races])
+        cars_count = len(cars)
+        state = PelotonState(cars_count, cars.track_length)
+        buffers = FrameBuffers(cars_count)
+        lap_finish_times = np.full((cars_count, max(race.laps for race in self.races)), np.nan)
+        top_speed = np.zeros(cars_count)
+        race_frames = np.zeros(len(self.races), dtype=int)
+
+        frame = 0
+        while len(cars):
+            racing = np.less(state.distance, cars.race_distance, out=buffers.racing)
+            _, row = sector_rows(tables, cars, state.distance % cars.track_length)
+            new_speed = frame_speed(tables, cars, state, row, dt, buffers)
+            finish_frame(cars, state, new_speed, racing, frame, dt, buffers, lap_finish_times)
+            frame += 1
+
+            finished = state.distance >= cars.race_distance
+            if finished.any():
+                top_speed[cars.car[finished]] = state.top_speed[finished]
+                # the last car of a race sets its frame count
+                race_frames[cars.race[finished]] = frame
+                cars.keep(~finished)
+                state.keep(~finished)
+                buffers = FrameBuffers(len(cars))
+
+        results = []
+        first_car = 0
+        for idx, race in enumerate(self.races):
+            car_ids = slice(first_car, first_car + len(race.peloton.cars))
+            first_car = car_ids.stop
+            race.result = race.frames_result(
+                int(race_frames[idx]), lap_finish_times[car_ids, :race.laps], top_speed[car_ids]
+            )
+            results.append(race.result)
+        return results
@@ -0,0 +1,93 @@
+import numpy as np
+
+from peloton.models.bolid import Car
+from peloton.models.simulation import RaceCar
+from peloton.models.track import Track
+from peloton.simulation.solver import backward_pass
+
+
+def envelope_start_speeds_sq(sector_lengths: np.ndarray, max_speeds_sq: np.ndarray, max_braking: float) -> np.ndarray:
+    """
+    Squared speed allowed at the start of every sector of a closed lap for one car,
+    two laps are enough to wrap braking constraints around the ring
+    """
+    lengths = np.tile(sector_lengths, 2)
+    limit_sq = np.concatenate((np.tile(max_speeds_sq, 2), [np.inf]))
+    return backward_pass(limit_sq, 2.0 * max_braking * lengths)[:len(sector_lengths)]
+
+
+def car_speed_limits(track: Track, car: Car) -> np.ndarray:
+    """
+    The fastest speed of the car in every sector, memoized by the track
+    """
+    return track.get_derived(
+        ('speed_limits', car.max_speed),
+        lambda: np.minimum(RaceCar(car=car, speed=0.0).max_speeds(track), car.max_speed),
+    )
+
+
+def car_envelope_speeds_sq(track: Track, car: Car) -> np.ndarray:
+    """
+    `envelope_start_speeds_sq` of the car on the track, memoized by the track
+    """
+    return track.get_derived(
+        ('braking_envelope', car.max_speed, car.max_braking),
+        lambda: envelope_start_speeds_sq(track.sector_lengths, car_speed_limits(track, car)**2, car.max_braking),
+    )
+
+
+class BrakingEnvelope:
+    """
+    The highest speed a car may have at any distance of a closed lap and still be able to brake
+    down to the speed limit of every sector ahead. Built once per (track, cars) with a backward pass,
+    every lookup is a binary search of the sector plus a constant amount of math.
+    Arrays are indexed by (car, sector), so one envelope serves the whole peloton.
+    `final_next_start_speed_sq` is the envelope of the final lap, which ends at the finish line
+    """
+    def __init__(self, sector_starts: np.ndarray, sector_lengths: np.ndarray, max_speeds: np.ndarray,
+                 max_braking: np.ndarray, start_speed_sq: np.ndarray = None):
+        self.sector_starts = np.asarray(sector_starts, dtype=float)
+        self.sector_ends = self.sector_starts + np.asarray(sector_lengths, dtype=float)
+        self.track_length = float(self.sector_ends[-1])
+        self.max_speeds_sq = np.atleast_2d(np.asarray(max_speeds, dtype=float)) ** 2
+        self.max_braking = np.atleast_1d(np.asarray(max_braking, dtype=float))
+
+        if start_speed_sq is None:
+            start_speed_sq = [
+                envelope_start_speeds_sq(sector_lengths, max_speeds_sq, braking)
+                for max_speeds_sq, braking in zip(self.max_speeds_sq, self.max_braking)
+            ]
+        self.start_speed_sq = np.atleast_2d(np.asarray(start_speed_sq, dtype=float))
+        self.next_start_speed_sq = np.roll(self.start_speed_sq, -1, axis=1)
+        # the final lap of a race ends at the finish line, there is nothing to brake for after it
+        finish_limit_sq = np.concatenate((self.max_speeds_sq, np.full((len(self.max_speeds_sq), 1), np.inf)), axis=1)
+        self.final_next_start_speed_sq = backward_pass(
+            finish_limit_sq, 2.0 * self.max_braking[:, np.newaxis] * np.asarray(sector_lengths, dtype=float)
+        )[:, 1:]
+
+    def sector_index(self, lap_distance: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self.sector_starts, lap_distance, side='right') - 1
+
+    def allowed_speed(
+            self, lap_distance: np.ndarray, cars: np.ndarray = None, limit_factor: np.ndarray = None
+    ) -> np.ndarray:
+        """
+        `lap_distance[i]` is a position of car `cars[i]`, all the cars in their order if `cars` is omitted.
+        `limit_factor` scales the sector speed limits of the cars, the braking curves stay the same
+        """
+        lap_distance = np.asarray(lap_distance, dtype=float)
+        if cars is None:
+            cars = np.arange(len(self.max_braking))
+        sector = self.sector_index(lap_distance)
+
+        braking_sq = (
+            self.next_start_speed_sq[cars, sector]
+            + 2.0 * self.max_braking[cars] * (self.sector_ends[sector] - lap_distance)
+        )
+        limit_sq = self.max_speeds_sq[cars, sector]
+        if limit_factor is not None:
+            limit_sq = limit_sq * limit_factor ** 2
+        return np.sqrt(np.minimum(limit_sq, braking_sq))
+
+    def must_brake(self, lap_distance: np.ndarray, speed: np.ndarray, cars: np.ndarray = None) -> np.ndarray:
+        return speed > self.allowed_speed(lap_distance, cars)
@@ -0,0 +1,76 @@
+from typing import Tuple
+
+import numpy as np
+
+# speeds this close to a limit (relative to the squared limit) are on it, so an event is never found again
+SPEED_TOLERANCE = 1e-9
+
+
+def ride_phase(
+        speed: np.ndarray,
+        limit_sq: np.ndarray,
+        braking_sq: np.ndarray,
+        max_acceleration: np.ndarray,
+        max_braking: np.ndarray,
+) -> np.ndarray:
+    """
+    Acceleration of every car until its next event: full throttle below both the sector limit
+    and the braking curve (`braking_sq` is the squared speed allowed by it at the car position),
+    no acceleration at the sector limit before the braking point, full braking on the braking curve
+    and above the sector limit, e.g. after the finish line
+    """
+    speed_sq = speed ** 2
+    allowed_sq = np.minimum(limit_sq, braking_sq)
+    return np.where(
+        speed_sq < allowed_sq * (1.0 - SPEED_TOLERANCE),
+        max_acceleration,
+        np.where(
+            (limit_sq < braking_sq * (1.0 - SPEED_TOLERANCE)) & (speed_sq <= limit_sq * (1.0 + SPEED_TOLERANCE)),
+            0.0, -max_braking,
+        ),
+    )
+
+
+def event_distances(
+        speed: np.ndarray,
+        acceleration: np.ndarray,
+        to_sector_end: np.ndarray,
+        limit_sq: np.ndarray,
+        exit_speed_sq: np.ndarray,
+        max_acceleration: np.ndarray,
+        max_braking: np.ndarray,
+) -> np.ndarray:
+    """
+    Distance to the next event of every car: the sector end, reaching the sector limit,
+    reaching the braking curve while accelerating, the braking point while riding at the limit
+    or braking down to the limit from above it.
+    The braking curve of a sector ends at its end with `exit_speed_sq`
+    """
+    speed_sq = speed ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # v^2 + 2a*d == exit^2 + 2b*(to_end - d)
+        to_braking_curve = (exit_speed_sq + 2.0 * max_braking * to_sector_end - speed_sq) / (
+            2.0 * (max_acceleration + max_braking)
+        )
+        to_limit = (limit_sq - speed_sq) / (2.0 * max_acceleration)
+        to_braking_point = to_sector_end - (limit_sq - exit_speed_sq) / (2.0 * max_braking)
+        down_to_limit = np.where(
+            speed_sq > limit_sq * (1.0 + SPEED_TOLERANCE), (speed_sq - limit_sq) / (2.0 * max_braking), np.inf
+        )
+
+    distance = np.where(
+        acceleration > 0,
+        np.minimum(to_limit, to_braking_curve),
+        np.where(acceleration == 0, np.where(limit_sq > exit_speed_sq, to_braking_point, np.inf), down_to_limit),
+    )
+    return np.clip(distance, 0.0, to_sector_end)
+
+
+def travel(speed: np.ndarray, acceleration: np.ndarray, distance: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Time to ride `distance` with constant `acceleration` and the speed at its end
+    """
+    end_speed = np.sqrt(np.maximum(speed ** 2 + 2.0 * acceleration * distance, 0.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        time = np.where(distance > 0, 2.0 * distance / (speed + end_speed), 0.0)
+    return time, end_speed
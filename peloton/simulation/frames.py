@@ -0,0 +1,274 @@
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from peloton.simulation.profiling import RaceProfiler
+from peloton.simulation.state import PelotonState, FrameBuffers
+
+
+class FrameTables:
+    """
+    Tables of the frames engine shared by the cars stepped together, of one race or of many (see `RaceBatch`).
+    Tracks are laid one after another: `sector_starts` are distances on that line, `sector_ends` are lap distances,
+    (car, sector) tables are flattened, so one binary search and one gather serve the cars of all the tracks
+    """
+    __slots__ = (
+        'sector_starts', 'sector_ends', 'limits', 'limits_sq', 'next_start_speed_sq', 'final_next_start_speed_sq',
+        'straight',
+    )
+
+    def __init__(
+            self,
+            sector_starts: np.ndarray,
+            sector_ends: np.ndarray,
+            limits: np.ndarray,
+            next_start_speed_sq: np.ndarray,
+            final_next_start_speed_sq: np.ndarray,
+            straight: np.ndarray = None,
+    ):
+        self.sector_starts = sector_starts
+        self.sector_ends = sector_ends
+        # the fastest speed of a car in a sector and the squared speed allowed at the start of the next sector
+        self.limits = limits
+        self.limits_sq = limits ** 2
+        self.next_start_speed_sq = next_start_speed_sq
+        # the same on the final lap of the car, there is no braking for the lap after it
+        self.final_next_start_speed_sq = final_next_start_speed_sq
+        # sectors where cars of a race with interaction may slipstream and overtake
+        self.straight = straight
+
+
+class FrameCars:
+    """
+    Parameters of the cars stepped together as arrays indexed by car, `keep` drops cars from all of them.
+    `car` is the row of the car in the lap finish times, `race` is the index of its race in a batch.
+    A car finds its sectors from `first_sector` on at `track_offset` and its table rows from `table_offset` on
+    """
+    __slots__ = (
+        'car', 'race', 'acceleration_step', 'braking_step', 'max_braking', 'max_speed',
+        'track_length', 'track_offset', 'first_sector', 'table_offset',
+        'race_laps', 'race_distance', 'final_lap_start', 'steady_laps', 'float_precision',
+    )
+
+    def __len__(self) -> int:
+        return len(self.car)
+
+    def keep(self, mask: np.ndarray):
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name)[mask])
+
+
+def concatenate(parts: Sequence[Tuple[FrameTables, FrameCars]]) -> Tuple[FrameTables, FrameCars]:
+    """
+    Tables and cars of many races as those of a single one, the tracks laid one after another
+    """
+    track_lengths = np.array([cars.track_length[0] for _, cars in parts])
+    sectors_counts = np.array([len(tables.sector_ends) for tables, _ in parts])
+    cars_counts = np.array([len(cars) for _, cars in parts])
+    table_sizes = np.array([len(tables.limits) for tables, _ in parts])
+
+    track_offsets = np.concatenate(([0.0], np.cumsum(track_lengths)[:-1]))
+    first_sectors = np.concatenate(([0], np.cumsum(sectors_counts)[:-1]))
+    table_offsets = np.concatenate(([0], np.cumsum(table_sizes)[:-1]))
+    first_cars = np.concatenate(([0], np.cumsum(cars_counts)[:-1]))
+
+    tables = FrameTables(
+        sector_starts=np.concatenate([
+            part_tables.sector_starts + offset for (part_tables, _), offset in zip(parts, track_offsets)
+        ]),
+        sector_ends=np.concatenate([part_tables.sector_ends for part_tables, _ in parts]),
+        limits=np.concatenate([part_tables.limits for part_tables, _ in parts]),
+        next_start_speed_sq=np.concatenate([part_tables.next_start_speed_sq for part_tables, _ in parts]),
+        final_next_start_speed_sq=np.concatenate([part_tables.final_next_start_speed_sq for part_tables, _ in parts]),
+    )
+
+    cars = FrameCars()
+    for name in FrameCars.__slots__:
+        setattr(cars, name, np.concatenate([getattr(part_cars, name) for _, part_cars in parts]))
+    race_of_car = np.repeat(np.arange(len(parts)), cars_counts)
+    cars.car += np.repeat(first_cars, cars_counts)
+    cars.race = race_of_car
+    cars.track_offset += track_offsets[race_of_car]
+    cars.first_sector += first_sectors[race_of_car]
+    cars.table_offset += table_offsets[race_of_car]
+    return tables, cars
+
+
+def sector_rows(tables: FrameTables, cars: FrameCars, lap_distance: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sector of every car on the line of all the tracks and the row of the car and the sector in the tables
+    """
+    sector = np.searchsorted(tables.sector_starts, lap_distance + cars.track_offset, side='right') - 1
+    return sector, cars.table_offset + sector - cars.first_sector
+
+
+def allowed_speed(
+        tables: FrameTables, cars: FrameCars, row: np.ndarray, distance: np.ndarray, lookahead_distance: np.ndarray,
+        limit_factor: np.ndarray = None,
+        profiler: RaceProfiler = None,
+) -> np.ndarray:
+    """
+    The highest speed every car at `distance` may have at `lookahead_distance`: not faster than its current
+    sector (`row`) allows and still able to brake for any sector ahead. The race ends at the finish line,
+    so on the final lap cars do not brake for the lap after it. `limit_factor` scales the speed limits
+    of straights for every car, the `profiler` counts the look-ahead sector lookups
+    """
+    lookahead = lookahead_distance % cars.track_length
+    lookahead_sector, lookahead_row = sector_rows(tables, cars, lookahead)
+    if profiler is not None:
+        profiler.lookups += len(lookahead_row)
+    braking_sq = (
+        tables.next_start_speed_sq[lookahead_row]
+        + 2.0 * cars.max_braking * (tables.sector_ends[lookahead_sector] - lookahead)
+    )
+    current_limit = tables.limits[row]
+    limit_sq = tables.limits_sq[lookahead_row]
+    if limit_factor is not None:
+        # the look-ahead may be in a corner already
+        current_limit = current_limit * limit_factor
+        limit_sq = limit_sq * np.where(tables.straight[lookahead_sector], limit_factor, 1.0) ** 2
+
+    final = lookahead_distance >= cars.final_lap_start
+    if final.any():
+        # cars that have finished ride on to the next lap
+        final &= distance < cars.race_distance
+        final = np.flatnonzero(final)
+        braking_sq[final] = (
+            tables.final_next_start_speed_sq[lookahead_row[final]]
+            + 2.0 * cars.max_braking[final] * (tables.sector_ends[lookahead_sector[final]] - lookahead[final])
+        )
+        beyond_finish = final[lookahead_distance[final] >= cars.race_distance[final]]
+        braking_sq[beyond_finish] = limit_sq[beyond_finish] = np.inf
+    return np.minimum(current_limit, np.sqrt(np.minimum(limit_sq, braking_sq)))
+
+
+def frame_speed(
+        tables: FrameTables,
+        cars: FrameCars,
+        state: PelotonState,
+        row: np.ndarray,
+        dt: float,
+        buffers: FrameBuffers,
+        limit_factor: np.ndarray = None,
+        speed_cap: np.ndarray = None,
+        profiler: RaceProfiler = None,
+) -> np.ndarray:
+    """
+    Speed of every car at the end of the frame: full throttle unless `allowed_speed` at the distance of the frame
+    ridden accelerating or `speed_cap` is lower, never braking harder than the car can
+    """
+    speed = state.speed
+    accelerated_speed = np.add(speed, cars.acceleration_step, out=buffers.accelerated_speed)
+    np.minimum(
+        accelerated_speed, cars.max_speed if limit_factor is None else cars.max_speed * limit_factor,
+        out=accelerated_speed,
+    )
+    step = np.add(speed, accelerated_speed, out=buffers.step)
+    step *= dt
+    step /= 2
+    step += state.distance
+    new_speed = np.minimum(
+        accelerated_speed, allowed_speed(tables, cars, row, state.distance, step, limit_factor, profiler),
+        out=buffers.new_speed,
+    )
+    if speed_cap is not None:
+        np.minimum(new_speed, speed_cap, out=new_speed)
+    braked_speed = np.subtract(speed, cars.braking_step, out=buffers.braked_speed)
+    np.maximum(braked_speed, 0.0, out=braked_speed)
+    np.maximum(new_speed, braked_speed, out=new_speed)
+    return new_speed
+
+
+def finish_frame(
+        cars: FrameCars,
+        state: PelotonState,
+        new_speed: np.ndarray,
+        racing: np.ndarray,
+        frame: int,
+        dt: float,
+        buffers: FrameBuffers,
+        lap_finish_times: np.ndarray,
+):
+    """
+    Moves every car to the end of the frame with the speed changing linearly up to `new_speed`,
+    laps are timed by the moment the car crosses the line inside the frame
+    """
+    speed, distance = state.speed, state.distance
+    new_distance = np.add(speed, new_speed, out=buffers.new_distance)
+    new_distance *= dt
+    new_distance /= 2
+    new_distance += distance
+
+    crossed = np.greater_equal(new_distance, state.next_line, out=buffers.crossed)
+    crossed &= state.laps < cars.race_laps
+    if crossed.any():
+        _cross_line(cars, state, np.flatnonzero(crossed), frame, dt, new_speed, new_distance, lap_finish_times)
+
+    np.subtract(new_speed, speed, out=state.acceleration)
+    state.acceleration /= dt
+    np.copyto(speed, new_speed)
+    np.copyto(distance, new_distance)
+    np.maximum(state.top_speed, speed, out=state.top_speed, where=racing)
+
+
+def _cross_line(
+        cars: FrameCars,
+        state: PelotonState,
+        crossed: np.ndarray,
+        frame: int,
+        dt: float,
+        new_speed: np.ndarray,
+        new_distance: np.ndarray,
+        lap_finish_times: np.ndarray,
+):
+    speed, distance = state.speed, state.distance
+    frame_part = (state.next_line[crossed] - distance[crossed]) / (new_distance[crossed] - distance[crossed])
+    lap_finish_times[cars.car[crossed], state.laps[crossed]] = (frame + frame_part) * dt + state.time_offset[crossed]
+    state.laps[crossed] += 1
+    state.next_line[crossed] = (state.laps[crossed] + 1) * cars.track_length[crossed]
+
+    # a ride depends on the lap entry speed only, a lap entered at the speed of the previous one repeats it,
+    # except for the final lap
+    tracked = cars.steady_laps[crossed]
+    if not tracked.any():
+        return
+    crossed, frame_part = crossed[tracked], frame_part[tracked]
+    line_speed = speed[crossed] + (new_speed[crossed] - speed[crossed]) * frame_part
+    done = state.laps[crossed]
+    steady = (
+        (np.abs(line_speed - state.entry_speed[crossed]) <= cars.float_precision[crossed])
+        & (done >= 2) & (done < cars.race_laps[crossed] - 1)
+    )
+    state.entry_speed[crossed] = line_speed
+    if steady.any():
+        repeat_last_lap(cars, state, crossed[steady], lap_finish_times, new_distance)
+
+
+def repeat_last_lap(
+        cars: FrameCars,
+        state: PelotonState,
+        steady_cars: np.ndarray,
+        lap_finish_times: np.ndarray,
+        new_distance: np.ndarray,
+):
+    """
+    Skips the laps of `steady_cars` that have just completed a lap up to the final one: every skipped lap takes
+    as long as the last one, the cars move whole laps ahead and their clocks run ahead of the frames by the time
+    of the skipped laps. The final lap ends at the finish line and is ridden differently, so it is stepped
+    """
+    done = state.laps[steady_cars]
+    car_ids = cars.car[steady_cars]
+    skipped = cars.race_laps[steady_cars] - 1 - done
+    last_finish = lap_finish_times[car_ids, done - 1]
+    last_lap = last_finish - lap_finish_times[car_ids, done - 2]
+    laps_after = np.arange(lap_finish_times.shape[1]) - (done - 1)[:, np.newaxis]
+    lap_finish_times[car_ids] = np.where(
+        (laps_after > 0) & (laps_after <= skipped[:, np.newaxis]),
+        last_finish[:, np.newaxis] + laps_after * last_lap[:, np.newaxis],
+        lap_finish_times[car_ids],
+    )
+    skipped_distance = skipped * cars.track_length[steady_cars]
+    new_distance[steady_cars] += skipped_distance
+    state.next_line[steady_cars] += skipped_distance
+    state.laps[steady_cars] += skipped
+    state.time_offset[steady_cars] += skipped * last_lap
@@ -0,0 +1,148 @@
+import numpy as np
+
+from peloton.conf.settings import get_config, use_config
+from peloton.models.bolid import Car
+from peloton.models.simulation import calculate_max_speed
+from peloton.models.track import Track, Sector
+from peloton.simulation.envelope import car_speed_limits
+from peloton.simulation.solver import SpeedProfile, forward_pass, backward_pass, ride_sectors
+
+# squared border speeds this close (relative) to the speeds before an edit are not changed by it
+PROFILE_TOLERANCE = 1e-9
+# sectors of the first window around an edit, windows double until the changed speeds are inside
+MIN_WINDOW = 16
+
+
+def _unchanged(new: np.ndarray, old: np.ndarray) -> np.ndarray:
+    return np.abs(new - old) <= PROFILE_TOLERANCE * np.maximum(np.abs(old), 1.0)
+
+
+class LapProfile:
+    """
+    Speed profile of one car riding one lap from a standing start, the first lap of `RaceMode.SOLVER`,
+    kept up to date through sector edits. An edit changes border speeds only within the acceleration and
+    braking distances around the sector, so both passes of the solver are re-run over a window growing
+    from the sector until the new speeds meet the old ones, then the rides of the sectors in it
+    and the lap time are patched. The solver work of an edit depends on the window, not on the track length.
+    Edits use the config of the engine context the profile is created in
+    """
+    def __init__(self, track: Track, car: Car):
+        self.track = track
+        self.car = car
+        self.config = get_config()
+
+        lengths = track.sector_lengths
+        self._limits = car_speed_limits(track, car).copy()
+        self._border_limit_sq = np.empty(len(lengths) + 1)
+        self._border_limit_sq[0] = 0.0
+        self._border_limit_sq[1:-1] = np.minimum(self._limits[:-1], self._limits[1:]) ** 2
+        self._border_limit_sq[-1] = self._limits[-1] ** 2
+
+        # squared border speeds after the forward pass and after both passes
+        self._forward_sq = forward_pass(self._border_limit_sq, 2.0 * car.max_acceleration * lengths)
+        self.border_speed_sq = backward_pass(self._forward_sq, 2.0 * car.max_braking * lengths)
+        self.profile = ride_sectors(lengths, self._limits, self.border_speed_sq, car.max_acceleration, car.max_braking)
+        self.time = self.profile.time
+
+    def edit_sector(self, sector_index: int, length: float = None, corner: float = None) -> Sector:
+        """
+        `Track.edit_sector` followed by `sector_edited`
+        """
+        sector = self.track.edit_sector(sector_index, length=length, corner=corner)
+        self.sector_edited(sector_index)
+        return sector
+
+    def sector_edited(self, sector_index: int) -> range:
+        """
+        Updates the profile after the sector has been changed with `Track.edit_sector`,
+        returns the sectors whose rides were recalculated
+        """
+        car = self.car
+        lengths = self.track.sector_lengths
+        sectors_count = len(lengths)
+        with use_config(self.config):
+            # the edited sector only, not the curvatures of the whole track
+            curvature = self.track.sectors[sector_index].curvature
+        limit = calculate_max_speed(car.max_speed, curvature, self.config.slowest_curve_speed)
+        self._limits[sector_index] = min(limit, car.max_speed)
+
+        limits, border_limit_sq = self._limits, self._border_limit_sq
+        if sector_index > 0:
+            border_limit_sq[sector_index] = min(limits[sector_index - 1], limits[sector_index]) ** 2
+        # the last border is limited by the last sector only
+        next_limit = limits[sector_index + 1] if sector_index + 1 < sectors_count else np.inf
+        border_limit_sq[sector_index + 1] = min(limits[sector_index], next_limit) ** 2
+
+        forward_end = self._update_forward(sector_index, lengths)
+        backward_start = self._update_backward(sector_index, forward_end, lengths)
+
+        start, end = max(backward_start - 1, 0), min(forward_end, sectors_count)
+        ride = ride_sectors(
+            lengths[start:end], limits[start:end], self.border_speed_sq[start:end + 1],
+            car.max_acceleration, car.max_braking,
+        )
+        self.time += float(ride.sector_time.sum() - self.profile.sector_time[start:end].sum())
+        for name in ('entry_speed', 'exit_speed', 'peak_speed', 'braking_point', 'sector_time'):
+            getattr(self.profile, name)[start:end] = getattr(ride, name)
+        return range(start, end)
+
+    def _update_forward(self, sector_index: int, lengths: np.ndarray) -> int:
+        """
+        Re-runs the forward pass from the edited sector, returns the end of the changed border speeds
+        """
+        forward_sq = self._forward_sq
+        start = max(sector_index, 1)
+        window = MIN_WINDOW
+        while True:
+            stop = min(start + window, len(forward_sq))
+            new_sq = forward_pass(
+                np.concatenate(([forward_sq[start - 1]], self._border_limit_sq[start:stop])),
+                2.0 * self.car.max_acceleration * lengths[start - 1:stop - 1],
+            )[1:]
+            # borders up to the end of the edited sector change anyway
+            same = np.flatnonzero(
+                _unchanged(new_sq, forward_sq[start:stop]) & (np.arange(start, stop) > sector_index + 1)
+            )
+            if same.size or stop == len(forward_sq):
+                end = start + int(same[0]) if same.size else stop
+                forward_sq[start:end] = new_sq[:end - start]
+                return end
+            window *= 2
+
+    def _update_backward(self, sector_index: int, forward_end: int, lengths: np.ndarray) -> int:
+        """
+        Re-runs the backward pass down from the end of the forward changes, returns the start of the changed speeds
+        """
+        border_speed_sq = self.border_speed_sq
+        window = MIN_WINDOW
+        while True:
+            start = max(sector_index - window, 0)
+            limit_sq = self._forward_sq[start:forward_end]
+            if forward_end < len(border_speed_sq):
+                # speeds after the forward changes are not changed by the edit
+                limit_sq = np.concatenate((limit_sq, [border_speed_sq[forward_end]]))
+            new_sq = backward_pass(limit_sq, 2.0 * self.car.max_braking * lengths[start:start + len(limit_sq) - 1])
+            new_sq = new_sq[:forward_end - start]
+
+            same = np.flatnonzero(
+                _unchanged(new_sq, border_speed_sq[start:forward_end]) & (np.arange(start, forward_end) < sector_index)
+            )
+            if same.size or start == 0:
+                begin = start + int(same[-1]) + 1 if same.size else 0
+                border_speed_sq[begin:forward_end] = new_sq[begin - start:]
+                return begin
+            window *= 2
+
+    def solve(self) -> SpeedProfile:
+        """
+        The same profile solved from scratch, e.g. to check the patched one
+        """
+        lengths = self.track.sector_lengths
+        return ride_sectors(
+            lengths, self._limits,
+            backward_pass(
+                forward_pass(self._border_limit_sq, 2.0 * self.car.max_acceleration * lengths),
+                2.0 * self.car.max_braking * lengths,
+            ),
+            self.car.max_acceleration, self.car.max_braking,
+        )
@@ -0,0 +1,190 @@
+from typing import Sequence
+
+import numpy as np
+
+from peloton.models.bolid import Peloton
+from peloton.models.simulation import RaceNoise, Distribution, CarDistribution, MonteCarloResult
+from peloton.models.track import Track
+from peloton.simulation.envelope import car_speed_limits
+from peloton.simulation.solver import solve_speed_profile
+
+HISTOGRAM_BINS = 256
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+# speed limits of a batch of replicas, (replicas, cars, laps * sectors), are kept below this size
+MAX_BATCH_ELEMENTS = 1 << 20
+# grip and driver errors never cut a speed limit below this share of it
+MIN_SPEED_SHARE = 0.5
+
+
+class StreamingHistogram:
+    """
+    Histogram of a stream of values with a fixed number of bins: the range is set by the first values
+    and doubles, merging pairs of bins, whenever a value falls outside of it. Counts stay exact,
+    moments and extremes are accumulated alongside, so no value is kept
+    """
+    def __init__(self, bins: int = HISTOGRAM_BINS):
+        if bins < 2 or bins % 2:
+            raise ValueError(f'Histogram needs an even number of bins, got `{bins}`')
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.low = self.high = None
+        self.count = 0
+        self.mean = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._m2 = 0.0
+
+    @property
+    def edges(self) -> np.ndarray:
+        return np.linspace(self.low, self.high, len(self.counts) + 1)
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self._m2 / self.count)) if self.count else 0.0
+
+    def add(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float).ravel()
+        if not values.size:
+            return
+        low, high = float(values.min()), float(values.max())
+        if self.low is None:
+            span = (high - low) or max(abs(low), 1.0) * 1e-6
+            # the range is half-open, the largest value goes to the last bin
+            self.low, self.high = low, low + span * (1.0 + 1.0 / len(self.counts))
+        self._expand(low, high)
+
+        width = (self.high - self.low) / len(self.counts)
+        bins = np.minimum(((values - self.low) / width).astype(int), len(self.counts) - 1)
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+
+        # moments of the batch merged into the running ones
+        mean = float(values.mean())
+        delta = mean - self.mean
+        total = self.count + values.size
+        self._m2 += float(((values - mean) ** 2).sum()) + delta ** 2 * self.count * values.size / total
+        self.mean += delta * values.size / total
+        self.count = total
+        self.min, self.max = min(self.min, low), max(self.max, high)
+
+    def _expand(self, low: float, high: float):
+        while low < self.low or high >= self.high:
+            merged = self.counts.reshape(-1, 2).sum(axis=1)
+            empty = np.zeros_like(merged)
+            span = self.high - self.low
+            if low < self.low:
+                self.counts = np.concatenate((empty, merged))
+                self.low -= span
+            else:
+                self.counts = np.concatenate((merged, empty))
+                self.high += span
+
+    def quantile(self, q: float) -> float:
+        """
+        Linear interpolation inside the bin holding the `q` quantile
+        """
+        if not self.count:
+            raise ValueError('Histogram is empty')
+        cumulative = np.cumsum(self.counts)
+        target = q * self.count
+        idx = min(int(np.searchsorted(cumulative, target)), len(self.counts) - 1)
+        before = cumulative[idx] - self.counts[idx]
+        inside = (target - before) / self.counts[idx] if self.counts[idx] else 0.0
+        width = (self.high - self.low) / len(self.counts)
+        return float(np.clip(self.low + (idx + inside) * width, self.min, self.max))
+
+    def distribution(self, quantiles: Sequence[float] = QUANTILES) -> Distribution:
+        return Distribution(
+            count=self.count,
+            mean=self.mean,
+            std=self.std,
+            min=self.min,
+            max=self.max,
+            quantiles={q: self.quantile(q) for q in quantiles},
+            histogram_edges=self.edges.tolist(),
+            histogram_counts=self.counts.tolist(),
+        )
+
+
+def run_monte_carlo(
+        track: Track,
+        peloton: Peloton,
+        laps: int = 1,
+        replicas: int = 1000,
+        noise: RaceNoise = None,
+        seed: int = 0,
+        quantiles: Sequence[float] = QUANTILES,
+        bins: int = HISTOGRAM_BINS,
+) -> MonteCarloResult:
+    """
+    Races `replicas` noisy copies of the race with the closed-form solver, a batch of replicas at a time:
+    the speed limits of `RaceCar.max_speed` are perturbed by `noise` and the (replicas x cars) rides
+    of a batch are solved as one numpy computation. Results are streamed into win counts and histograms,
+    so memory does not grow with `replicas`. The same `seed` gives the same result
+    """
+    cars = peloton.cars
+    if not track.sectors:
+        raise ValueError('Track does not have any sectors')
+    if not cars:
+        raise ValueError('Peloton does not have any cars')
+    if laps < 1:
+        raise ValueError(f'Race must have at least one lap, got `{laps}`')
+    if replicas < 1:
+        raise ValueError(f'Monte Carlo needs at least one replica, got `{replicas}`')
+
+    noise = noise if noise is not None else RaceNoise()
+    cars_count = len(cars)
+    driver_error = np.asarray(noise.driver_error, dtype=float)
+    if driver_error.ndim and len(driver_error) != cars_count:
+        raise ValueError(f'Driver errors are given for {len(driver_error)} cars of {cars_count}')
+    driver_error = np.broadcast_to(driver_error, (cars_count,))[:, np.newaxis]
+
+    sectors_count = len(track.sector_lengths)
+    lengths = np.tile(track.sector_lengths, laps)
+    top_speed = np.array([car.max_speed for car in cars], dtype=float)[:, np.newaxis]
+    speed_limits = np.array([car_speed_limits(track, car) for car in cars])
+    max_acceleration = np.array([car.max_acceleration for car in cars], dtype=float)[:, np.newaxis]
+    max_braking = np.array([car.max_braking for car in cars], dtype=float)[:, np.newaxis]
+
+    wins = np.zeros(cars_count, dtype=np.int64)
+    finish_times = [StreamingHistogram(bins) for _ in cars]
+    best_lap_times = [StreamingHistogram(bins) for _ in cars]
+    batch_size = max(1, MAX_BATCH_ELEMENTS // (cars_count * len(lengths)))
+
+    for batch_idx, start in enumerate(range(0, replicas, batch_size)):
+        count = min(batch_size, replicas - start)
+        rng = np.random.default_rng([seed, batch_idx])
+
+        # grip of a replica is shared by the whole peloton, driver errors are not
+        grip = np.maximum(1.0 + noise.grip * rng.standard_normal((count, 1, sectors_count)), MIN_SPEED_SHARE)
+        limits = np.tile(np.minimum(speed_limits * grip, top_speed), laps)
+        error = np.abs(rng.standard_normal((count, cars_count, len(lengths)))) * driver_error
+        limits *= np.maximum(1.0 - error, MIN_SPEED_SHARE)
+
+        profile = solve_speed_profile(
+            lengths,
+            limits.reshape(-1, len(lengths)),
+            np.tile(max_acceleration, (count, 1)),
+            np.tile(max_braking, (count, 1)),
+        )
+        lap_times = profile.sector_time.reshape(count, cars_count, laps, sectors_count).sum(axis=3)
+        finish_time = lap_times.sum(axis=2)
+
+        wins += np.bincount(finish_time.argmin(axis=1), minlength=cars_count)
+        best_lap_time = lap_times.min(axis=2)
+        for idx in range(cars_count):
+            finish_times[idx].add(finish_time[:, idx])
+            best_lap_times[idx].add(best_lap_time[:, idx])
+
+    return MonteCarloResult(
+        laps=laps,
+        replicas=replicas,
+        seed=seed,
+        cars=[
+            CarDistribution(
+                caption=car.caption,
+                win_probability=float(wins[idx] / replicas),
+                finish_time=finish_times[idx].distribution(quantiles),
+                best_lap_time=best_lap_times[idx].distribution(quantiles),
+            )
+            for idx, car in enumerate(cars)
+        ],
+    )
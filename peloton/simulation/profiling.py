@@ -0,0 +1,126 @@
+import cProfile
+import pstats
+import time
+import tracemalloc
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+PHASES = ('lookup', 'decision', 'integration', 'telemetry', 'solver')
+
+
+class RaceProfile(BaseModel):
+    """
+    Counters and phase timings of one race, times are in seconds.
+    `allocated` are bytes allocated by every phase, empty unless allocations were traced
+    """
+    frames: int = 0
+    decisions: int = 0
+    lookups: int = 0
+    samples: int = 0
+    batches: int = 0
+    phase_times: Dict[str, float] = {}
+    allocated: Dict[str, int] = {}
+    total_time: float = 0.0
+
+    def format(self) -> str:
+        lines = [
+            f'frames: {self.frames}\tdecisions: {self.decisions}\tlookups: {self.lookups}\t'
+            f'samples: {self.samples}\tbatches: {self.batches}'
+        ]
+        for phase, phase_time in sorted(self.phase_times.items(), key=lambda item: -item[1]):
+            if not phase_time:
+                continue
+            share = phase_time / self.total_time if self.total_time else 0.0
+            line = f'{phase:<12}{phase_time * 1000:10.1f}ms {share:7.1%}'
+            if self.allocated:
+                line += f'{self.allocated.get(phase, 0) / 2 ** 20:10.1f}MiB allocated'
+            lines.append(line)
+        lines.append(f'{"total":<12}{self.total_time * 1000:10.1f}ms')
+        return '\n'.join(lines)
+
+
+class RaceProfiler:
+    """
+    Opt-in instrumentation of `Race.run`: the engine counts its work and times phases of every frame
+    only when a profiler is passed, otherwise the frame loop does a single `is None` check per phase.
+    `cprofile=True` also runs the race under `cProfile`, see `stats` and `dump_stats`.
+    `trace_allocations=True` counts the bytes every phase allocates with `tracemalloc`: the peak of the traced
+    memory above its level at the start of the phase, temporary arrays included. Tracing slows the race down
+    """
+    def __init__(self, cprofile: bool = False, trace_allocations: bool = False):
+        if trace_allocations and not hasattr(tracemalloc, 'reset_peak'):
+            raise RuntimeError('Tracing allocations needs Python 3.9 or newer')
+        # plain attributes, the engine updates them every frame
+        self.frames = 0
+        self.decisions = 0
+        self.lookups = 0
+        self.samples = 0
+        self.batches = 0
+        self.phase_times = {phase: 0.0 for phase in PHASES}
+        self.allocated = {phase: 0 for phase in PHASES} if trace_allocations else {}
+        self.total_time = 0.0
+
+        self._cprofile = cProfile.Profile() if cprofile else None
+        self._started_at: Optional[float] = None
+        self._mark = 0.0
+        self._trace_allocations = trace_allocations
+        self._stop_tracing = False
+        self._memory_mark = 0
+
+    def start(self):
+        if self._trace_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._stop_tracing = True
+            tracemalloc.reset_peak()
+            self._memory_mark = tracemalloc.get_traced_memory()[0]
+        self._started_at = self._mark = time.perf_counter()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def stop(self):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._stop_tracing:
+            tracemalloc.stop()
+            self._stop_tracing = False
+        if self._started_at is not None:
+            self.total_time += time.perf_counter() - self._started_at
+            self._started_at = None
+
+    def lap(self, phase: str):
+        """
+        Adds the time since the previous `lap` (or `start`) to `phase`
+        """
+        now = time.perf_counter()
+        self.phase_times[phase] += now - self._mark
+        if self._trace_allocations:
+            memory, peak = tracemalloc.get_traced_memory()
+            self.allocated[phase] += peak - self._memory_mark
+            tracemalloc.reset_peak()
+            self._memory_mark = memory
+            # tracing is not timed
+            now = time.perf_counter()
+        self._mark = now
+
+    @property
+    def profile(self) -> RaceProfile:
+        return RaceProfile(
+            frames=self.frames,
+            decisions=self.decisions,
+            lookups=self.lookups,
+            samples=self.samples,
+            batches=self.batches,
+            phase_times=self.phase_times,
+            allocated=self.allocated,
+            total_time=self.total_time,
+        )
+
+    def stats(self) -> pstats.Stats:
+        if self._cprofile is None:
+            raise RuntimeError('The race was profiled without cProfile')
+        return pstats.Stats(self._cprofile)
+
+    def dump_stats(self, path: str):
+        self.stats().dump_stats(path)
@@ -0,0 +1,499 @@
+from typing import Iterator, Optional, Generator, Tuple
+
+import numpy as np
+
+from peloton.conf.const import RACE_FRAME_DURATION
+from peloton.conf.settings import SimConfig, get_config, use_config
+from peloton.models.bolid import Peloton
+from peloton.models.simulation import RaceResult, CarResult, RaceMode, Interaction
+from peloton.models.track import Track
+from peloton.simulation.envelope import BrakingEnvelope, car_speed_limits, car_envelope_speeds_sq
+from peloton.simulation.events import ride_phase, event_distances, travel
+from peloton.simulation.frames import FrameTables, FrameCars, sector_rows, frame_speed, finish_frame
+from peloton.simulation.interaction import TrackOrder
+from peloton.simulation.profiling import RaceProfiler
+from peloton.simulation.solver import solve_speed_profile
+from peloton.simulation.state import PelotonState, FrameBuffers
+from peloton.simulation.telemetry import TelemetryBatch, TelemetrySink
+
+
+class Race:
+    """
+    In `RaceMode.FRAMES` steps every car of the peloton at once, car state lives in numpy arrays indexed by car.
+    `RaceMode.SOLVER` computes the same ride analytically, sector by sector.
+    `RaceMode.ADAPTIVE` jumps every car straight to its next event and streams telemetry like frames mode.
+    With an `interaction` cars of the frames mode block, follow, slipstream and overtake each other.
+    With `steady_laps` the frames mode stops stepping a car once it crosses the line at the speed
+    it started the previous lap with, the rest of its laps up to the final one repeat that lap.
+    In every mode the race ends at the finish line: cars do not brake on the final lap for the lap after it.
+    A race uses its own `config`, by default the config of the engine context it is created in,
+    so races with different configs can run in different threads at the same time
+    """
+    track: Track
+    peloton: Peloton
+    laps: int
+    mode: RaceMode
+    frame_duration: float
+    interaction: Optional[Interaction]
+    steady_laps: bool
+    config: SimConfig
+    result: Optional[RaceResult]
+
+    def __init__(
+            self,
+            track: Track,
+            peloton: Peloton,
+            laps: int = 1,
+            mode: RaceMode = RaceMode.FRAMES,
+            frame_duration: float = RACE_FRAME_DURATION,
+            interaction: Interaction = None,
+            steady_laps: bool = True,
+            config: SimConfig = None,
+    ):
+        if not track.sectors:
+            raise ValueError('Track does not have any sectors')
+        if not peloton.cars:
+            raise ValueError('Peloton does not have any cars')
+        if laps < 1:
+            raise ValueError(f'Race must have at least one lap, got `{laps}`')
+        if frame_duration <= 0:
+            raise ValueError(f'Frame duration must be positive, got `{frame_duration}`')
+
+        self.track = track
+        self.peloton = peloton
+        self.laps = laps
+        self.mode = RaceMode(mode)
+        if interaction is not None and self.mode != RaceMode.FRAMES:
+            raise ValueError(f'Car interaction is available for frames mode only, got `{self.mode.value}`')
+
+        self.frame_duration = frame_duration
+        self.interaction = interaction
+        self.steady_laps = steady_laps
+        self.config = config if config is not None else get_config()
+        self.result = None
+
+        # every table depending on the config is built here, the engine loops use the tables only
+        with use_config(self.config):
+            self._prefetch()
+
+    def _prefetch(self):
+        cars = self.peloton.cars
+
+        self._track_revision = self.track.revision
+        self._sector_lengths = self.track.sector_lengths
+        self._track_length = self.track.length
+
+        self._max_acceleration = np.array([car.max_acceleration for car in cars], dtype=float)
+        self._max_braking = np.array([car.max_braking for car in cars], dtype=float)
+        self._top_speed = np.array([car.max_speed for car in cars], dtype=float)
+        # (cars, sectors) table of the fastest possible speed of the car inside the sector
+        self._sector_max_speed = np.array([car_speed_limits(self.track, car) for car in cars])
+        self._cars = np.arange(len(cars))
+        self._envelope = BrakingEnvelope(
+            self.track.sector_starts, self._sector_lengths, self._sector_max_speed, self._max_braking,
+            start_speed_sq=np.array([car_envelope_speeds_sq(self.track, car) for car in cars]),
+        )
+        if self.interaction is not None:
+            self._straight_sectors = self.track.sector_curvatures <= self.interaction.straight_curvature
+
+    def _prefetch_edited_track(self):
+        # the track may have been edited after the race was created
+        if self.track.revision != self._track_revision:
+            with use_config(self.config):
+                self._prefetch()
+
+    def frame_tables(self) -> Tuple[FrameTables, FrameCars]:
+        """
+        Tables and cars of this race for the frames engine, new arrays for every call.
+        `RaceBatch` concatenates the tables of its races
+        """
+        self._prefetch_edited_track()
+        cars_count, sectors_count = self._sector_max_speed.shape
+        tables = FrameTables(
+            sector_starts=self._envelope.sector_starts,
+            sector_ends=self._envelope.sector_ends,
+            limits=self._sector_max_speed.ravel(),
+            next_start_speed_sq=self._envelope.next_start_speed_sq.ravel(),
+            final_next_start_speed_sq=self._envelope.final_next_start_speed_sq.ravel(),
+            straight=self._straight_sectors if self.interaction is not None else None,
+        )
+
+        dt = self.frame_duration
+        cars = FrameCars()
+        cars.car = np.arange(cars_count)
+        cars.race = np.zeros(cars_count, dtype=int)
+        cars.acceleration_step = self._max_acceleration * dt
+        cars.braking_step = self._max_braking * dt
+        cars.max_braking = self._max_braking.copy()
+        cars.max_speed = self._top_speed.copy()
+        cars.track_length = np.full(cars_count, self._track_length)
+        cars.track_offset = np.zeros(cars_count)
+        cars.first_sector = np.zeros(cars_count, dtype=int)
+        cars.table_offset = np.arange(cars_count) * sectors_count
+        cars.race_laps = np.full(cars_count, self.laps)
+        cars.race_distance = cars.race_laps * cars.track_length
+        cars.final_lap_start = cars.race_distance - cars.track_length
+        # a ride depends on the lap entry speed only, unless cars interact
+        cars.steady_laps = np.full(cars_count, self.steady_laps and self.interaction is None)
+        cars.float_precision = np.full(cars_count, self.config.float_precision)
+        return tables, cars
+
+    def run(
+            self,
+            sink: TelemetrySink = None,
+            sample_every: int = 10,
+            batch_size: int = 1000,
+            profiler: RaceProfiler = None,
+    ) -> RaceResult:
+        """
+        Telemetry of every `sample_every` frame is passed to the `sink` in batches of `batch_size` samples,
+        the work of the engine is counted and timed by the `profiler` if it is passed
+        """
+        self._prefetch_edited_track()
+        if self.mode == RaceMode.SOLVER:
+            if sink is not None:
+                raise ValueError('Telemetry is available for frames mode only')
+            if profiler is not None:
+                profiler.start()
+            self.result = self._run_solver()
+            if profiler is not None:
+                profiler.lap('solver')
+                profiler.stop()
+            return self.result
+
+        if sink is None:
+            for _ in self.stream(sample_every=None, profiler=profiler):
+                pass
+            return self.result
+
+        sink.open([car.caption for car in self.peloton.cars], sample_every * self.frame_duration)
+        try:
+            for batch in self.stream(sample_every, batch_size, profiler):
+                sink.write(batch)
+            sink.write_result(self.result)
+        finally:
+            sink.close()
+        return self.result
+
+    def stream(
+            self, sample_every: Optional[int] = 10, batch_size: int = 1000, profiler: RaceProfiler = None
+    ) -> Iterator[TelemetryBatch]:
+        """
+        Runs the race in frames mode yielding telemetry of every `sample_every` frame in batches,
+        `self.result` is set once the stream is exhausted
+        """
+        if sample_every is not None and (sample_every < 1 or batch_size < 1):
+            raise ValueError(f'Wrong telemetry sampling `{sample_every}` with batch size `{batch_size}`')
+        self._prefetch_edited_track()
+        run = self._run_adaptive if self.mode == RaceMode.ADAPTIVE else self._run_frames
+        if profiler is None:
+            self.result = yield from run(sample_every, batch_size, None)
+            return
+
+        profiler.start()
+        try:
+            self.result = yield from run(sample_every, batch_size, profiler)
+        finally:
+            profiler.stop()
+
+    def _run_solver(self) -> RaceResult:
+        sectors_count = len(self._sector_lengths)
+        lengths = np.tile(self._sector_lengths, self.laps)
+
+        car_results = []
+        for idx, car in enumerate(self.peloton.cars):
+            profile = solve_speed_profile(
+                lengths,
+                np.tile(self._sector_max_speed[idx], self.laps),
+                car.max_acceleration,
+                car.max_braking,
+            )
+            lap_times = profile.sector_time.reshape(self.laps, sectors_count).sum(axis=1)
+            car_results.append(CarResult(
+                caption=car.caption,
+                finish_time=profile.time,
+                lap_times=lap_times.tolist(),
+                top_speed=float(profile.peak_speed.max()),
+            ))
+
+        return RaceResult(
+            laps=self.laps,
+            frames=0,
+            race_time=max(car_result.finish_time for car_result in car_results),
+            cars=car_results,
+        )
+
+    def _new_batch(self, batch_size: int) -> TelemetryBatch:
+        shape = (batch_size, len(self.peloton.cars))
+        return TelemetryBatch(
+            race_time=np.empty(batch_size),
+            distance=np.empty(shape),
+            speed=np.empty(shape),
+            acceleration=np.empty(shape),
+            sector=np.empty(shape, dtype=int),
+        )
+
+    def _run_frames(
+            self, sample_every: Optional[int], batch_size: int, profiler: Optional[RaceProfiler]
+    ) -> Generator[TelemetryBatch, None, RaceResult]:
+        cars_count = len(self.peloton.cars)
+        dt = self.frame_duration
+        race_distance = self.laps * self._track_length
+
+        tables, cars = self.frame_tables()
+        if sample_every:
+            # telemetry needs every frame
+            cars.steady_laps[:] = False
+        state = PelotonState(cars_count, self._track_length)
+        buffers = FrameBuffers(cars_count)
+        speed, distance = state.speed, state.distance
+        lap_finish_times = np.full((cars_count, self.laps), np.nan)
+        interaction = self.interaction
+        track_order = TrackOrder(cars_count) if interaction is not None else None
+        limit_factor = speed_cap = None
+
+        batch = self._new_batch(batch_size) if sample_every else None
+        batch_samples = 0
+
+        frame = 0
+        while distance.min() < race_distance:
+            if sample_every and frame % sample_every == 0:
+                batch.race_time[batch_samples] = frame * dt
+                batch.distance[batch_samples] = distance
+                batch.speed[batch_samples] = speed
+                batch.acceleration[batch_samples] = state.acceleration
+                batch.sector[batch_samples] = self.track.get_sector_indexes(distance)
+                batch_samples += 1
+                if profiler is not None:
+                    profiler.samples += 1
+                    profiler.lookups += len(distance)
+                if batch_samples == batch_size:
+                    yield batch
+                    batch = self._new_batch(batch_size)
+                    batch_samples = 0
+                    if profiler is not None:
+                        profiler.batches += 1
+                if profiler is not None:
+                    profiler.lap('telemetry')
+
+            racing = np.less(distance, race_distance, out=buffers.racing)
+            sector, row = sector_rows(tables, cars, distance % self._track_length)
+            if interaction is not None:
+                # cars that have finished leave the track
+                track_order.update(distance % self._track_length, racing, self._track_length)
+                ahead, gap = track_order.ahead, track_order.gap
+                straight = tables.straight[sector]
+                slipstream = straight & (gap < interaction.slipstream_distance)
+                limit_factor = np.where(slipstream, 1.0 + interaction.slipstream_bonus, 1.0)
+                # overtaking is possible only with both cars on a straight, otherwise the car does not get
+                # closer than `following_distance` to the car ahead, expected to keep its speed for the frame
+                blocked = (ahead >= 0) & ~(straight & straight[ahead])
+                room = np.maximum(gap - interaction.following_distance, 0.0) + speed[ahead] * dt
+                speed_cap = np.where(blocked, np.maximum(2.0 * room / dt - speed, 0.0), np.inf)
+            if profiler is not None:
+                profiler.lookups += len(row)
+                profiler.lap('lookup')
+
+            # the look-ahead lookups are counted by the kernel
+            new_speed = frame_speed(tables, cars, state, row, dt, buffers, limit_factor, speed_cap, profiler)
+            if profiler is not None:
+                profiler.decisions += int(np.count_nonzero(racing))
+                profiler.lap('decision')
+
+            finish_frame(cars, state, new_speed, racing, frame, dt, buffers, lap_finish_times)
+            frame += 1
+            if profiler is not None:
+                profiler.frames += 1
+                profiler.lap('integration')
+
+        if batch_samples:
+            yield TelemetryBatch(
+                race_time=batch.race_time[:batch_samples],
+                distance=batch.distance[:batch_samples],
+                speed=batch.speed[:batch_samples],
+                acceleration=batch.acceleration[:batch_samples],
+                sector=batch.sector[:batch_samples],
+            )
+            if profiler is not None:
+                profiler.batches += 1
+                profiler.lap('telemetry')
+
+        return self.frames_result(frame, lap_finish_times, state.top_speed)
+
+    def frames_result(self, frames: int, lap_finish_times: np.ndarray, top_speed: np.ndarray) -> RaceResult:
+        """
+        The result of the race from the finish time of every lap of every car, (cars, laps),
+        and the top speeds of the cars, e.g. stepped by `RaceBatch`
+        """
+        lap_times = np.diff(lap_finish_times, axis=1, prepend=0.0)
+        return RaceResult(
+            laps=self.laps,
+            frames=frames,
+            race_time=float(lap_finish_times[:, -1].max()),
+            cars=[
+                CarResult(
+                    caption=car.caption,
+                    finish_time=float(lap_finish_times[idx, -1]),
+                    lap_times=lap_times[idx].tolist(),
+                    top_speed=float(top_speed[idx]),
+                )
+                for idx, car in enumerate(self.peloton.cars)
+            ],
+        )
+
+    def _run_adaptive(
+            self, sample_every: Optional[int], batch_size: int, profiler: Optional[RaceProfiler]
+    ) -> Generator[TelemetryBatch, None, RaceResult]:
+        """
+        Every car rides with constant acceleration between events: sector ends, reaching the sector limit,
+        reaching the braking curve and the braking point, on the final lap there is no braking curve
+        after the finish line. Each step moves every car to its own next event,
+        so cars have their own clocks and a step never depends on the other cars.
+        Telemetry samples are interpolated inside the steps and emitted once every car has passed them,
+        a car waits for the others at the end of the next batch, so the samples kept take one batch at most
+        """
+        cars_count = len(self.peloton.cars)
+        sectors_count = len(self._sector_lengths)
+        sector_starts = np.append(self.track.sector_starts, self._track_length)
+        sector_ends = sector_starts[1:]
+        limit_sq = self._sector_max_speed ** 2
+        exit_speed_sq = self._envelope.next_start_speed_sq
+        final_exit_speed_sq = self._envelope.final_next_start_speed_sq
+        sample_interval = sample_every * self.frame_duration if sample_every else None
+        cars = self._cars
+
+        car_time = np.zeros(cars_count)
+        speed = np.zeros(cars_count)
+        lap_distance = np.zeros(cars_count)
+        sector = np.zeros(cars_count, dtype=int)
+        laps = np.zeros(cars_count, dtype=int)
+        top_speed = np.zeros(cars_count)
+        lap_finish_times = np.full((cars_count, self.laps), np.nan)
+        race_time = 0.0
+
+        # samples interpolated for some cars but not yet for all of them, rows from `emitted` on.
+        # No car rides past the end of the next batch to emit, so they fit in a batch, one more row for rounding
+        next_sample = np.zeros(cars_count, dtype=int)
+        emitted = 0
+        pending = self._new_batch(batch_size + 1) if sample_interval else None
+
+        steps = 0
+        while True:
+            racing = laps < self.laps
+            if not sample_interval:
+                active = racing
+                if not active.any():
+                    break
+            else:
+                # cars that have finished keep riding until the last finisher for telemetry
+                if not (racing | (car_time < race_time)).any():
+                    break
+                horizon = (emitted + batch_size) * sample_interval
+                active = car_time < horizon
+
+            car_limit_sq = limit_sq[cars, sector]
+            # cars that have finished ride on to the next lap
+            car_exit_speed_sq = np.where(
+                laps == self.laps - 1, final_exit_speed_sq[cars, sector], exit_speed_sq[cars, sector]
+            )
+            to_sector_end = sector_ends[sector] - lap_distance
+            acceleration = ride_phase(
+                speed, car_limit_sq, car_exit_speed_sq + 2.0 * self._max_braking * to_sector_end,
+                self._max_acceleration, self._max_braking,
+            )
+            step_distance = event_distances(
+                speed, acceleration, to_sector_end, car_limit_sq, car_exit_speed_sq,
+                self._max_acceleration, self._max_braking,
+            )
+            step_distance[~active] = 0.0
+            step_time, new_speed = travel(speed, acceleration, step_distance)
+            if sample_interval:
+                # a step longer than the horizon ends at it, before its event
+                capped = np.flatnonzero(step_time > horizon - car_time)
+                if capped.size:
+                    capped_time = horizon - car_time[capped]
+                    step_time[capped] = capped_time
+                    new_speed[capped] = speed[capped] + acceleration[capped] * capped_time
+                    step_distance[capped] = (speed[capped] + new_speed[capped]) * capped_time / 2
+            if profiler is not None:
+                profiler.decisions += int(np.count_nonzero(racing))
+                profiler.lap('decision')
+
+            if sample_interval:
+                end_sample = np.maximum(np.ceil((car_time + step_time) / sample_interval).astype(int), next_sample)
+                counts = end_sample - next_sample
+                total = int(counts.sum())
+                if total:
+                    # (sample, car) pairs of every sample taken inside the step of the car
+                    sample_cars = np.repeat(cars, counts)
+                    sample = np.repeat(next_sample - np.cumsum(counts) + counts, counts) + np.arange(total)
+                    offset = np.clip(sample * sample_interval - car_time[sample_cars], 0.0, step_time[sample_cars])
+                    rows = sample - emitted
+                    sample_acceleration = acceleration[sample_cars]
+                    pending.distance[rows, sample_cars] = (
+                        laps[sample_cars] * self._track_length + lap_distance[sample_cars]
+                        + speed[sample_cars] * offset + sample_acceleration * offset ** 2 / 2
+                    )
+                    pending.speed[rows, sample_cars] = speed[sample_cars] + sample_acceleration * offset
+                    pending.acceleration[rows, sample_cars] = sample_acceleration
+                    pending.sector[rows, sample_cars] = sector[sample_cars]
+                    next_sample = end_sample
+                    if profiler is not None:
+                        profiler.samples += total
+
+                while next_sample.min() - emitted >= batch_size:
+                    pending.race_time[:batch_size] = (emitted + np.arange(batch_size)) * sample_interval
+                    yield self._take_batch(pending, batch_size)
+                    emitted += batch_size
+                    if profiler is not None:
+                        profiler.batches += 1
+                if profiler is not None:
+                    profiler.lap('telemetry')
+
+            top_speed = np.where(racing, np.maximum(top_speed, new_speed), top_speed)
+            car_time += step_time
+            speed = new_speed
+            lap_distance = lap_distance + step_distance
+
+            ended = np.flatnonzero(lap_distance >= sector_ends[sector])
+            if ended.size:
+                sector[ended] += 1
+                finished_lap = ended[sector[ended] == sectors_count]
+                sector[finished_lap] = 0
+                lap_distance[ended] = sector_starts[sector[ended]]
+
+                counted = finished_lap[laps[finished_lap] < self.laps]
+                lap_finish_times[counted, laps[counted]] = car_time[counted]
+                laps[finished_lap] += 1
+                if counted.size:
+                    race_time = max(race_time, float(car_time[counted].max()))
+
+            steps += 1
+            if profiler is not None:
+                profiler.frames += 1
+                profiler.lap('integration')
+
+        if sample_interval:
+            # samples taken before the last car has finished, as in frames mode
+            samples = max(int(np.ceil(race_time / sample_interval)), emitted) - emitted
+            while samples > 0:
+                size = min(samples, batch_size)
+                pending.race_time[:size] = (emitted + np.arange(size)) * sample_interval
+                yield self._take_batch(pending, size)
+                emitted += size
+                samples -= size
+                if profiler is not None:
+                    profiler.batches += 1
+                    profiler.lap('telemetry')
+
+        return self.frames_result(steps, lap_finish_times, top_speed)
+
+    @staticmethod
+    def _take_batch(batch: TelemetryBatch, samples: int) -> TelemetryBatch:
+        """
+        Copies the first `samples` rows out of the batch and shifts the rest of it to the start
+        """
+        taken = TelemetryBatch(**{name: column[:samples].copy() for name, column in vars(batch).items()})
+        for column in vars(batch).values():
+            column[:-samples] = column[samples:]
+        return taken
@@ -0,0 +1,145 @@
+import json
+import math
+import struct
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from peloton.models.simulation import RaceResult
+from peloton.simulation.telemetry import TelemetrySink, TelemetryBatch
+
+REPLAY_MAGIC = b'PLTR'
+REPLAY_VERSION = 1
+
+# magic, version, cars, sample interval, samples, data offset, result offset, result size
+_HEADER = struct.Struct('<4sHxxIdQQQQ')
+_HEADER_SIZE = 64
+_ALIGNMENT = 64
+# sample times are multiples of the sample interval up to float rounding
+_TIME_TOLERANCE = 1e-9
+
+
+def replay_dtype(cars: int) -> np.dtype:
+    """
+    One fixed width record per telemetry sample, every field but the race time is a per car column
+    """
+    return np.dtype([
+        ('race_time', '<f8'),
+        ('distance', '<f8', (cars,)),
+        ('speed', '<f8', (cars,)),
+        ('acceleration', '<f8', (cars,)),
+        ('sector', '<i4', (cars,)),
+    ])
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+class ReplaySink(TelemetrySink):
+    """
+    Writes telemetry as a replay file: a fixed size header, car captions as JSON,
+    fixed width sample records (see `replay_dtype`) and the race result as JSON at the end.
+    The header is completed on `close`, so the output must be a path
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._output = None
+        self._dtype: Optional[np.dtype] = None
+        self._data_offset = 0
+        self._samples = 0
+        self._result = b''
+
+    def open(self, captions: Sequence[str], sample_interval: float):
+        super().open(captions, sample_interval)
+        self._dtype = replay_dtype(len(self.captions))
+        self._samples = 0
+        self._result = b''
+
+        captions_json = json.dumps(self.captions).encode()
+        self._data_offset = _aligned(_HEADER_SIZE + len(captions_json))
+        self._output = open(self.path, 'wb')
+        self._output.write(bytes(_HEADER_SIZE))
+        self._output.write(captions_json.ljust(self._data_offset - _HEADER_SIZE, b'\0'))
+
+    def write(self, batch: TelemetryBatch):
+        records = np.empty(len(batch), dtype=self._dtype)
+        records['race_time'] = batch.race_time
+        records['distance'] = batch.distance
+        records['speed'] = batch.speed
+        records['acceleration'] = batch.acceleration
+        records['sector'] = batch.sector
+        self._output.write(records.tobytes())
+        self._samples += len(batch)
+
+    def write_result(self, result: RaceResult):
+        self._result = result.json().encode()
+
+    def close(self):
+        if self._output is None:
+            return
+
+        result_offset = self._data_offset + self._samples * self._dtype.itemsize
+        self._output.write(self._result)
+        self._output.seek(0)
+        self._output.write(_HEADER.pack(
+            REPLAY_MAGIC, REPLAY_VERSION, len(self.captions), self.sample_interval,
+            self._samples, self._data_offset, result_offset, len(self._result),
+        ))
+        self._output.close()
+        self._output = None
+
+
+class Replay:
+    """
+    Reads a replay file written by `ReplaySink`. Records are memory mapped,
+    so any moment of a race is available without loading the whole file
+    """
+    captions: List[str]
+    sample_interval: float
+    records: np.ndarray
+    result: Optional[RaceResult]
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as replay_file:
+            header = replay_file.read(_HEADER_SIZE)
+            if len(header) < _HEADER_SIZE or header[:4] != REPLAY_MAGIC:
+                raise ValueError(f'`{path}` is not a replay file')
+            (
+                _, version, cars, self.sample_interval, samples, data_offset, result_offset, result_size
+            ) = _HEADER.unpack(header[:_HEADER.size])
+            if version != REPLAY_VERSION:
+                raise ValueError(f'Replay version `{version}` is not supported')
+
+            self.captions = json.loads(replay_file.read(data_offset - _HEADER_SIZE).rstrip(b'\0'))
+            replay_file.seek(result_offset)
+            self.result = RaceResult.parse_raw(replay_file.read(result_size)) if result_size else None
+
+        if samples:
+            self.records = np.memmap(path, dtype=replay_dtype(cars), mode='r', offset=data_offset, shape=(samples,))
+        else:
+            self.records = np.empty(0, dtype=replay_dtype(cars))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def sample_index(self, race_time: float) -> int:
+        """
+        Index of the last sample taken not later than `race_time`,
+        samples have a fixed interval, so no records are read to find it
+        """
+        if not len(self.records):
+            raise ValueError('Replay has no samples')
+        index = math.floor(race_time / self.sample_interval + _TIME_TOLERANCE)
+        return min(max(index, 0), len(self.records) - 1)
+
+    def at(self, race_time: float) -> np.void:
+        return self.records[self.sample_index(race_time)]
+
+    def between(self, start_time: float, end_time: float) -> np.ndarray:
+        start = max(math.ceil(start_time / self.sample_interval - _TIME_TOLERANCE), 0)
+        end = math.floor(end_time / self.sample_interval + _TIME_TOLERANCE) + 1
+        return self.records[start:max(end, start)]
+
+    def car(self, caption: str) -> int:
+        return self.captions.index(caption)
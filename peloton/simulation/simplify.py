@@ -0,0 +1,125 @@
+from dataclasses import dataclass
+from typing import Sequence, List, Optional
+
+import numpy as np
+
+from peloton.conf.settings import get_config
+from peloton.models.bolid import Car
+from peloton.models.track import Track
+from peloton.simulation.envelope import car_speed_limits
+from peloton.simulation.solver import solve_speed_profile
+
+# attempts to meet a lap time bound, the speed tolerance is halved after every failed one
+MAX_REFINEMENTS = 8
+
+
+@dataclass
+class SimplifiedTrack:
+    """
+    A coarse level of a track: every coarse sector is a run of adjacent original sectors,
+    `sector_starts[k]:sector_starts[k + 1]` are the original sectors of coarse sector `k`.
+    Sector borders of the coarse track are borders of the original one, so distances are the same on both
+    """
+    track: Track
+    original: Track
+    sector_starts: np.ndarray
+    max_speed_error: float
+    lap_time_errors: Optional[List[float]] = None
+
+    @property
+    def sector_map(self) -> np.ndarray:
+        """
+        Coarse sector index of every original sector
+        """
+        return np.repeat(np.arange(len(self.sector_starts) - 1), np.diff(self.sector_starts))
+
+    def original_sectors(self, coarse_index: int) -> range:
+        return range(int(self.sector_starts[coarse_index]), int(self.sector_starts[coarse_index + 1]))
+
+
+def _group_starts(curvatures: np.ndarray, corners: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Greedy runs of sectors turning the same way whose `(1 - curvature)^2` values,
+    the curvature part of the max speed, stay within `tolerance` of each other
+    """
+    speed_factors = ((1.0 - curvatures) ** 2).tolist()
+    directions = np.sign(corners).tolist()
+
+    starts = [0]
+    low = high = speed_factors[0]
+    direction = directions[0]
+    for idx in range(1, len(speed_factors)):
+        factor = speed_factors[idx]
+        low, high = min(low, factor), max(high, factor)
+        if high - low > tolerance or (directions[idx] and direction and directions[idx] != direction):
+            starts.append(idx)
+            low = high = factor
+            direction = directions[idx]
+        elif not direction:
+            direction = directions[idx]
+    starts.append(len(speed_factors))
+    return np.array(starts)
+
+
+def _coarse_track(track: Track, starts: np.ndarray) -> Track:
+    lengths = np.add.reduceat(track.sector_lengths, starts[:-1])
+    # the mean curvature of a run is its total turn over its length
+    corners = np.add.reduceat(track.sector_corners, starts[:-1])
+    return Track.from_arrays(lengths, corners, validate=False)
+
+
+def _lap_time_errors(coarse: Track, track: Track, cars: Sequence[Car]) -> List[float]:
+    errors = []
+    for car in cars:
+        times = [
+            solve_speed_profile(
+                level.sector_lengths, car_speed_limits(level, car), car.max_acceleration, car.max_braking,
+                entry_speed=0.0,
+            ).time
+            for level in (coarse, track)
+        ]
+        errors.append(abs(times[0] - times[1]))
+    return errors
+
+
+def simplify_track(
+        track: Track,
+        cars: Sequence[Car],
+        max_speed_error: float = 0.5,
+        max_lap_time_error: Optional[float] = None,
+) -> SimplifiedTrack:
+    """
+    Merges adjacent sectors of similar curvature, so the sector max speed of any of the `cars`
+    differs by `max_speed_error` m/s at most between an original sector and its coarse sector.
+    With `max_lap_time_error` the first lap time of every car is checked with the solver
+    on both levels and the speed tolerance is tightened until the lap time bound holds too
+    """
+    if not cars:
+        raise ValueError('Cars are needed to bound the speed error')
+    if max_speed_error <= 0:
+        raise ValueError(f'Speed error must be positive, got `{max_speed_error}`')
+
+    speed_range = max(car.max_speed for car in cars) - get_config().slowest_curve_speed
+    tolerance = max_speed_error / speed_range if speed_range > 0 else np.inf
+    curvatures, corners = track.sector_curvatures, track.sector_corners
+
+    for _ in range(MAX_REFINEMENTS):
+        starts = _group_starts(curvatures, corners, tolerance)
+        coarse = _coarse_track(track, starts)
+        simplified = SimplifiedTrack(
+            track=coarse, original=track, sector_starts=starts, max_speed_error=tolerance * max(speed_range, 0.0),
+        )
+        if max_lap_time_error is None:
+            return simplified
+
+        simplified.lap_time_errors = _lap_time_errors(coarse, track, cars)
+        if max(simplified.lap_time_errors) <= max_lap_time_error:
+            return simplified
+        tolerance /= 2
+
+    # the original sectors meet any bound
+    starts = np.arange(len(curvatures) + 1)
+    return SimplifiedTrack(
+        track=_coarse_track(track, starts), original=track, sector_starts=starts,
+        max_speed_error=0.0, lap_time_errors=[0.0] * len(cars),
+    )
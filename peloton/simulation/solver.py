@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+from typing import Union
+
+import numpy as np
+
+
+@dataclass
+class SpeedProfile:
+    """
+    Fastest possible ride through a sequence of sectors, every array is indexed by sector
+    (by batch row and sector for a batch of rides):
+    the car accelerates from `entry_speed` up to `peak_speed`, rides at it if the peak is limited by the sector,
+    and brakes from `braking_point` (distance from sector start) down to `exit_speed`
+    """
+    entry_speed: np.ndarray
+    exit_speed: np.ndarray
+    peak_speed: np.ndarray
+    braking_point: np.ndarray
+    sector_time: np.ndarray
+
+    @property
+    def time(self) -> float:
+        return float(self.sector_time.sum())
+
+
+def forward_pass(speed_limit_sq: np.ndarray, gain: np.ndarray) -> np.ndarray:
+    """
+    u[j] = min(limit[j], u[j - 1] + gain[j - 1]) for all j at once, along the last axis
+    """
+    zeros = np.zeros(gain.shape[:-1] + (1,))
+    shift = np.concatenate((zeros, np.cumsum(gain, axis=-1)), axis=-1)
+    return np.minimum.accumulate(speed_limit_sq - shift, axis=-1) + shift
+
+
+def backward_pass(speed_limit_sq: np.ndarray, gain: np.ndarray) -> np.ndarray:
+    """
+    u[j] = min(limit[j], u[j + 1] + gain[j]) for all j at once, along the last axis
+    """
+    zeros = np.zeros(gain.shape[:-1] + (1,))
+    shift = np.concatenate((np.cumsum(gain[..., ::-1], axis=-1)[..., ::-1], zeros), axis=-1)
+    return np.minimum.accumulate((speed_limit_sq - shift)[..., ::-1], axis=-1)[..., ::-1] + shift
+
+
+def solve_speed_profile(
+        lengths: np.ndarray,
+        max_speeds: np.ndarray,
+        max_acceleration: Union[float, np.ndarray],
+        max_braking: Union[float, np.ndarray],
+        entry_speed: float = 0.0,
+        exit_speed: float = None,
+) -> SpeedProfile:
+    """
+    Solves accelerate-then-brake ride analytically, sector by sector, without stepping through frames.
+    Speeds on sector borders are found with a forward (acceleration) and a backward (braking) pass,
+    then every sector is split into acceleration, constant speed and braking parts.
+    A batch of rides is solved at once with `max_speeds` of shape (rides, sectors)
+    and the car parameters of shape (rides, 1) or scalars
+    """
+    lengths = np.asarray(lengths, dtype=float)
+    max_speeds = np.asarray(max_speeds, dtype=float)
+
+    border_limit = np.empty(max_speeds.shape[:-1] + (len(lengths) + 1,))
+    border_limit[..., 0] = entry_speed
+    border_limit[..., 1:-1] = np.minimum(max_speeds[..., :-1], max_speeds[..., 1:])
+    border_limit[..., -1] = (
+        max_speeds[..., -1] if exit_speed is None else np.minimum(max_speeds[..., -1], exit_speed)
+    )
+    border_limit_sq = border_limit**2
+
+    border_speed_sq = forward_pass(border_limit_sq, 2.0 * max_acceleration * lengths)
+    border_speed_sq = backward_pass(border_speed_sq, 2.0 * max_braking * lengths)
+    if np.any(border_speed_sq[..., 0] < entry_speed**2):
+        raise ValueError(f'Entry speed `{entry_speed}` is too high to brake for the sectors ahead')
+
+    return ride_sectors(lengths, max_speeds, border_speed_sq, max_acceleration, max_braking)
+
+
+def ride_sectors(
+        lengths: np.ndarray,
+        max_speeds: np.ndarray,
+        border_speed_sq: np.ndarray,
+        max_acceleration: Union[float, np.ndarray],
+        max_braking: Union[float, np.ndarray],
+) -> SpeedProfile:
+    """
+    Splits every sector into acceleration, constant speed and braking parts,
+    given the squared speeds on its borders found by the passes of `solve_speed_profile`
+    """
+    v0_sq = border_speed_sq[..., :-1]
+    v2_sq = border_speed_sq[..., 1:]
+    # peak of the ride, if acceleration is followed straight by braking:
+    # (v1^2 - v0^2) / 2a + (v1^2 - v2^2) / 2b = length
+    peak_sq = (
+        2.0 * max_acceleration * max_braking * lengths + max_braking * v0_sq + max_acceleration * v2_sq
+    ) / (max_acceleration + max_braking)
+    peak_sq = np.minimum(peak_sq, max_speeds**2)
+
+    acceleration_length = (peak_sq - v0_sq) / (2.0 * max_acceleration)
+    braking_length = (peak_sq - v2_sq) / (2.0 * max_braking)
+    cruise_length = np.maximum(lengths - acceleration_length - braking_length, 0.0)
+
+    v0, v1, v2 = np.sqrt(v0_sq), np.sqrt(peak_sq), np.sqrt(v2_sq)
+    sector_time = (v1 - v0) / max_acceleration + (v1 - v2) / max_braking + cruise_length / v1
+
+    return SpeedProfile(
+        entry_speed=v0,
+        exit_speed=v2,
+        peak_speed=v1,
+        braking_point=lengths - braking_length,
+        sector_time=sector_time,
+    )
@@ -0,0 +1,54 @@
+from typing import Union
+
+import numpy as np
+
+
+class PelotonState:
+    """
+    State of every car of the peloton as arrays indexed by car. The frame engine allocates it once
+    and updates the arrays in place, `snapshot` copies it for the rare look-ahead that needs the whole state
+    """
+    __slots__ = ('speed', 'acceleration', 'distance', 'top_speed', 'laps', 'next_line', 'entry_speed', 'time_offset')
+
+    def __init__(self, cars: int, track_length: Union[float, np.ndarray]):
+        self.speed = np.zeros(cars)
+        self.acceleration = np.zeros(cars)
+        self.distance = np.zeros(cars)
+        self.top_speed = np.zeros(cars)
+        # laps completed by every car and the distance of the next finish line crossing
+        self.laps = np.zeros(cars, dtype=int)
+        self.next_line = np.full(cars, track_length)
+        # the speed every car has crossed the line with last
+        self.entry_speed = np.zeros(cars)
+        # time of the laps every car has skipped instead of stepping them, see `repeat_last_lap`
+        self.time_offset = np.zeros(cars)
+
+    def __len__(self) -> int:
+        return len(self.speed)
+
+    def snapshot(self) -> 'PelotonState':
+        state = PelotonState.__new__(PelotonState)
+        for name in self.__slots__:
+            setattr(state, name, getattr(self, name).copy())
+        return state
+
+    def keep(self, mask: np.ndarray):
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name)[mask])
+
+
+class FrameBuffers:
+    """
+    Scratch arrays of one frame, reused by every frame instead of numpy temporaries
+    """
+    __slots__ = ('accelerated_speed', 'step', 'new_speed', 'braked_speed', 'new_distance', 'racing', 'crossed')
+
+    def __init__(self, cars: int):
+        self.accelerated_speed = np.empty(cars)
+        self.step = np.empty(cars)
+        self.new_speed = np.empty(cars)
+        self.braked_speed = np.empty(cars)
+        self.new_distance = np.empty(cars)
+        self.racing = np.empty(cars, dtype=bool)
+        self.crossed = np.empty(cars, dtype=bool)
+
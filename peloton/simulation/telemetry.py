@@ -0,0 +1,127 @@
+import json
+import sqlite3
+from dataclasses import dataclass
+from typing import Sequence, List, Optional, TextIO, Union
+
+import numpy as np
+
+from peloton.models.simulation import RaceResult
+
+
+@dataclass
+class TelemetryBatch:
+    """
+    Consecutive telemetry samples of the whole peloton, arrays are indexed by (sample, car)
+    """
+    race_time: np.ndarray
+    distance: np.ndarray
+    speed: np.ndarray
+    acceleration: np.ndarray
+    sector: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.race_time)
+
+
+class TelemetrySink:
+    """
+    Receives telemetry batches while the race runs, a batch should be written out
+    and not kept, so a race of any length runs with constant memory
+    """
+    captions: List[str]
+    sample_interval: float
+
+    def open(self, captions: Sequence[str], sample_interval: float):
+        self.captions = list(captions)
+        self.sample_interval = sample_interval
+
+    def write(self, batch: TelemetryBatch):
+        raise NotImplementedError
+
+    def write_result(self, result: RaceResult):
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteSink(TelemetrySink):
+    """
+    Every batch is one transaction with a single `executemany` into `race_log`,
+    one row per (sample, car), the race itself goes into `race`
+    """
+    def __init__(self, database: Union[str, sqlite3.Connection], race_title: str):
+        self.race_title = race_title
+        self._own_connection = not isinstance(database, sqlite3.Connection)
+        self.connection = sqlite3.connect(database) if self._own_connection else database
+        self.race_id: Optional[int] = None
+
+    def open(self, captions: Sequence[str], sample_interval: float):
+        super().open(captions, sample_interval)
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS race (id INTEGER PRIMARY KEY, title TEXT NOT NULL)'
+            )
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS race_log ('
+                'race_id INTEGER NOT NULL REFERENCES race (id), race_time REAL NOT NULL, car TEXT NOT NULL, '
+                'distance_from_start REAL NOT NULL, acceleration REAL NOT NULL, speed REAL NOT NULL, '
+                'sector INTEGER NOT NULL)'
+            )
+            self.race_id = self.connection.execute(
+                'INSERT INTO race (title) VALUES (?)', (self.race_title,)
+            ).lastrowid
+
+    def write(self, batch: TelemetryBatch):
+        samples, cars = batch.distance.shape
+        rows = zip(
+            [self.race_id] * (samples * cars),
+            np.repeat(batch.race_time, cars).tolist(),
+            self.captions * samples,
+            batch.distance.ravel().tolist(),
+            batch.acceleration.ravel().tolist(),
+            batch.speed.ravel().tolist(),
+            batch.sector.ravel().tolist(),
+        )
+        with self.connection:
+            self.connection.executemany('INSERT INTO race_log VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def close(self):
+        if self._own_connection:
+            self.connection.close()
+
+
+class NDJSONSink(TelemetrySink):
+    """
+    One JSON object per sample with per car lists, a batch is written with a single `write`
+    """
+    def __init__(self, output: Union[str, TextIO]):
+        self._own_file = isinstance(output, str)
+        self.output = open(output, 'w') if self._own_file else output
+
+    def open(self, captions: Sequence[str], sample_interval: float):
+        super().open(captions, sample_interval)
+        self.output.write(json.dumps({'cars': self.captions, 'sample_interval': sample_interval}) + '\n')
+
+    def write(self, batch: TelemetryBatch):
+        columns = zip(
+            batch.race_time.tolist(),
+            batch.distance.tolist(),
+            batch.speed.tolist(),
+            batch.acceleration.tolist(),
+            batch.sector.tolist(),
+        )
+        self.output.write(''.join(
+            json.dumps({
+                'race_time': race_time,
+                'distance': distance,
+                'speed': speed,
+                'acceleration': acceleration,
+                'sector': sector,
+            }) + '\n'
+            for race_time, distance, speed, acceleration, sector in columns
+        ))
+
+    def close(self):
+        if self._own_file:
+            self.output.close()
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import tempfile
+from typing import Hashable, Optional
+
+import numpy as np
+
+from peloton.conf.settings import get_config
+from peloton.models.track import Track, CURVATURE_VERSION
+
+TRACK_CACHE_VERSION = 1
+
+
+def track_hash(track: Track) -> str:
+    """
+    Stable across processes hash of the track sectors, the engine context config and the versions of formulas,
+    so any change of them gives another cache entry
+    """
+    digest = hashlib.sha256()
+    digest.update(f'{TRACK_CACHE_VERSION}:{CURVATURE_VERSION}:'.encode())
+    digest.update(get_config().json(sort_keys=True).encode())
+    digest.update(np.ascontiguousarray(track.sector_lengths, dtype='<f8').tobytes())
+    digest.update(np.ascontiguousarray(track.sector_corners, dtype='<f8').tobytes())
+    return digest.hexdigest()
+
+
+def _file_name(key: Hashable) -> Optional[str]:
+    """
+    `sector_curvatures` or `max_speeds_0x1.b8p+5` for `('max_speeds', 55.0)`, floats are written exactly
+    """
+    parts = key if isinstance(key, tuple) else (key,)
+    if not parts or not isinstance(parts[0], str):
+        return None
+    values = []
+    for part in parts[1:]:
+        if not isinstance(part, float) or part < 0:
+            return None
+        values.append(part.hex())
+    return '_'.join((parts[0],) + tuple(values)) + '.npy'
+
+
+def _key(file_name: str) -> Hashable:
+    name, *values = file_name[:-len('.npy')].split('_0x')
+    if not values:
+        return name
+    return (name,) + tuple(float.fromhex('0x' + value) for value in values)
+
+
+class TrackCache:
+    """
+    On-disk cache of arrays derived from a track (curvatures, per car speed tables, braking envelopes),
+    shared by processes and runs. Every entry is a directory named by `track_hash`
+    with one `.npy` file per array, arrays are memory mapped on load.
+    Sector starts are not stored: they are a single cumsum, cheaper than a file read
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _entry(self, track: Track) -> str:
+        return os.path.join(self.directory, track_hash(track))
+
+    def load(self, track: Track) -> int:
+        """
+        Puts all the arrays cached for the track into its derived values, returns the number of arrays loaded
+        """
+        entry = self._entry(track)
+        if not os.path.isdir(entry):
+            return 0
+
+        loaded = 0
+        for file_name in os.listdir(entry):
+            if not file_name.endswith('.npy'):
+                continue
+            track.set_derived(_key(file_name), np.load(os.path.join(entry, file_name), mmap_mode='r'))
+            loaded += 1
+        return loaded
+
+    def store(self, track: Track) -> int:
+        """
+        Writes derived arrays of the track that are not cached yet, returns the number of arrays written.
+        Every file is written to a temporary name and renamed, so concurrent writers never expose a partial file
+        """
+        entry = self._entry(track)
+        os.makedirs(entry, exist_ok=True)
+
+        stored = 0
+        for key, value in track.derived.items():
+            file_name = _file_name(key)
+            if file_name is None or not isinstance(value, np.ndarray):
+                continue
+            path = os.path.join(entry, file_name)
+            if os.path.exists(path):
+                continue
+
+            fd, tmp_path = tempfile.mkstemp(dir=entry, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as tmp_file:
+                    np.save(tmp_file, value)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            stored += 1
+        return stored
@@ -3,7 +3,7 @@ import math
 from pytest import fixture
 
 from peloton.models.bolid import Car
-from peloton.models.track import Sector
+from peloton.models.track import Sector, Track, get_default_track
 
 
 @fixture()
@@ -54,3 +54,24 @@ def low_curve_180():
 @fixture()
 def high_curve_180():
     return Sector(length=5*1.33333*math.pi, corner=180.0)
+
+
+@fixture()
+def straight_track(straight_200):
+    return Track(sectors=[straight_200])
+
+
+@fixture()
+def default_track():
+    return get_default_track()
+
+
+@fixture()
+def hairpin_start_track():
+    # the lap starts with a tight corner, so the finish line rule changes the final lap
+    return Track(sectors=[
+        Sector(length=20.0, corner=150.0),
+        Sector(length=250.0, corner=0.0),
+        Sector(length=40.0, corner=-60.0),
+        Sector(length=180.0, corner=0.0),
+    ])
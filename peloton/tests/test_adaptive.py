@@ -0,0 +1,96 @@
+import math
+
+import numpy as np
+import pytest
+
+from peloton.benchmarks.suite import synthetic_track
+from peloton.models.bolid import Car, Peloton
+from peloton.models.simulation import RaceMode
+from peloton.models.track import Track
+from peloton.simulation.events import ride_phase, event_distances, travel
+from peloton.simulation.race import Race
+
+
+@pytest.fixture()
+def peloton():
+    return Peloton(cars=[
+        Car(caption=f'car {idx}', max_acceleration=3.0 + idx * 0.5, max_braking=9.0 + idx, max_speed=50.0 + idx * 3)
+        for idx in range(4)
+    ])
+
+
+def test_events_accelerate_then_brake():
+    # 0 -> 20 m/s on 20 meters, then 20 -> 10 m/s on 15 meters before the end of a 35 meters sector
+    speed, max_acceleration, max_braking = np.array([0.0]), np.array([10.0]), np.array([10.0])
+    limit_sq, exit_speed_sq, to_sector_end = np.array([50.0 ** 2]), np.array([10.0 ** 2]), np.array([35.0])
+
+    acceleration = ride_phase(speed, limit_sq, exit_speed_sq + 2 * 10.0 * to_sector_end, max_acceleration, max_braking)
+    assert acceleration.tolist() == [10.0]
+    distance = event_distances(
+        speed, acceleration, to_sector_end, limit_sq, exit_speed_sq, max_acceleration, max_braking
+    )
+    assert distance[0] == pytest.approx(20.0)
+    time, speed = travel(speed, acceleration, distance)
+    assert time[0] == pytest.approx(2.0)
+    assert speed[0] == pytest.approx(20.0)
+
+    to_sector_end = to_sector_end - distance
+    acceleration = ride_phase(speed, limit_sq, exit_speed_sq + 2 * 10.0 * to_sector_end, max_acceleration, max_braking)
+    assert acceleration.tolist() == [-10.0]
+    assert event_distances(
+        speed, acceleration, to_sector_end, limit_sq, exit_speed_sq, max_acceleration, max_braking
+    )[0] == pytest.approx(15.0)
+
+
+def test_adaptive_matches_solver_and_frames(peloton: Peloton, default_track: Track):
+    adaptive = Race(default_track, peloton, laps=3, mode=RaceMode.ADAPTIVE).run()
+    solver = Race(default_track, peloton, laps=3, mode=RaceMode.SOLVER).run()
+    frames = Race(default_track, peloton, laps=3, mode=RaceMode.FRAMES).run()
+
+    for adaptive_car, solver_car, frames_car in zip(adaptive.cars, solver.cars, frames.cars):
+        assert adaptive_car.lap_times == pytest.approx(solver_car.lap_times, abs=1e-6)
+        assert adaptive_car.lap_times == pytest.approx(frames_car.lap_times, abs=0.01)
+        assert adaptive_car.top_speed == pytest.approx(frames_car.top_speed)
+    assert adaptive.frames * 50 < frames.frames
+
+
+def test_adaptive_telemetry(peloton: Peloton, default_track: Track):
+    frames_race = Race(default_track, peloton, laps=2)
+    frames_batches = list(frames_race.stream(sample_every=10, batch_size=64))
+    race = Race(default_track, peloton, laps=2, mode=RaceMode.ADAPTIVE)
+    batches = list(race.stream(sample_every=10, batch_size=64))
+
+    assert [len(batch) for batch in batches] == [len(batch) for batch in frames_batches]
+    assert sum(len(batch) for batch in batches) == math.ceil(race.result.race_time / 0.1)
+    race_time = np.concatenate([batch.race_time for batch in batches])
+    assert np.allclose(race_time, np.concatenate([batch.race_time for batch in frames_batches]))
+
+    distance = np.concatenate([batch.distance for batch in batches])
+    assert (np.diff(distance, axis=0) >= 0).all()
+    frames_distance = np.concatenate([batch.distance for batch in frames_batches])
+    assert np.abs(distance - frames_distance).max() < 1.0
+    speed = np.concatenate([batch.speed for batch in batches])
+    assert np.abs(speed - np.concatenate([batch.speed for batch in frames_batches])).max() < 0.2
+
+
+def test_adaptive_telemetry_memory(monkeypatch):
+    track = synthetic_track(400)
+    peloton = Peloton(cars=[
+        Car(caption='fast', max_acceleration=5.0, max_braking=12.0, max_speed=60.0),
+        Car(caption='slow', max_acceleration=3.0, max_braking=9.0, max_speed=45.0),
+    ])
+    pending_sizes = []
+    take_batch = Race._take_batch
+
+    def counting_take_batch(batch, samples):
+        pending_sizes.append(len(batch))
+        return take_batch(batch, samples)
+
+    monkeypatch.setattr(Race, '_take_batch', staticmethod(counting_take_batch))
+    race = Race(track, peloton, laps=20, mode=RaceMode.ADAPTIVE)
+    samples = sum(len(batch) for batch in race.stream(sample_every=10, batch_size=64))
+
+    # the fast car is laps ahead at the end, its samples still wait in a single batch
+    assert race.result.cars[1].finish_time - race.result.cars[0].finish_time > 100.0
+    assert samples == math.ceil(race.result.race_time / 0.1)
+    assert set(pending_sizes) == {65}
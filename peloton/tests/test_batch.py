@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from peloton.models.bolid import Car, Peloton
+from peloton.models.simulation import Interaction, RaceMode
+from peloton.models.track import Track
+from peloton.simulation.batch import RaceBatch
+from peloton.simulation.frames import concatenate, sector_rows
+from peloton.simulation.race import Race
+
+
+def races(default_track: Track, straight_track: Track):
+    wiggly_track = Track.from_arrays(np.full(8, 60.0), np.array([0.0, 90.0, 0.0, -45.0, 0.0, 120.0, 0.0, 30.0]))
+    slow_car = Car(caption='slow', max_acceleration=3.0, max_braking=9.0, max_speed=50.0)
+    fast_car = Car(caption='fast', max_acceleration=5.0, max_braking=12.0, max_speed=60.0)
+    return [
+        Race(default_track, Peloton(cars=[slow_car, fast_car]), laps=4),
+        Race(straight_track, Peloton(cars=[fast_car]), laps=2),
+        Race(wiggly_track, Peloton(cars=[fast_car, slow_car, slow_car]), laps=3, steady_laps=False),
+        Race(default_track, Peloton(cars=[fast_car]), laps=1),
+    ]
+
+
+def test_race_batch(default_track: Track, straight_track: Track):
+    expected = [race.run() for race in races(default_track, straight_track)]
+    batch_races = races(default_track, straight_track)
+    results = RaceBatch(batch_races).run()
+
+    assert results == expected
+    assert [race.result for race in batch_races] == results
+
+
+def test_race_batch_validation(default_track: Track, car_all_100: Car):
+    peloton = Peloton(cars=[car_all_100])
+    with pytest.raises(ValueError):
+        RaceBatch([])
+    with pytest.raises(ValueError):
+        RaceBatch([Race(default_track, peloton, mode=RaceMode.SOLVER)])
+    with pytest.raises(ValueError):
+        RaceBatch([Race(default_track, peloton, interaction=Interaction())])
+    with pytest.raises(ValueError):
+        RaceBatch([Race(default_track, peloton), Race(default_track, peloton, frame_duration=0.02)])
+
+
+def test_frame_tables_concatenate(default_track: Track, straight_track: Track):
+    batch_races = races(default_track, straight_track)
+    tables, cars = concatenate([race.frame_tables() for race in batch_races])
+    lap_distance = np.random.default_rng(3).uniform(0.0, 1.0, len(cars)) * cars.track_length
+
+    _, row = sector_rows(tables, cars, lap_distance)
+    for idx, race in enumerate(batch_races):
+        race_tables, race_cars = race.frame_tables()
+        _, race_row = sector_rows(race_tables, race_cars, lap_distance[cars.race == idx])
+        assert tables.limits[row[cars.race == idx]].tolist() == race_tables.limits[race_row].tolist()
+        assert (cars.car[cars.race == idx] - race_cars.car).tolist() == [cars.car[cars.race == idx][0]] * len(race_cars)
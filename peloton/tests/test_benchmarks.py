@@ -0,0 +1,61 @@
+import numpy as np
+
+from peloton.benchmarks.legacy import LegacyTrack, LegacyCarState, run_legacy_race
+from peloton.benchmarks.suite import (
+    synthetic_track, synthetic_peloton, run_benchmarks, make_report, compare, SYNTHETIC_TRACK_LENGTH,
+)
+from peloton.models.bolid import Car
+from peloton.models.track import Track
+
+
+def test_synthetic_track():
+    track = synthetic_track(1000)
+
+    track.sectors.validate()
+    assert len(track.sectors) == 1000
+    assert abs(track.length - SYNTHETIC_TRACK_LENGTH) < 1e-6
+    assert 0.0 < track.sector_curvatures.max() < 1.0
+    assert np.array_equal(synthetic_track(1000).sector_corners, track.sector_corners)
+
+
+def test_synthetic_peloton():
+    peloton = synthetic_peloton(3)
+    assert [car.caption for car in peloton.cars] == ['car 0', 'car 1', 'car 2']
+    assert all(50.0 <= car.max_speed <= 60.0 for car in peloton.cars)
+    assert synthetic_peloton(3) == peloton
+
+
+def test_legacy_sector_lookup(car_all_100: Car, default_track: Track):
+    legacy_track = LegacyTrack(default_track, car_all_100)
+
+    for distance in np.linspace(0.0, 2 * default_track.length, 101).tolist():
+        position = legacy_track.get_sector_position(distance)
+        assert position.sector.sector_order == default_track.get_sector_index(distance)
+        assert abs(position.distance_from_sector_start - default_track.get_sector_position(distance)[1]) < 1e-9
+
+
+def test_legacy_race(car_all_100: Car, default_track: Track):
+    legacy_track = LegacyTrack(default_track, car_all_100)
+    frames = run_legacy_race(legacy_track, car_all_100)
+
+    assert frames > 0
+    assert LegacyCarState(car=car_all_100, track=legacy_track, speed=100.0).next_slower_sector is not None
+
+
+def test_run_benchmarks_compare():
+    results = run_benchmarks(
+        sectors=[10], cars=[1, 2], repeat=1, min_time=0.0, names=['sector_lookup', 'braking_decision'],
+    )
+    assert {(result.name, result.engine) for result in results} == {
+        ('sector_lookup', 'engine'), ('sector_lookup', 'legacy'),
+        ('braking_decision', 'engine'), ('braking_decision', 'legacy'),
+    }
+    assert all(result.best > 0 for result in results)
+
+    baseline = make_report(results)
+    assert compare(baseline, baseline) == []
+
+    slower = baseline.copy(update={'results': [result.copy(update={'best': result.best * 2}) for result in results]})
+    regressions = compare(baseline, slower, threshold=1.5)
+    assert len(regressions) == len(results)
+    assert abs(regressions[0].ratio - 2.0) < 1e-9
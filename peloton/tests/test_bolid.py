@@ -0,0 +1,36 @@
+import pytest
+from pydantic import ValidationError
+
+from peloton.models.bolid import Car, Peloton
+
+
+def test_peloton_from_records(car_all_100: Car):
+    records = [car_all_100.dict(), dict(car_all_100.dict(), caption='second', max_speed=50.0)]
+    peloton = Peloton.from_records(records)
+
+    assert peloton == Peloton(cars=records)
+    assert peloton.cars[1].max_speed == 50.0
+
+
+def test_peloton_from_records_coerced(car_all_100: Car):
+    records = [
+        dict(car_all_100.dict(), caption=caption) for caption in ('car', 5, 5.5, b'bytes', bytearray(b'array'))
+    ]
+    peloton = Peloton.from_records(records)
+
+    assert peloton == Peloton.parse_obj({'cars': records})
+    assert [car.caption for car in peloton.cars] == ['car', '5', '5.5', 'bytes', 'array']
+
+
+def test_peloton_from_records_errors():
+    records = [
+        dict(caption='car', max_acceleration=1.0, max_braking=0.0, max_speed=1),
+        dict(caption=None, max_acceleration=-1.0, max_speed=float('nan')),
+        dict(caption=[], max_acceleration='1.0', max_braking=None, max_speed=10.0),
+    ]
+    with pytest.raises(ValidationError) as exc_info:
+        Peloton(cars=records)
+    with pytest.raises(ValidationError) as records_exc_info:
+        Peloton.from_records(records)
+
+    assert records_exc_info.value.errors() == exc_info.value.errors()
@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+import pytest
+
+from peloton.simulation.envelope import BrakingEnvelope
+
+
+@pytest.fixture()
+def envelope():
+    # straight 100m -> slow 20m -> straight 50m, a single car braking at 10 m/s^2
+    return BrakingEnvelope(
+        sector_starts=[0.0, 100.0, 120.0],
+        sector_lengths=[100.0, 20.0, 50.0],
+        max_speeds=[[50.0, 10.0, 50.0]],
+        max_braking=[10.0],
+    )
+
+
+def test_allowed_speed(envelope: BrakingEnvelope):
+    assert envelope.allowed_speed([100.0])[0] == pytest.approx(10.0)
+    assert envelope.allowed_speed([110.0])[0] == pytest.approx(10.0)
+    assert envelope.allowed_speed([90.0])[0] == pytest.approx(math.sqrt(10.0**2 + 2 * 10.0 * 10.0))
+    assert envelope.allowed_speed([0.0])[0] == pytest.approx(math.sqrt(10.0**2 + 2 * 10.0 * 100.0))
+    assert envelope.allowed_speed([130.0])[0] == pytest.approx(50.0)
+
+
+def test_allowed_speed_wraps_lap(envelope: BrakingEnvelope):
+    # braking for the slow sector starts on the previous lap: 170m lap, 100m + 50m ahead of 160m
+    assert envelope.allowed_speed([160.0])[0] == pytest.approx(math.sqrt(10.0**2 + 2 * 10.0 * 110.0))
+
+
+def test_final_lap_envelope(envelope: BrakingEnvelope):
+    # no braking for the slow sector after the finish line
+    assert envelope.final_next_start_speed_sq[0].tolist() == pytest.approx([10.0**2, 50.0**2, np.inf])
+    assert envelope.next_start_speed_sq[0, -1] == pytest.approx(10.0**2 + 2 * 10.0 * 100.0)
+
+
+def test_must_brake(envelope: BrakingEnvelope):
+    assert list(envelope.must_brake(np.array([95.0, 95.0]), np.array([15.0, 10.0]), cars=np.array([0, 0]))) == [
+        True, False
+    ]
+
+
+def test_allowed_speed_brute_force():
+    rng = np.random.default_rng(7)
+    lengths = rng.uniform(5.0, 100.0, 50)
+    starts = np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+    max_speeds = rng.uniform(10.0, 60.0, 50)
+    envelope = BrakingEnvelope(starts, lengths, [max_speeds], [8.0])
+
+    track_length = lengths.sum()
+    for lap_distance in rng.uniform(0.0, track_length, 20):
+        sector = np.searchsorted(starts, lap_distance, side='right') - 1
+        ahead = starts - lap_distance
+        ahead[ahead <= 0] += track_length
+        expected = min(max_speeds[sector], np.sqrt(max_speeds**2 + 2 * 8.0 * ahead).min())
+        assert envelope.allowed_speed([lap_distance])[0] == pytest.approx(expected)
@@ -0,0 +1,88 @@
+import io
+import math
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from peloton.importers.centerline import import_centerline, read_csv_points, read_gpx_points, EARTH_RADIUS
+
+
+def circle(radius: float, points: int) -> np.ndarray:
+    angles = np.linspace(0.0, 2 * np.pi, points, endpoint=False)
+    return np.column_stack((radius * np.cos(angles), radius * np.sin(angles)))
+
+
+def stadium() -> np.ndarray:
+    """
+    Two 200 meters straights joined by half circles of 50 meters radius, counterclockwise, a point every meter
+    """
+    arc = np.linspace(-np.pi / 2, np.pi / 2, 158, endpoint=False)
+    return np.concatenate((
+        np.column_stack((np.arange(0.0, 200.0), np.zeros(200))),
+        np.column_stack((200.0 + 50.0 * np.cos(arc), 50.0 + 50.0 * np.sin(arc))),
+        np.column_stack((np.arange(200.0, 0.0, -1.0), np.full(200, 100.0))),
+        np.column_stack((50.0 * np.cos(arc + np.pi), 50.0 + 50.0 * np.sin(arc + np.pi))),
+    ))
+
+
+def test_import_circle():
+    track = import_centerline([circle(50.0, 1000)])
+
+    assert len(track.sectors) == 1000
+    assert track.length == pytest.approx(2 * math.pi * 50.0, rel=1e-5)
+    # a full turn to the left, 5 meters radius is the curvature of 1.0
+    assert track.sector_corners.sum() == pytest.approx(-360.0)
+    assert np.allclose(track.sector_curvatures, 5.0 / 50.0, rtol=1e-4)
+
+
+def test_import_merges_straights():
+    points = stadium()
+    track = import_centerline([points])
+
+    # the points of every straight are joined into one sector, the curves keep a sector per point
+    straights = track.sector_lengths[track.sector_curvatures == 0.0]
+    assert straights.tolist() == pytest.approx([199.0, 199.0], abs=1.0)
+    assert len(track.sectors) < 2 * 158 + 10
+    assert track.length == pytest.approx(400.0 + 2 * math.pi * 50.0, rel=1e-3)
+
+    for chunk_size in (1, 7, 100):
+        chunks = [points[start:start + chunk_size] for start in range(0, len(points), chunk_size)]
+        chunked = import_centerline(chunks)
+        assert np.allclose(chunked.sector_lengths, track.sector_lengths)
+        assert np.allclose(chunked.sector_corners, track.sector_corners)
+
+
+def test_import_open_centerline():
+    track = import_centerline([[(0.0, 0.0), (100.0, 0.0), (200.0, 0.0)], [(300.0, 0.0)]], closed=False)
+
+    assert track.sector_lengths.tolist() == [300.0]
+    assert track.sector_corners.tolist() == [0.0]
+
+
+def test_import_impossible_corner():
+    with pytest.raises(ValidationError, match='corner is too big, impossible to drive'):
+        import_centerline([circle(2.0, 100)])
+
+
+def test_read_csv_points():
+    source = io.StringIO('x,y\n' + ''.join(f'{idx},{idx * 2}\n' for idx in range(10)))
+    chunks = list(read_csv_points(source, chunk_size=4))
+
+    assert [len(chunk) for chunk in chunks] == [3, 4, 3]
+    assert np.concatenate(chunks)[-1].tolist() == [9.0, 18.0]
+
+
+def test_read_gpx_points():
+    points = ''.join(
+        f'<trkpt lat="{50.0 + idx * 1e-4}" lon="{14.0}"><ele>200</ele></trkpt>' for idx in range(5)
+    )
+    source = io.StringIO(
+        '<?xml version="1.0"?><gpx xmlns="http://www.topografix.com/GPX/1/1" version="1.1">'
+        f'<trk><trkseg>{points}</trkseg></trk></gpx>'
+    )
+    chunks = list(read_gpx_points(source, chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    y = np.concatenate(chunks)[:, 1]
+    assert np.allclose(np.diff(y), EARTH_RADIUS * math.radians(1e-4))
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from peloton.models.bolid import Car, Peloton
+from peloton.models.simulation import Interaction, RaceMode
+from peloton.models.track import Track
+from peloton.simulation.interaction import TrackOrder
+from peloton.simulation.race import Race
+
+
+@pytest.fixture()
+def corners_track() -> Track:
+    # no straights, nobody overtakes
+    return Track.from_arrays(np.full(4, 100.0), np.full(4, 90.0))
+
+
+def test_track_order():
+    track_order = TrackOrder(4)
+    track_order.update(np.array([10.0, 90.0, 50.0, 50.0]), np.ones(4, dtype=bool), 100.0)
+
+    # car 2 is the first of the cars at the same position
+    assert track_order.order.tolist() == [0, 3, 2, 1]
+    assert track_order.ahead.tolist() == [3, 0, 1, 2]
+    assert track_order.gap.tolist() == pytest.approx([40.0, 20.0, 40.0, 0.0])
+
+    # car 0 passes car 3, car 1 has finished
+    active = np.array([True, False, True, True])
+    track_order.update(np.array([60.0, 95.0, 55.0, 52.0]), active, 100.0)
+    assert track_order.order.tolist() == [3, 2, 0, 1]
+    assert track_order.ahead.tolist() == [3, -1, 0, 2]
+    assert track_order.gap.tolist() == pytest.approx([92.0, np.inf, 5.0, 3.0])
+
+
+def test_interaction_single_car(default_track: Track):
+    peloton = Peloton(cars=[Car(caption='solo', max_acceleration=3.5, max_braking=9.8, max_speed=55.0)])
+    result = Race(default_track, peloton, laps=2).run()
+    interaction_result = Race(default_track, peloton, laps=2, interaction=Interaction()).run()
+
+    assert interaction_result.cars == result.cars
+
+
+def test_interaction_blocking(corners_track: Track):
+    slow_car = Car(caption='slow', max_acceleration=3.0, max_braking=9.8, max_speed=40.0)
+    fast_car = Car(caption='fast', max_acceleration=5.0, max_braking=12.0, max_speed=60.0)
+    peloton = Peloton(cars=[slow_car, fast_car])
+
+    result = Race(corners_track, peloton, laps=2).run()
+    assert [car_result.caption for car_result in result.standings] == ['fast', 'slow']
+
+    result = Race(corners_track, peloton, laps=2, interaction=Interaction()).run()
+    slow_result, fast_result = result.cars
+    # the slow car starts in front and is never passed
+    assert fast_result.finish_time > slow_result.finish_time
+    assert fast_result.finish_time - slow_result.finish_time < Interaction().following_distance / slow_car.max_speed
+
+
+def test_interaction_slipstream(default_track: Track):
+    cars = [Car(caption=f'car {idx}', max_acceleration=3.5, max_braking=9.8, max_speed=55.0) for idx in range(3)]
+    interaction = Interaction(slipstream_bonus=0.05)
+    result = Race(default_track, Peloton(cars=cars), laps=2, interaction=interaction).run()
+
+    top_speeds = [car_result.top_speed for car_result in result.cars]
+    assert max(top_speeds) > 55.0
+    assert max(top_speeds) <= 55.0 * 1.05 + 1e-9
+
+
+def test_interaction_frames_mode_only(default_track: Track):
+    peloton = Peloton(cars=[Car(caption='solo', max_acceleration=3.5, max_braking=9.8, max_speed=55.0)])
+    with pytest.raises(ValueError):
+        Race(default_track, peloton, mode=RaceMode.SOLVER, interaction=Interaction())
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from peloton.benchmarks.suite import synthetic_track
+from peloton.models.bolid import Car, Peloton
+from peloton.models.simulation import RaceMode
+from peloton.models.track import Track, Sector
+from peloton.simulation.envelope import car_speed_limits
+from peloton.simulation.lap_profile import LapProfile
+from peloton.simulation.race import Race
+from peloton.simulation.solver import solve_speed_profile
+
+
+@pytest.fixture()
+def car() -> Car:
+    return Car(caption='car', max_acceleration=3.5, max_braking=9.8, max_speed=55.0)
+
+
+def assert_solved(lap_profile: LapProfile, track: Track, car: Car):
+    profile = solve_speed_profile(
+        track.sector_lengths, car_speed_limits(track, car), car.max_acceleration, car.max_braking
+    )
+    assert lap_profile.time == pytest.approx(profile.time, abs=1e-9)
+    for name in ('entry_speed', 'exit_speed', 'peak_speed', 'braking_point', 'sector_time'):
+        assert getattr(lap_profile.profile, name) == pytest.approx(getattr(profile, name), abs=1e-9)
+
+
+def test_lap_profile(default_track: Track, car: Car):
+    lap_profile = LapProfile(default_track, car)
+    race_result = Race(default_track.copy(), Peloton(cars=[car]), mode=RaceMode.SOLVER).run()
+    assert lap_profile.time == pytest.approx(race_result.cars[0].finish_time)
+
+    lap_profile.edit_sector(9, corner=60.0)
+    lap_profile.edit_sector(0, length=120.0)
+    lap_profile.edit_sector(len(default_track.sectors) - 1, length=30.0, corner=10.0)
+    assert_solved(lap_profile, default_track, car)
+
+
+def test_lap_profile_local_edits(car: Car):
+    track = synthetic_track(5000, seed=2)
+    lap_profile = LapProfile(track, car)
+    rng = np.random.default_rng(4)
+
+    windows = []
+    for sector_index in rng.integers(len(track.sectors), size=50).tolist():
+        sector = track.sectors[sector_index]
+        track.edit_sector(
+            sector_index, length=sector.length * rng.uniform(0.8, 1.2), corner=sector.corner * rng.uniform(0.5, 1.0)
+        )
+        window = lap_profile.sector_edited(sector_index)
+        assert sector_index in window
+        windows.append(len(window))
+
+    assert_solved(lap_profile, track, car)
+    assert np.mean(windows) < len(track.sectors) / 10
+
+
+@pytest.mark.parametrize('columns', [False, True])
+def test_lap_profile_edit_curvatures(monkeypatch, default_track: Track, car: Car, columns: bool):
+    track = Track.from_arrays(default_track.sector_lengths, default_track.sector_corners) if columns else default_track
+    lap_profile = LapProfile(track, car)
+    other_curvatures = np.delete(track.sector_curvatures, 9)
+
+    # curvatures of single sectors read and of whole arrays calculated from now on
+    calculated = []
+    curvature = Sector.curvature
+    calculate_curvatures = Sector.calculate_curvatures
+    monkeypatch.setattr(Sector, 'curvature', property(lambda sector: calculated.append(1) or curvature.fget(sector)))
+    monkeypatch.setattr(Sector, 'calculate_curvatures', staticmethod(
+        lambda lengths, corners: calculated.append(len(lengths)) or calculate_curvatures(lengths, corners)
+    ))
+
+    lap_profile.edit_sector(9, corner=60.0)
+    curvatures = track.sector_curvatures
+    assert sum(calculated) <= 2
+    assert curvatures[9] == Sector.calculate_curvature(70.0, 60.0)
+    assert np.array_equal(np.delete(curvatures, 9), other_curvatures)
+    assert_solved(lap_profile, track, car)
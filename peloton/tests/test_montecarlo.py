@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from peloton.models.bolid import Car, Peloton
+from peloton.models.simulation import RaceMode, RaceNoise
+from peloton.models.track import Track
+from peloton.simulation.montecarlo import StreamingHistogram, run_monte_carlo
+from peloton.simulation.race import Race
+
+
+@pytest.fixture()
+def peloton() -> Peloton:
+    return Peloton(cars=[
+        Car(caption='fast', max_acceleration=3.5, max_braking=9.8, max_speed=55.0),
+        Car(caption='close', max_acceleration=3.5, max_braking=9.8, max_speed=54.8),
+        Car(caption='slow', max_acceleration=3.0, max_braking=9.0, max_speed=50.0),
+    ])
+
+
+def test_streaming_histogram():
+    values = np.random.default_rng(7).normal(10.0, 2.0, 20000)
+    histogram = StreamingHistogram(bins=128)
+    for part in np.array_split(values, 40):
+        histogram.add(part)
+
+    assert histogram.count == len(values)
+    assert histogram.counts.sum() == len(values)
+    assert histogram.mean == pytest.approx(values.mean())
+    assert histogram.std == pytest.approx(values.std())
+    assert (histogram.min, histogram.max) == (values.min(), values.max())
+    width = (histogram.high - histogram.low) / len(histogram.counts)
+    for q in (0.05, 0.5, 0.95):
+        assert histogram.quantile(q) == pytest.approx(np.quantile(values, q), abs=width)
+
+
+def test_monte_carlo_without_noise(default_track: Track, peloton: Peloton):
+    solver_result = Race(default_track, peloton, laps=2, mode=RaceMode.SOLVER).run()
+    result = run_monte_carlo(
+        default_track, peloton, laps=2, replicas=3, noise=RaceNoise(grip=0.0, driver_error=0.0)
+    )
+
+    for car_result, car_distribution in zip(solver_result.cars, result.cars):
+        assert car_distribution.finish_time.mean == pytest.approx(car_result.finish_time)
+        assert car_distribution.finish_time.std == pytest.approx(0.0, abs=1e-9)
+        assert car_distribution.best_lap_time.min == pytest.approx(car_result.best_lap_time)
+    assert [car_distribution.win_probability for car_distribution in result.cars] == [1.0, 0.0, 0.0]
+
+
+def test_monte_carlo(default_track: Track, peloton: Peloton):
+    result = run_monte_carlo(default_track, peloton, laps=2, replicas=2000, seed=3)
+    solver_result = Race(default_track, peloton, laps=2, mode=RaceMode.SOLVER).run()
+
+    win_probability = [car_distribution.win_probability for car_distribution in result.cars]
+    assert sum(win_probability) == pytest.approx(1.0)
+    assert 0.5 < win_probability[0] < 1.0
+    assert win_probability[1] > 0.0
+    for car_result, car_distribution in zip(solver_result.cars, result.cars):
+        finish_time = car_distribution.finish_time
+        assert finish_time.count == 2000
+        assert sum(finish_time.histogram_counts) == 2000
+        # driver errors only slow cars down, grip goes both ways
+        assert finish_time.quantiles[0.5] > car_result.finish_time
+        assert finish_time.min <= finish_time.quantiles[0.05] <= finish_time.quantiles[0.95] <= finish_time.max
+
+    assert run_monte_carlo(default_track, peloton, laps=2, replicas=2000, seed=3) == result
+    assert run_monte_carlo(default_track, peloton, laps=2, replicas=2000, seed=4) != result
+
+
+def test_monte_carlo_driver_errors(default_track: Track, peloton: Peloton):
+    noise = RaceNoise(grip=0.0, driver_error=[0.0, 0.05, 0.0])
+    result = run_monte_carlo(default_track, peloton, replicas=100, noise=noise)
+
+    assert result.cars[0].finish_time.std == pytest.approx(0.0, abs=1e-9)
+    assert result.cars[1].finish_time.std > 0.0
+    with pytest.raises(ValueError):
+        run_monte_carlo(default_track, peloton, noise=RaceNoise(driver_error=[0.01, 0.01]))
@@ -0,0 +1,81 @@
+import io
+import math
+import tracemalloc
+
+import pytest
+
+from peloton.models.bolid import Car, Peloton
+from peloton.models.simulation import RaceMode, Interaction
+from peloton.models.track import Track
+from peloton.simulation.profiling import RaceProfiler
+from peloton.simulation.race import Race
+from peloton.simulation.telemetry import NDJSONSink
+
+
+def test_profiler_counters(car_all_100: Car, default_track: Track):
+    slow_car = Car(caption='slow', max_acceleration=3.0, max_braking=8.0, max_speed=40.0)
+    race = Race(default_track, Peloton(cars=[car_all_100, slow_car]), laps=2)
+    profiler = RaceProfiler()
+    result = race.run(NDJSONSink(io.StringIO()), sample_every=10, batch_size=100, profiler=profiler)
+
+    profile = profiler.profile
+    samples = math.ceil(result.frames / 10)
+    assert profile.frames == result.frames
+    assert profile.samples == samples
+    assert profile.batches == math.ceil(samples / 100)
+    assert profile.lookups == 2 * (2 * result.frames + samples)
+    # the faster car has finished and does not decide anything anymore
+    assert result.frames < profile.decisions < 2 * result.frames
+    assert profile.total_time >= sum(profile.phase_times.values()) > 0
+    assert profile.phase_times['decision'] > 0
+    assert 'frames: ' in profile.format()
+
+    with pytest.raises(RuntimeError):
+        profiler.stats()
+
+
+def test_profiler_lookups_counted(default_track: Track):
+    peloton = Peloton(cars=[
+        Car(caption=f'car {idx}', max_acceleration=3.5, max_braking=9.8, max_speed=55.0 - idx) for idx in range(3)
+    ])
+    profiler = RaceProfiler()
+    result = Race(default_track, peloton, interaction=Interaction()).run(profiler=profiler)
+    # the sector of every car and of its look-ahead every frame, telemetry is off
+    assert profiler.lookups == 2 * 3 * result.frames
+
+    profiler = RaceProfiler()
+    Race(default_track, peloton, mode=RaceMode.ADAPTIVE).run(profiler=profiler)
+    assert profiler.lookups == 0
+
+
+def test_profiler_allocations(car_all_100: Car, default_track: Track):
+    race = Race(default_track, Peloton(cars=[car_all_100]), laps=2)
+    profiler = RaceProfiler()
+    race.run(profiler=profiler)
+    assert profiler.profile.allocated == {}
+    assert 'allocated' not in profiler.profile.format()
+
+    profiler = RaceProfiler(trace_allocations=True)
+    race.run(NDJSONSink(io.StringIO()), profiler=profiler)
+    profile = profiler.profile
+    assert profile.allocated['decision'] > 0
+    assert profile.allocated['telemetry'] > 0
+    assert profile.allocated['solver'] == 0
+    assert 'MiB allocated' in profile.format()
+    assert not tracemalloc.is_tracing()
+
+
+def test_profiler_does_not_change_result(default_track: Track):
+    peloton = Peloton(cars=[Car(caption='car', max_acceleration=3.5, max_braking=9.8, max_speed=55.0)])
+    assert Race(default_track, peloton).run(profiler=RaceProfiler()) == Race(default_track, peloton).run()
+
+
+def test_profiler_cprofile(car_all_100: Car, default_track: Track, tmp_path):
+    profiler = RaceProfiler(cprofile=True)
+    Race(default_track, Peloton(cars=[car_all_100]), mode=RaceMode.SOLVER).run(profiler=profiler)
+
+    assert profiler.frames == 0
+    assert profiler.phase_times['solver'] > 0
+    assert any(function[2] == 'solve_speed_profile' for function in profiler.stats().stats)
+    profiler.dump_stats(str(tmp_path / 'race.pstats'))
+    assert (tmp_path / 'race.pstats').stat().st_size > 0
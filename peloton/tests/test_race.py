@@ -0,0 +1,161 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from peloton.conf.settings import sim_config
+from peloton.models.bolid import Car, Peloton
+from peloton.models.simulation import RaceMode
+from peloton.models.track import Sector, Track
+from peloton.simulation.batch import RaceBatch
+from peloton.simulation.race import Race
+from peloton.simulation.state import PelotonState
+
+
+def test_race_straight_track(car_all_100: Car, straight_track: Track):
+    result = Race(straight_track, Peloton(cars=[car_all_100]), laps=2).run()
+
+    car_result = result.cars[0]
+    # 1 second to reach top speed on the first 50 meters, then 150 meters at top speed
+    assert car_result.lap_times[0] == pytest.approx(2.5, abs=0.01)
+    # the second lap is ridden at top speed
+    assert car_result.lap_times[1] == pytest.approx(2.0, abs=0.01)
+    assert car_result.finish_time == pytest.approx(4.5, abs=0.01)
+    assert car_result.top_speed == pytest.approx(100.0)
+
+
+def test_race_equal_cars(default_track: Track):
+    cars = [
+        Car(caption=f'car {idx}', max_acceleration=3.5, max_braking=9.8, max_speed=55.0)
+        for idx in range(3)
+    ]
+    result = Race(default_track, Peloton(cars=cars), laps=2).run()
+
+    finish_times = {car_result.finish_time for car_result in result.cars}
+    assert len(finish_times) == 1
+    assert result.race_time == finish_times.pop()
+
+
+def test_race_faster_car_wins(default_track: Track):
+    slow_car = Car(caption='slow', max_acceleration=3.5, max_braking=9.8, max_speed=55.0)
+    fast_car = Car(caption='fast', max_acceleration=5.0, max_braking=12.0, max_speed=60.0)
+    result = Race(default_track, Peloton(cars=[slow_car, fast_car]), laps=2).run()
+
+    assert [car_result.caption for car_result in result.standings] == ['fast', 'slow']
+    for car_result in result.cars:
+        assert car_result.lap_times[1] < car_result.lap_times[0]
+
+
+def test_race_validation(car_all_100: Car, straight_track: Track):
+    with pytest.raises(ValueError):
+        Race(Track(sectors=[]), Peloton(cars=[car_all_100]))
+    with pytest.raises(ValueError):
+        Race(straight_track, Peloton(cars=[]))
+    with pytest.raises(ValueError):
+        Race(straight_track, Peloton(cars=[car_all_100]), laps=0)
+
+
+def test_solver_straight_track(car_all_100: Car, straight_track: Track):
+    result = Race(straight_track, Peloton(cars=[car_all_100]), laps=2, mode=RaceMode.SOLVER).run()
+
+    assert result.cars[0].lap_times == pytest.approx([2.5, 2.0])
+    assert result.frames == 0
+
+
+def test_solver_matches_frames(default_track: Track):
+    cars = [
+        Car(caption='slow', max_acceleration=3.5, max_braking=9.8, max_speed=55.0),
+        Car(caption='fast', max_acceleration=5.0, max_braking=12.0, max_speed=60.0),
+    ]
+    frames_result = Race(default_track, Peloton(cars=cars), laps=2, mode=RaceMode.FRAMES).run()
+    solver_result = Race(default_track, Peloton(cars=cars), laps=2, mode=RaceMode.SOLVER).run()
+
+    for frames_car, solver_car in zip(frames_result.cars, solver_result.cars):
+        assert solver_car.lap_times == pytest.approx(frames_car.lap_times, abs=0.05)
+        assert solver_car.top_speed == pytest.approx(frames_car.top_speed, abs=0.05)
+
+
+def test_finish_line_same_in_all_modes(hairpin_start_track: Track):
+    cars = [
+        Car(caption='slow', max_acceleration=3.0, max_braking=9.0, max_speed=50.0),
+        Car(caption='fast', max_acceleration=5.0, max_braking=12.0, max_speed=60.0),
+    ]
+    peloton = Peloton(cars=cars)
+    solver_result = Race(hairpin_start_track, peloton, laps=5, mode=RaceMode.SOLVER).run()
+    adaptive_result = Race(hairpin_start_track, peloton, laps=5, mode=RaceMode.ADAPTIVE).run()
+    frames_results = [
+        Race(hairpin_start_track, peloton, laps=5, steady_laps=steady_laps).run() for steady_laps in (False, True)
+    ]
+
+    for idx, solver_car in enumerate(solver_result.cars):
+        # nothing to brake for after the finish line, the final lap is faster
+        assert solver_car.lap_times[-1] < solver_car.lap_times[-2] - 0.1
+        assert adaptive_result.cars[idx].lap_times == pytest.approx(solver_car.lap_times, abs=1e-6)
+        for frames_result in frames_results:
+            assert frames_result.cars[idx].lap_times == pytest.approx(solver_car.lap_times, abs=0.02)
+            assert frames_result.cars[idx].top_speed == pytest.approx(solver_car.top_speed, abs=0.1)
+    assert RaceBatch([Race(hairpin_start_track, peloton, laps=5)]).run() == [frames_results[1]]
+
+
+@pytest.mark.parametrize('mode', list(RaceMode))
+def test_race_track_edited(default_track: Track, mode: RaceMode):
+    peloton = Peloton(cars=[Car(caption='car', max_acceleration=3.5, max_braking=9.8, max_speed=55.0)])
+    race = Race(default_track, peloton, laps=2, mode=mode)
+    default_track.edit_sector(0, length=250.0)
+    default_track.sectors[3].corner = 45.0
+
+    edited_track = Track(sectors=[*default_track.sectors])
+    assert race.run() == Race(edited_track, peloton, laps=2, mode=mode).run()
+
+
+def test_steady_laps(default_track: Track):
+    cars = [
+        Car(caption='slow', max_acceleration=3.0, max_braking=9.0, max_speed=50.0),
+        Car(caption='fast', max_acceleration=5.0, max_braking=12.0, max_speed=60.0),
+    ]
+    full_result = Race(default_track, Peloton(cars=cars), laps=8, steady_laps=False).run()
+    result = Race(default_track, Peloton(cars=cars), laps=8).run()
+
+    assert result.frames * 2 < full_result.frames
+    for full_car, car_result in zip(full_result.cars, result.cars):
+        assert car_result.lap_times == pytest.approx(full_car.lap_times, abs=0.01)
+        assert car_result.finish_time == pytest.approx(full_car.finish_time, abs=0.05)
+        assert car_result.top_speed == full_car.top_speed
+
+    # telemetry needs every frame
+    sampled = Race(default_track, Peloton(cars=cars), laps=8)
+    for _ in sampled.stream(sample_every=100):
+        pass
+    assert sampled.result.frames == full_result.frames
+
+
+def test_peloton_state_snapshot():
+    state = PelotonState(2, track_length=100.0)
+    state.speed += 10.0
+    snapshot = state.snapshot()
+    state.speed += 5.0
+    state.laps[0] = 1
+
+    assert snapshot.speed.tolist() == [10.0, 10.0]
+    assert snapshot.laps.tolist() == [0, 0]
+    assert snapshot.next_line.tolist() == [100.0, 100.0]
+    with pytest.raises(AttributeError):
+        state.position = 0.0
+
+
+def test_races_with_own_configs(car_all_100: Car, straight_200: Sector, max_curve_180: Sector):
+    track = Track(sectors=[straight_200, max_curve_180, straight_200, max_curve_180])
+    peloton = Peloton(cars=[car_all_100])
+    configs = [sim_config.copy(update={'slowest_curve_speed': speed}) for speed in (2.0, 5.0, 10.0, 20.0)]
+    races = [
+        Race(track, peloton, laps=2, mode=mode, config=config) for config in configs for mode in RaceMode
+    ]
+    # the same track is shared by the races, each of them keeps its config when running in its own thread
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda race: race.run(), races))
+
+    sequential = [Race(track, peloton, laps=2, mode=race.mode, config=race.config).run() for race in races]
+    assert results == sequential
+    frames_times = [result.cars[0].finish_time for result, race in zip(results, races) if race.mode == RaceMode.FRAMES]
+    assert frames_times == sorted(frames_times, reverse=True)
+    assert len(set(frames_times)) == len(configs)
+    assert Race(track, peloton, laps=2).config is sim_config
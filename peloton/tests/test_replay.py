@@ -0,0 +1,54 @@
+import math
+
+import numpy as np
+import pytest
+
+from peloton.models.bolid import Car, Peloton
+from peloton.models.track import Track
+from peloton.simulation.race import Race
+from peloton.simulation.replay import ReplaySink, Replay
+
+
+def test_replay(tmp_path, car_all_100: Car, straight_track: Track):
+    slow_car = Car(caption='slow', max_acceleration=50.0, max_braking=50.0, max_speed=50.0)
+    path = str(tmp_path / 'race.replay')
+    result = Race(straight_track, Peloton(cars=[car_all_100, slow_car]), laps=2).run(
+        ReplaySink(path), sample_every=10, batch_size=100,
+    )
+
+    replay = Replay(path)
+    assert isinstance(replay.records, np.memmap)
+    assert replay.captions == ['100 car', 'slow']
+    assert replay.result == result
+    assert replay.sample_interval == pytest.approx(0.1)
+    assert len(replay) == math.ceil(result.frames / 10)
+
+    sample = replay.at(3.05)
+    assert sample['race_time'] == pytest.approx(3.0)
+    assert sample['speed'].tolist() == pytest.approx([100.0, 50.0])
+    assert sample['distance'][replay.car('100 car')] == pytest.approx(250.0, abs=0.01)
+    assert sample['sector'].tolist() == [0, 0]
+
+    window = replay.between(1.0, 2.0)
+    assert window['race_time'].tolist() == pytest.approx(np.arange(1.0, 2.05, 0.1).tolist())
+    assert replay.at(1000.0)['race_time'] == replay.records['race_time'][-1]
+
+
+def test_not_a_replay(tmp_path):
+    path = tmp_path / 'race.replay'
+    path.write_bytes(b'not a replay')
+    with pytest.raises(ValueError):
+        Replay(str(path))
+
+
+def test_empty_replay(tmp_path):
+    path = str(tmp_path / 'race.replay')
+    sink = ReplaySink(path)
+    sink.open(['car'], 0.1)
+    sink.close()
+
+    replay = Replay(path)
+    assert len(replay) == 0
+    assert len(replay.between(0.0, 1.0)) == 0
+    with pytest.raises(ValueError, match='Replay has no samples'):
+        replay.at(0.0)
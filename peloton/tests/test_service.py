@@ -0,0 +1,210 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from peloton.conf.settings import sim_config, get_config
+from peloton.models.bolid import Car, Peloton
+from peloton.models.simulation import RaceResult, RaceMode
+from peloton.models.track import Track
+from peloton.service import app as service_app
+from peloton.service.app import create_app, run_race, build_race
+from peloton.service.cache import LRUCache
+from peloton.service.live import LiveRace
+from peloton.service.models import RaceRequest
+from peloton.simulation.race import Race
+
+
+def race_request_json(race_request: RaceRequest):
+    return json.loads(race_request.json())
+
+
+@pytest.fixture()
+def client():
+    with TestClient(create_app(workers=1, cache_size=4)) as test_client:
+        yield test_client
+
+
+@pytest.fixture()
+def race_request(car_all_100: Car, default_track: Track):
+    return RaceRequest(track=default_track, peloton=Peloton(cars=[car_all_100]), laps=2)
+
+
+def test_create_race(client: TestClient, race_request: RaceRequest):
+    response = client.post('/races', json=race_request_json(race_request))
+    assert response.status_code == 200
+    job = response.json()
+    assert job['status'] == 'done'
+    assert not job['cached']
+    assert RaceResult.parse_obj(job['result']) == run_race(race_request)
+
+    response = client.post('/races', json=race_request_json(race_request))
+    assert response.json()['cached']
+    assert response.json()['job_id'] == job['job_id']
+
+    race_request.mode = RaceMode.SOLVER
+    response = client.post('/races', json=race_request_json(race_request))
+    assert response.json()['job_id'] != job['job_id']
+
+
+def test_race_job(client: TestClient, race_request: RaceRequest):
+    response = client.post('/races', params={'wait': False}, json=race_request_json(race_request))
+    assert response.status_code == 202
+    job_id = response.json()['job_id']
+
+    for _ in range(100):
+        response = client.get(f'/races/{job_id}')
+        if response.status_code == 200:
+            break
+        time.sleep(0.05)
+    assert response.json()['status'] == 'done'
+    assert client.get('/races/unknown').status_code == 404
+
+
+def test_columnar_track_request(client: TestClient, race_request: RaceRequest):
+    payload = race_request_json(race_request)
+    payload['track'] = {'sectors': {
+        'lengths': [sector.length for sector in race_request.track.sectors],
+        'corners': [sector.corner for sector in race_request.track.sectors],
+    }}
+    response = client.post('/races', json=payload)
+    assert response.json()['result'] == client.post('/races', json=race_request_json(race_request)).json()['result']
+
+
+def test_request_config(client: TestClient, race_request: RaceRequest):
+    job = client.post('/races', json=race_request_json(race_request)).json()
+    race_request.config = sim_config.copy(update={'slowest_curve_speed': 40.0})
+    config_job = client.post('/races', json=race_request_json(race_request)).json()
+
+    assert config_job['job_id'] != job['job_id']
+    assert not config_job['cached']
+    assert RaceResult.parse_obj(config_job['result']) == run_race(race_request)
+    assert config_job['result'] != job['result']
+    assert get_config() is sim_config
+
+
+def failing_run_race(*args, **kwargs) -> RaceResult:
+    raise RuntimeError('worker failure')
+
+
+def test_failed_race(monkeypatch, client: TestClient, race_request: RaceRequest):
+    # the pool worker is forked with the failing function
+    monkeypatch.setattr(service_app, 'run_race', failing_run_race)
+    response = client.post('/races', json=race_request_json(race_request))
+    assert response.status_code == 200
+    job = response.json()
+    assert job['status'] == 'failed'
+    assert job['error'] == 'worker failure'
+    assert client.get(f'/races/{job["job_id"]}').json()['status'] == 'failed'
+
+
+def test_invalid_request(client: TestClient, race_request: RaceRequest):
+    payload = race_request_json(race_request)
+    payload['laps'] = 0
+    assert client.post('/races', json=payload).status_code == 422
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert len(cache) == 2
+
+
+def test_live_race_websocket(client: TestClient, race_request: RaceRequest):
+    with client.websocket_connect('/races/live?rate=1') as websocket:
+        websocket.send_json(race_request_json(race_request))
+        messages = []
+        while not messages or messages[-1]['type'] != 'result':
+            messages.append(websocket.receive_json())
+
+    assert messages[0] == {'type': 'start', 'cars': ['100 car'], 'sample_interval': 1.0}
+    frames = messages[1:-1]
+    assert [frame['race_time'] for frame in frames] == pytest.approx(list(range(len(frames))))
+    assert frames[-1]['race_time'] <= messages[-1]['result']['race_time'] < frames[-1]['race_time'] + 1.0
+    assert frames[10]['distance'][0] > frames[9]['distance'][0]
+
+
+def test_live_race_websocket_invalid_request(client: TestClient):
+    with client.websocket_connect('/races/live') as websocket:
+        websocket.send_json({'laps': 1})
+        assert websocket.receive_json()['type'] == 'error'
+
+
+def test_live_race_server_sent_events(client: TestClient, race_request: RaceRequest):
+    response = client.post('/races/live', params={'rate': 2}, json=race_request_json(race_request))
+
+    assert response.headers['content-type'].startswith('text/event-stream')
+    events = [line for line in response.text.splitlines() if line.startswith('event: ')]
+    assert events[0] == 'event: start'
+    assert events[-1] == 'event: result'
+    assert set(events[1:-1]) == {'event: frame'}
+
+
+def test_live_race_modes(client: TestClient, race_request: RaceRequest):
+    race_request.mode = RaceMode.ADAPTIVE
+    response = client.post('/races/live', params={'rate': 2}, json=race_request_json(race_request))
+    data = [line[len('data: '):] for line in response.text.splitlines() if line.startswith('data: ')]
+    result = json.loads(data[-1])['result']
+    # telemetry samples add steps to the adaptive mode, the ride is the same
+    assert RaceResult.parse_obj(result).cars == run_race(race_request).cars
+
+    race_request.mode = RaceMode.SOLVER
+    assert client.post('/races/live', json=race_request_json(race_request)).status_code == 422
+    with client.websocket_connect('/races/live') as websocket:
+        websocket.send_json(race_request_json(race_request))
+        assert websocket.receive_json()['type'] == 'error'
+
+
+def test_live_race_drops_oldest_frames(race_request: RaceRequest):
+    async def read_slowly():
+        live_race = LiveRace(build_race(race_request), rate=100.0, buffer_size=8)
+        messages = live_race.messages()
+        assert (await messages.__anext__())['type'] == 'start'
+
+        # a slow client: the whole race is simulated before the first frame is read
+        read_first = asyncio.ensure_future(messages.__anext__())
+        while live_race.result is None:
+            await asyncio.sleep(0.01)
+        return live_race, [await read_first] + [message async for message in messages]
+
+    live_race, frames = asyncio.run(read_slowly())
+    assert frames[-1]['type'] == 'result'
+    assert live_race.dropped > 0
+    # every simulated frame is either sent or reported as dropped
+    assert len(frames) - 1 + sum(frame['dropped'] for frame in frames[:-1]) == live_race.result.frames
+
+
+def test_live_race_failed(monkeypatch, client: TestClient, race_request: RaceRequest):
+    def failing_stream(*args, **kwargs):
+        raise RuntimeError('engine failure')
+        yield
+
+    # the race process is forked with the failing engine
+    monkeypatch.setattr(Race, 'stream', failing_stream)
+
+    async def read_all():
+        return [message async for message in LiveRace(build_race(race_request)).messages()]
+
+    messages = asyncio.run(asyncio.wait_for(read_all(), timeout=10.0))
+    assert [message['type'] for message in messages] == ['start', 'error']
+    assert messages[-1]['error'] == 'engine failure'
+
+    response = client.post('/races/live', json=race_request_json(race_request))
+    events = [line for line in response.text.splitlines() if line.startswith('event: ')]
+    assert events == ['event: start', 'event: error']
+
+    with client.websocket_connect('/races/live') as websocket:
+        websocket.send_json(race_request_json(race_request))
+        assert websocket.receive_json()['type'] == 'start'
+        assert websocket.receive_json() == {'type': 'error', 'error': 'engine failure'}
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            websocket.receive_json()
+    assert exc_info.value.code == 1011
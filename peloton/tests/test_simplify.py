@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from peloton.benchmarks.suite import synthetic_track, synthetic_peloton
+from peloton.models.track import Track
+from peloton.simulation.envelope import car_speed_limits
+from peloton.simulation.simplify import simplify_track
+
+
+def test_simplify_speed_error():
+    track = synthetic_track(10000)
+    cars = synthetic_peloton(3).cars
+    simplified = simplify_track(track, cars, max_speed_error=0.5)
+
+    assert len(simplified.track.sectors) < len(track.sectors) / 5
+    assert simplified.track.length == pytest.approx(track.length)
+    assert np.allclose(simplified.track.sector_starts, track.sector_starts[simplified.sector_starts[:-1]])
+    for car in cars:
+        error = car_speed_limits(simplified.track, car)[simplified.sector_map] - car_speed_limits(track, car)
+        assert np.abs(error).max() <= 0.5
+
+
+def test_simplify_sector_map(default_track: Track):
+    cars = synthetic_peloton(1).cars
+    simplified = simplify_track(default_track, cars, max_speed_error=2.0)
+
+    assert len(simplified.sector_map) == len(default_track.sectors)
+    assert (np.diff(simplified.sector_map) >= 0).all()
+    for coarse_index in range(len(simplified.track.sectors)):
+        sectors = simplified.original_sectors(coarse_index)
+        assert (simplified.sector_map[sectors.start:sectors.stop] == coarse_index).all()
+        assert simplified.track.sector_lengths[coarse_index] == pytest.approx(
+            default_track.sector_lengths[sectors.start:sectors.stop].sum()
+        )
+
+
+def test_simplify_lap_time_error():
+    track = synthetic_track(10000)
+    cars = synthetic_peloton(2).cars
+    simplified = simplify_track(track, cars, max_speed_error=2.0, max_lap_time_error=0.02)
+
+    assert max(simplified.lap_time_errors) <= 0.02
+    assert simplified.max_speed_error < 2.0
+    assert len(simplified.track.sectors) < len(track.sectors)
+
+
+def test_simplify_validation(default_track: Track):
+    with pytest.raises(ValueError):
+        simplify_track(default_track, [])
+    with pytest.raises(ValueError):
+        simplify_track(default_track, synthetic_peloton(1).cars, max_speed_error=0.0)
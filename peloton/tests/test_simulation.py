@@ -1,8 +1,10 @@
+import math
+
 from peloton.common.math import is_equal
-from peloton.conf.settings import sim_config
+from peloton.conf.settings import sim_config, get_config, use_config
 from peloton.models.bolid import Car
 from peloton.models.simulation import RaceCar
-from peloton.models.track import Sector
+from peloton.models.track import Sector, Track
 
 
 def test_max_speed_straight(car_all_100: Car, straight_200: Sector):
@@ -18,3 +20,50 @@ def test_max_speed_for_curvatures(
     assert is_equal(race_car.max_speed(semi_curve_180), 52.0)
     assert is_equal(race_car.max_speed(high_curve_180), 40.0)
     assert is_equal(race_car.max_speed(max_curve_180), sim_config.slowest_curve_speed)
+
+
+def test_max_speeds_table(car_all_100: Car, default_track: Track):
+    race_car = RaceCar(car=car_all_100, speed=0.0)
+    max_speeds = race_car.max_speeds(default_track)
+
+    assert max_speeds.tolist() == [race_car.max_speed(sector) for sector in default_track.sectors]
+    assert race_car.max_speeds(default_track) is max_speeds
+
+
+def test_max_speeds_table_sector_changed(car_all_100: Car, straight_200: Sector, semi_curve_180: Sector):
+    track = Track(sectors=[straight_200, semi_curve_180])
+    race_car = RaceCar(car=car_all_100, speed=0.0)
+    assert is_equal(race_car.max_speeds(track)[1], 52.0)
+
+    track.sectors[1].length *= 2
+    assert is_equal(track.sectors[1].curvature, 0.25)
+    assert is_equal(race_car.max_speeds(track)[1], 72.0)
+    assert is_equal(track.length, 200.0 + 4 * 5 * math.pi)
+
+
+def test_max_speeds_table_config_changed(car_all_100: Car, max_curve_180: Sector):
+    track = Track(sectors=[max_curve_180])
+    race_car = RaceCar(car=car_all_100, speed=0.0)
+    slowest_curve_speed = sim_config.slowest_curve_speed
+    assert race_car.max_speeds(track)[0] == slowest_curve_speed
+
+    sim_config.slowest_curve_speed = 20.0
+    try:
+        assert race_car.max_speeds(track)[0] == 20.0
+    finally:
+        sim_config.slowest_curve_speed = slowest_curve_speed
+
+
+def test_max_speeds_table_per_config(car_all_100: Car, max_curve_180: Sector):
+    track = Track(sectors=[max_curve_180])
+    race_car = RaceCar(car=car_all_100, speed=0.0)
+    config = sim_config.copy(update={'slowest_curve_speed': 20.0})
+
+    with use_config(config):
+        assert get_config() is config
+        assert race_car.max_speeds(track)[0] == 20.0
+    assert get_config() is sim_config
+    assert race_car.max_speeds(track)[0] == sim_config.slowest_curve_speed
+    with use_config(config):
+        # the table of the other config is kept
+        assert race_car.max_speeds(track)[0] == 20.0
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from peloton.simulation.solver import solve_speed_profile
+
+
+def test_profile_accelerate_then_brake():
+    # 0 -> 20 m/s on 20 meters, then 20 -> 10 m/s on 15 meters
+    profile = solve_speed_profile(
+        lengths=[35.0, 100.0], max_speeds=[50.0, 10.0], max_acceleration=10.0, max_braking=10.0,
+    )
+
+    assert profile.entry_speed[0] == 0.0
+    assert profile.peak_speed[0] == pytest.approx(20.0)
+    assert profile.braking_point[0] == pytest.approx(20.0)
+    assert profile.exit_speed[0] == pytest.approx(10.0)
+    assert profile.sector_time[0] == pytest.approx(2.0 + 1.0)
+    # the second sector is ridden at its max speed
+    assert profile.sector_time[1] == pytest.approx(10.0)
+
+
+def test_profile_cruise():
+    # 0 -> 10 m/s on 5 meters, 85 meters at 10 m/s, 10 -> 0 m/s on 10 meters
+    profile = solve_speed_profile(
+        lengths=[100.0], max_speeds=[10.0], max_acceleration=10.0, max_braking=5.0, exit_speed=0.0,
+    )
+
+    assert profile.peak_speed[0] == pytest.approx(10.0)
+    assert profile.braking_point[0] == pytest.approx(90.0)
+    assert profile.time == pytest.approx(1.0 + 8.5 + 2.0)
+
+
+def test_profile_too_fast_entry():
+    with pytest.raises(ValueError):
+        solve_speed_profile(
+            lengths=np.array([1.0, 10.0]), max_speeds=np.array([50.0, 10.0]),
+            max_acceleration=10.0, max_braking=10.0, entry_speed=50.0,
+        )
@@ -0,0 +1,53 @@
+import pytest
+from pydantic import ValidationError
+
+from peloton.models.bolid import Car, Peloton
+from peloton.models.simulation import RaceMode
+from peloton.models.track import Track
+from peloton.scripts.sweep import grid, random_sample, sweep, coarse_sweep
+from peloton.simulation.race import Race
+
+
+def test_grid():
+    setups = grid(max_acceleration=[3.0, 4.0], max_braking=[9.0], max_speed=[50.0, 55.0, 60.0])
+
+    assert len(setups) == 6
+    assert setups[1] == dict(max_acceleration=3.0, max_braking=9.0, max_speed=55.0)
+
+
+def test_random_sample():
+    setups = random_sample(50, max_acceleration=(3.0, 4.0), max_braking=(9.0, 9.0), max_speed=(50.0, 60.0), seed=1)
+
+    assert len(setups) == 50
+    assert setups == random_sample(50, (3.0, 4.0), (9.0, 9.0), (50.0, 60.0), seed=1)
+    assert all(3.0 <= setup['max_acceleration'] <= 4.0 for setup in setups)
+
+
+def test_sweep(default_track: Track):
+    setups = grid(max_acceleration=[3.0, 4.0, 5.0], max_braking=[9.0, 12.0], max_speed=[50.0, 60.0])
+    rows = sweep(default_track, setups, laps=2, workers=2, chunk_size=5)
+
+    assert [row.max_acceleration for row in rows] == [setup['max_acceleration'] for setup in setups]
+    assert rows == sweep(default_track, setups, laps=2, workers=0)
+
+    car = Car(caption='car', **setups[7])
+    result = Race(default_track, Peloton(cars=[car]), laps=2, mode=RaceMode.SOLVER).run()
+    assert rows[7].lap_times == pytest.approx(result.cars[0].lap_times)
+
+
+def test_sweep_invalid_setup(default_track: Track):
+    with pytest.raises(ValidationError):
+        sweep(default_track, [dict(max_acceleration=0.0, max_braking=9.0, max_speed=50.0)], workers=0)
+
+
+def test_coarse_sweep(default_track: Track):
+    setups = grid(max_acceleration=[3.0, 4.0], max_braking=[9.0], max_speed=[50.0, 60.0])
+    rows = coarse_sweep(default_track, setups, max_speed_error=2.0, confirm_top=1, laps=2, workers=0)
+    full_rows = sweep(default_track, setups, laps=2, workers=0)
+
+    assert [row.confirmed for row in rows].count(True) == 1
+    fastest = min(rows, key=lambda row: row.finish_time)
+    assert fastest.confirmed
+    assert fastest == min(full_rows, key=lambda row: row.finish_time)
+    for row, full_row in zip(rows, full_rows):
+        assert row.finish_time == pytest.approx(full_row.finish_time, abs=0.1)
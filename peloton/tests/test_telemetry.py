@@ -0,0 +1,56 @@
+import io
+import json
+import math
+import sqlite3
+
+import numpy as np
+import pytest
+
+from peloton.models.bolid import Car, Peloton
+from peloton.models.track import Track
+from peloton.simulation.race import Race
+from peloton.simulation.telemetry import NDJSONSink, SQLiteSink
+
+
+@pytest.fixture()
+def two_cars_race(car_all_100: Car, straight_track: Track):
+    slow_car = Car(caption='slow', max_acceleration=50.0, max_braking=50.0, max_speed=50.0)
+    return Race(straight_track, Peloton(cars=[car_all_100, slow_car]), laps=2)
+
+
+def test_stream_batches(two_cars_race: Race):
+    batches = list(two_cars_race.stream(sample_every=10, batch_size=64))
+
+    assert all(len(batch) == 64 for batch in batches[:-1])
+    samples = sum(len(batch) for batch in batches)
+    assert samples == math.ceil(two_cars_race.result.frames / 10)
+
+    race_time = np.concatenate([batch.race_time for batch in batches])
+    assert np.allclose(np.diff(race_time), 0.1)
+    distance = np.concatenate([batch.distance for batch in batches])
+    assert distance.shape == (samples, 2)
+    assert (np.diff(distance, axis=0) >= 0).all()
+    assert two_cars_race.result.cars[1].finish_time == pytest.approx(8.5, abs=0.01)
+
+
+def test_ndjson_sink(two_cars_race: Race):
+    output = io.StringIO()
+    result = two_cars_race.run(NDJSONSink(output), sample_every=100)
+
+    lines = output.getvalue().splitlines()
+    assert json.loads(lines[0]) == {'cars': ['100 car', 'slow'], 'sample_interval': 1.0}
+    assert len(lines) == 1 + math.ceil(result.frames / 100)
+    sample = json.loads(lines[2])
+    assert sample['race_time'] == pytest.approx(1.0)
+    assert sample['speed'] == pytest.approx([100.0, 50.0])
+
+
+def test_sqlite_sink(two_cars_race: Race):
+    connection = sqlite3.connect(':memory:')
+    result = two_cars_race.run(SQLiteSink(connection, 'Test race'), sample_every=10, batch_size=16)
+
+    assert connection.execute('SELECT title FROM race').fetchall() == [('Test race',)]
+    assert connection.execute('SELECT COUNT(*) FROM race_log').fetchone()[0] == 2 * math.ceil(result.frames / 10)
+    assert connection.execute(
+        "SELECT MAX(speed) FROM race_log WHERE car = 'slow'"
+    ).fetchone()[0] == pytest.approx(50.0)
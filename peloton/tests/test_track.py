@@ -1,5 +1,11 @@
+import pickle
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
 from peloton.common.math import is_equal
-from peloton.models.track import Sector
+from peloton.models.track import Sector, Track, SectorColumns, get_default_track
 
 
 def test_curvature_straigt(straight_200: Sector):
@@ -42,3 +48,190 @@ def test_curvature_low(low_curve_180: Sector):
 
 def test_curvature_high(high_curve_180: Sector):
     assert is_equal(high_curve_180.curvature, 0.75)
+
+
+def test_track_length(default_track: Track):
+    assert is_equal(default_track.length, 1467.1)
+    assert default_track.get_sector_start(0) == 0.0
+    assert is_equal(default_track.get_sector_start(2), 165.0)
+
+
+def test_sector_position(default_track: Track):
+    assert default_track.get_sector_position(0.0) == (0, 0.0)
+    assert default_track.get_sector_position(150.0) == (1, 0.0)
+
+    sector_index, distance_from_sector_start = default_track.get_sector_position(160.0)
+    assert sector_index == 1
+    assert is_equal(distance_from_sector_start, 10.0)
+
+    # the last sector and the next lap
+    assert default_track.get_sector_index(default_track.length - 0.1) == len(default_track.sectors) - 1
+    assert default_track.get_sector_index(default_track.length + 160.0) == 1
+
+
+def test_sector_positions_batched(default_track: Track):
+    distances = np.array([0.0, 150.0, 160.0, default_track.length - 0.1, default_track.length + 160.0])
+    sector_indexes, distances_from_sector_start = default_track.get_sector_positions(distances)
+
+    assert sector_indexes.tolist() == [default_track.get_sector_index(distance) for distance in distances]
+    assert np.allclose(
+        distances_from_sector_start,
+        [default_track.get_sector_position(distance).distance_from_sector_start for distance in distances],
+    )
+    assert default_track.get_sector_indexes(distances).tolist() == sector_indexes.tolist()
+
+
+def test_sectors_index_reset(straight_200: Sector):
+    track = Track(sectors=[straight_200])
+    assert track.length == 200.0
+
+    track.sectors = [straight_200, straight_200]
+    assert track.length == 400.0
+    assert track.get_sector_index(250.0) == 1
+
+
+def test_sectors_changes_per_track(default_track: Track):
+    other_track = get_default_track()
+    other_track.get_derived('speed_table', lambda: 'kept')
+    revision = other_track.revision
+
+    default_track.get_derived('speed_table', lambda: 'stale')
+    default_track.sectors[0].length += 10.0
+    assert default_track.length == pytest.approx(1477.1)
+    assert default_track.get_derived('speed_table', lambda: 'fresh') == 'fresh'
+    assert other_track.revision == revision
+    assert other_track.get_derived('speed_table', lambda: 'fresh') == 'kept'
+
+    for track in (other_track.copy(), other_track.copy(deep=True), pickle.loads(pickle.dumps(other_track))):
+        assert track.get_derived('speed_table', lambda: 'fresh') == 'kept'
+        track.sectors[0].length += 10.0
+        assert track.length == pytest.approx(1477.1)
+        assert track.get_derived('speed_table', lambda: 'fresh') == 'fresh'
+
+
+def test_sector_columns(default_track: Track):
+    columns = SectorColumns(
+        lengths=[sector.length for sector in default_track.sectors],
+        corners=[sector.corner for sector in default_track.sectors],
+    )
+    columnar_track = Track(sectors=columns)
+
+    assert columnar_track.sectors is columns
+    assert len(columnar_track.sectors) == len(default_track.sectors)
+    assert columnar_track.sectors[3] == default_track.sectors[3]
+    assert list(columnar_track.sectors) == list(default_track.sectors)
+    assert np.array_equal(columnar_track.sector_curvatures, default_track.sector_curvatures)
+    assert columnar_track.length == default_track.length
+    assert columnar_track.get_sector_position(160.0) == default_track.get_sector_position(160.0)
+
+
+def test_sector_columns_validation(max_curve_90: Sector):
+    with pytest.raises(ValidationError) as exc_info:
+        SectorColumns(lengths=[200.0, 0.0, 1.0, max_curve_90.length], corners=[0.0, 0.0, 360.0, 90.0])
+
+    assert [error['loc'] for error in exc_info.value.errors()] == [('sectors', 1, 'length'), ('sectors', 2, 'corner')]
+
+    with pytest.raises(ValidationError) as exc_info:
+        SectorColumns(lengths=[1.0], corners=[-90.0])
+    with pytest.raises(ValidationError) as sector_exc_info:
+        Sector(length=1.0, corner=-90.0)
+    assert exc_info.value.errors()[0]['msg'] == sector_exc_info.value.errors()[0]['msg']
+
+
+def test_track_from_arrays(default_track: Track):
+    track = Track.from_arrays(
+        lengths=[sector.length for sector in default_track.sectors],
+        corners=[sector.corner for sector in default_track.sectors],
+    )
+
+    assert list(track.sectors) == list(default_track.sectors)
+    assert np.array_equal(track.sector_starts, default_track.sector_starts)
+
+    with pytest.raises(ValidationError) as exc_info:
+        Track.from_arrays(lengths=[10.0, -1.0], corners=[0.0, 0.0])
+    with pytest.raises(ValidationError) as sectors_exc_info:
+        Track(sectors=[dict(length=10.0, corner=0.0), dict(length=-1.0, corner=0.0)])
+    assert exc_info.value.errors() == sectors_exc_info.value.errors() == [{
+        'loc': ('sectors', 1, 'length'),
+        'msg': 'ensure this value is greater than 0',
+        'type': 'value_error.number.not_gt',
+        'ctx': {'limit_value': 0},
+    }]
+    with pytest.raises(ValidationError) as columns_exc_info:
+        Track(sectors={'lengths': [10.0, -1.0], 'corners': [0.0, 0.0]})
+    assert columns_exc_info.value.errors() == exc_info.value.errors()
+
+    with pytest.raises(ValidationError) as exc_info:
+        Track(sectors={'lengths': [10.0]})
+    assert [error['msg'] for error in exc_info.value.errors()] == [
+        'sector columns must be a mapping with `lengths` and `corners` lists',
+    ]
+    with pytest.raises(ValidationError) as exc_info:
+        Track(sectors=10.0)
+    assert [error['msg'] for error in exc_info.value.errors()] == ['value is not a valid sequence']
+
+
+def test_track_from_arrays_not_numbers():
+    sectors_errors = []
+    for sectors in (
+            [dict(length=True, corner=0.0), dict(length=10.0, corner='0'), dict(length='10', corner=0.0)],
+            {'lengths': [True, 10.0, '10'], 'corners': [0.0, '0', 0.0]},
+    ):
+        with pytest.raises(ValidationError) as exc_info:
+            Track(sectors=sectors)
+        sectors_errors.append(exc_info.value.errors())
+    with pytest.raises(ValidationError) as exc_info:
+        Track.from_arrays([True, 10.0, '10'], [0.0, '0', 0.0])
+
+    assert sectors_errors[0] == sectors_errors[1] == exc_info.value.errors()
+    assert [error['loc'] for error in exc_info.value.errors()] == [
+        ('sectors', 0, 'length'), ('sectors', 1, 'corner'), ('sectors', 2, 'length'),
+    ]
+
+    with pytest.raises(ValidationError) as exc_info:
+        Track.from_arrays(np.array([True, False]), np.zeros(2))
+    assert [error['loc'] for error in exc_info.value.errors()] == [('sectors', 0, 'length'), ('sectors', 1, 'length')]
+    with pytest.raises(ValidationError):
+        Track.from_arrays(np.array(['10', '10']), np.zeros(2))
+    assert Track.from_arrays(np.array([10, 20]), np.zeros(2, dtype=np.float32)).length == 30.0
+
+
+@pytest.mark.parametrize('columns', [False, True])
+def test_edit_sector(default_track: Track, columns: bool):
+    track = Track.from_arrays(default_track.sector_lengths, default_track.sector_corners) if columns else default_track
+    track.get_derived('speed_table', lambda: 'stale')
+    curvatures = track.sector_curvatures
+    lengths, starts, revision = track.sector_lengths, track.sector_starts, track.revision
+
+    sector = track.edit_sector(3, length=50.0)
+    assert track.revision != revision
+    assert lengths[3] == starts[4] - starts[3] == 25.0
+    assert curvatures[3] == pytest.approx(2 * track.sector_curvatures[3])
+    if columns:
+        assert default_track.sector_lengths[3] == 25.0
+        assert is_equal(default_track.length, 1467.1)
+    assert sector.corner == default_track.sector_corners[3]
+    assert track.sectors[3].length == 50.0
+    assert track.length == pytest.approx(sum(s.length for s in track.sectors))
+    assert track.sector_starts[4] == pytest.approx(150.0 + 15.0 + 15.0 + 50.0)
+    assert track.get_sector_index(230.0) == 4
+    assert track.get_derived('speed_table', lambda: 'fresh') == 'fresh'
+
+    with pytest.raises(ValidationError):
+        track.edit_sector(3, length=10.0, corner=300.0)
+    assert track.sectors[3].length == 50.0
+    with pytest.raises(ValueError):
+        track.edit_sector(len(track.sectors))
+
+
+def test_sectors_immutable(default_track: Track, straight_200: Sector):
+    assert isinstance(default_track.sectors, tuple)
+    with pytest.raises(AttributeError):
+        default_track.sectors.append(straight_200)
+    with pytest.raises(TypeError):
+        default_track.sectors[0] = straight_200
+
+    default_track.sectors = [*default_track.sectors, straight_200]
+    assert isinstance(default_track.sectors, tuple)
+    assert is_equal(default_track.length, 1467.1 + 200.0)
+    assert default_track.get_sector_index(1500.0) == len(default_track.sectors) - 1
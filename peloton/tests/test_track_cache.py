@@ -0,0 +1,98 @@
+import numpy as np
+
+from peloton.conf.settings import sim_config
+from peloton.models.bolid import Car, Peloton
+from peloton.models.track import Track, get_default_track
+from peloton.simulation import track_cache
+from peloton.simulation.envelope import car_speed_limits, car_envelope_speeds_sq
+from peloton.simulation.race import Race
+from peloton.simulation.track_cache import TrackCache, track_hash
+
+
+def test_track_cache_round_trip(tmp_path, car_all_100: Car, default_track: Track):
+    cache = TrackCache(str(tmp_path))
+    assert cache.load(default_track) == 0
+
+    limits = car_speed_limits(default_track, car_all_100)
+    envelope = car_envelope_speeds_sq(default_track, car_all_100)
+    assert cache.store(default_track) >= 2
+    assert cache.store(default_track) == 0
+
+    track = get_default_track()
+    assert cache.load(track) >= 2
+    assert np.array_equal(car_speed_limits(track, car_all_100), limits)
+    assert isinstance(car_envelope_speeds_sq(track, car_all_100), np.memmap)
+    assert np.array_equal(car_envelope_speeds_sq(track, car_all_100), envelope)
+
+
+def test_track_cache_same_race_result(tmp_path, car_all_100: Car):
+    peloton = Peloton(cars=[car_all_100])
+    expected = Race(get_default_track(), peloton, laps=2).run()
+
+    cache = TrackCache(str(tmp_path))
+    track = get_default_track()
+    Race(track, peloton).run()
+    cache.store(track)
+
+    track = get_default_track()
+    cache.load(track)
+    assert Race(track, peloton, laps=2).run() == expected
+
+
+def test_track_hash_sim_config_changed(default_track: Track):
+    digest = track_hash(default_track)
+    assert track_hash(get_default_track()) == digest
+
+    slowest_curve_speed = sim_config.slowest_curve_speed
+    sim_config.slowest_curve_speed = 20.0
+    try:
+        assert track_hash(default_track) != digest
+    finally:
+        sim_config.slowest_curve_speed = slowest_curve_speed
+    assert track_hash(default_track) == digest
+
+
+def test_track_hash_curvature_version_changed(monkeypatch, default_track: Track):
+    digest = track_hash(default_track)
+    monkeypatch.setattr(track_cache, 'CURVATURE_VERSION', track_cache.CURVATURE_VERSION + 1)
+    assert track_hash(default_track) != digest
+
+
+def test_track_hash_sectors_changed(default_track: Track):
+    digest = track_hash(default_track)
+    default_track.sectors[0].length += 1.0
+    assert track_hash(default_track) != digest
+
+
+def test_track_cache_kept_on_other_tracks_changes(tmp_path, car_all_100: Car, default_track: Track):
+    cache = TrackCache(str(tmp_path))
+    car_envelope_speeds_sq(default_track, car_all_100)
+    cache.store(default_track)
+
+    track = get_default_track()
+    cache.load(track)
+    default_track.sectors[0].length += 1.0
+    get_default_track().sectors[0].corner = 10.0
+    assert isinstance(car_envelope_speeds_sq(track, car_all_100), np.memmap)
+
+    track.sectors[0].length += 1.0
+    assert not isinstance(car_envelope_speeds_sq(track, car_all_100), np.memmap)
+
+
+def test_track_cache_loaded_track_edited(tmp_path, car_all_100: Car):
+    peloton = Peloton(cars=[car_all_100])
+    cache = TrackCache(str(tmp_path))
+    track = get_default_track()
+    Race(track, peloton).run()
+    cache.store(track)
+
+    track = get_default_track()
+    cache.load(track)
+    envelope = car_envelope_speeds_sq(track, car_all_100)
+    track.edit_sector(0, length=120.0)
+    assert isinstance(envelope, np.memmap)
+    assert np.array_equal(envelope, car_envelope_speeds_sq(get_default_track(), car_all_100))
+
+    expected = get_default_track()
+    expected.edit_sector(0, length=120.0)
+    assert Race(track, peloton, laps=2).run() == Race(expected, peloton, laps=2).run()